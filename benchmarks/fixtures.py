@@ -0,0 +1,137 @@
+from __future__ import absolute_import
+from PIL import Image, ImageDraw, ImageFont
+import os
+import random
+
+SEED = 1337
+
+WORDS = [
+    'invoice', 'total', 'quantity', 'shipping', 'address', 'receipt', 'order', 'customer',
+    'payment', 'subtotal', 'discount', 'balance', 'account', 'reference', 'date', 'amount',
+]
+
+# fonts are looked up by name in the usual system locations; the built-in bitmap font is used in
+# their place if none of them are installed
+FONTS = [
+    'DejaVuSans.ttf',
+    'DejaVuSerif.ttf',
+    'DejaVuSansMono.ttf',
+    'LiberationSans-Regular.ttf',
+    'Arial.ttf',
+]
+
+FONT_SIZES = [12, 18, 32]
+
+
+def load_fonts(sizes=FONT_SIZES):
+    """
+    Returns a list of (name, font) pairs for each of the available fonts at each of the given
+    sizes.
+    """
+    fonts = []
+
+    for name in FONTS:
+        for size in sizes:
+            try:
+                fonts.append(('{}-{}'.format(os.path.splitext(name)[0].lower(), size), ImageFont.truetype(name, size)))
+            except (IOError, OSError):
+                break
+
+    if not fonts:
+        fonts.append(('default', ImageFont.load_default()))
+
+    return fonts
+
+
+def text_size(font, text):
+    try:
+        _, _, width, height = font.getbbox(text)
+        return (width, height)
+
+    # older versions of Pillow
+    except AttributeError:
+        return font.getsize(text)
+
+
+def render_text(lines, font, width=None, padding=20, spacing=8, background=(255, 255, 255), noise=0, rng=None):
+    """
+    Renders the given lines of black text onto an RGB image, optionally speckled with the given
+    fraction of randomly colored noise pixels.
+    """
+    rng = (rng or random.Random(SEED))
+    line_height = text_size(font, 'Mg')[1] + spacing
+
+    if width is None:
+        width = max([text_size(font, line)[0] for line in lines]) + 2 * padding
+
+    image = Image.new('RGB', (width, 2 * padding + line_height * len(lines)), background)
+    draw = ImageDraw.Draw(image)
+
+    if noise:
+        for _ in range(int(image.width * image.height * noise)):
+            draw.point(
+                (rng.randrange(image.width), rng.randrange(image.height)),
+                fill=(rng.randrange(256), rng.randrange(256), rng.randrange(256))
+            )
+
+    for i, line in enumerate(lines):
+        draw.text((padding, padding + i * line_height), line, fill=(0, 0, 0), font=font)
+
+    return image
+
+
+def random_lines(rng, count, words=8):
+    return [' '.join([rng.choice(WORDS) for _ in range(words)]) for _ in range(count)]
+
+
+def random_digits(rng, count, groups=4):
+    return [' '.join(['{:04d}'.format(rng.randrange(10000)) for _ in range(groups)]) for _ in range(count)]
+
+
+def generate(directory, huge=True):
+    """
+    Renders the benchmark fixtures into the given directory (if they aren't already there) and
+    returns a `dict` of fixture names to file paths.  The same fixtures are produced on every run.
+    """
+    if not os.path.isdir(directory):
+        os.makedirs(directory)
+
+    fixtures = {}
+    fonts = load_fonts()
+    _, medium = fonts[len(fonts) // 2]
+
+    images = []
+
+    for name, font in fonts:
+        images.append(('text-{}'.format(name), 'png', lambda rng, font=font: render_text(
+            random_lines(rng, 20),
+            font
+        )))
+
+    images.append(('digits', 'png', lambda rng: render_text(random_digits(rng, 20), medium)))
+    images.append(('noisy', 'png', lambda rng: render_text(random_lines(rng, 20), medium, noise=0.05, rng=rng)))
+    images.append(('rgba', 'png', lambda rng: render_text(random_lines(rng, 20), medium).convert('RGBA')))
+    images.append(('mapped', 'png', lambda rng: render_text(random_lines(rng, 20), medium).convert('P')))
+    images.append(('cmyk', 'tiff', lambda rng: render_text(random_lines(rng, 20), medium).convert('CMYK')))
+    images.append(('photo', 'jpg', lambda rng: render_text(random_lines(rng, 20), medium, noise=0.2, rng=rng)))
+
+    if huge:
+        # a full-page screenshot of a long document
+        images.append(('screenshot', 'png', lambda rng: render_text(
+            random_lines(rng, 600, words=24),
+            medium,
+            width=1920,
+            background=(250, 250, 250)
+        )))
+
+    for name, extension, render in images:
+        path = os.path.join(directory, '{}.{}'.format(name, extension))
+
+        if not os.path.exists(path):
+            # each fixture has its own random sequence so that it comes out the same regardless of
+            # which other fixtures are generated
+            render(random.Random('{}:{}'.format(SEED, name))).save(path)
+
+        fixtures[name] = path
+
+    return fixtures
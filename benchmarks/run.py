@@ -0,0 +1,350 @@
+#!/usr/bin/env python
+"""
+Times the image commands against a set of locally rendered fixtures.
+
+    python benchmarks/run.py [--output results.json] [--baseline previous.json]
+
+Every case is run against a stubbed browser tab, so no browser (or network access) is needed.
+Cases that need an OCR tool are skipped if none is installed.  When a baseline from a previous run
+is given, any case whose median time has grown by more than the threshold is reported as a
+regression and the exit status is non-zero.
+"""
+from __future__ import absolute_import, print_function
+from collections import OrderedDict
+import argparse
+import fixtures
+import gc
+import json
+import logging
+import os
+import re
+import resource
+import stubs
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from webfriend.images import backends, workers  # noqa: E402
+from webfriend.scripting.commands.image import ImageProxy  # noqa: E402
+import pyocr  # noqa: E402
+
+# imported up front (rather than on first use) so that the cost isn't counted against whichever
+# case happens to need them first
+import numpy  # noqa: E402,F401
+import PIL.Image  # noqa: E402,F401
+
+OUTPUT_FORMATS = [
+    'raw',
+    'numeric',
+    'numeric-words',
+    'words',
+    'lines',
+    'lines-words',
+    'characters',
+]
+
+RESCALE_FACTORS = [0.5, 1.0, 2.0]
+
+# increases in memory use smaller than this many bytes are not reported as regressions, since
+# allocator and garbage collector noise alone can account for them
+RSS_NOISE = 1048576
+
+OCR_FIXTURES = [
+    'digits',
+    'noisy',
+]
+
+
+def peak_rss():
+    """
+    Returns the peak resident set size of this process so far, in bytes.  This only ever grows, so
+    each case is measured in a process of its own (see `measure_isolated`.)
+    """
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    # reported in kilobytes everywhere but macOS
+    if sys.platform != 'darwin':
+        rss *= 1024
+
+    return rss
+
+
+def percentile(values, p):
+    values = sorted(values)
+    k = (len(values) - 1) * (p / 100.0)
+    lower = int(k)
+    upper = min(lower + 1, len(values) - 1)
+
+    return values[lower] + (values[upper] - values[lower]) * (k - lower)
+
+
+def new_proxy(images):
+    """
+    Returns an ImageProxy attached to a stub tab serving each of the given images both by URL and
+    from an element matching `#<name>`.  Image caching is disabled so that every call measures the
+    full cost of loading its image.
+    """
+    browser = stubs.Browser()
+
+    for name, path in images.items():
+        with open(path, 'rb') as f:
+            data = f.read()
+
+        size = ImageProxy(browser).info(file=path)
+
+        browser.default.add_image(
+            'http://localhost/{}'.format(os.path.basename(path)),
+            data,
+            selector='#{}'.format(name),
+            size=(size['width'], size['height'])
+        )
+
+    proxy = ImageProxy(browser)
+    proxy.configure(cache_size=0, ocr_cache='')
+
+    return proxy
+
+
+def cases(proxy, images, ocr=True):
+    """
+    Yields a (name, function) pair for each of the benchmark cases.
+    """
+    for name, path in sorted(images.items()):
+        url = 'http://localhost/{}'.format(os.path.basename(path))
+        selector = '#{}'.format(name)
+
+        yield 'open/file/{}'.format(name), lambda path=path: proxy.open(file=path)
+        yield 'open/url/{}'.format(name), lambda url=url: proxy.open(url=url)
+        yield 'open/selector/{}'.format(name), lambda selector=selector: proxy.open(selector=selector)
+        yield 'info/file/{}'.format(name), lambda path=path: proxy.info(file=path)
+        yield 'info/url/{}'.format(name), lambda url=url: proxy.info(url=url)
+        yield 'pixel/single/{}'.format(name), lambda path=path: proxy.pixel(file=path, x=10, y=10)
+        yield 'pixel/grid/{}'.format(name), lambda path=path: proxy.pixel(file=path, stride=16)
+        yield 'pixel/statistics/{}'.format(name), lambda path=path: proxy.pixel(
+            file=path,
+            stride=4,
+            statistics=True
+        )
+        yield 'pixel/region/{}'.format(name), lambda selector=selector: proxy.pixel(
+            selector=selector,
+            region=selector,
+            stride=16
+        )
+
+    if not ocr:
+        return
+
+    for name in OCR_FIXTURES + [n for n in sorted(images) if n.startswith('text-')][:1]:
+        if name not in images:
+            continue
+
+        for output_format in OUTPUT_FORMATS:
+            for rescale_factor in RESCALE_FACTORS:
+                yield 'extract_text/{}/{}/{}'.format(output_format, rescale_factor, name), (
+                    lambda path=images[name], output_format=output_format, rf=rescale_factor: proxy.extract_text(
+                        file=path,
+                        output_format=output_format,
+                        text_to_ascii=True,
+                        rescale_factor=rf,
+                        rescale_width_threshold=100000
+                    )
+                )
+
+    if 'screenshot' in images:
+        yield 'extract_text/tiled/screenshot', lambda: proxy.extract_text(
+            file=images['screenshot'],
+            output_format='lines',
+            tile_size=[1920, 1000],
+            text_to_ascii=True,
+            rescale_factor=1.0
+        )
+
+
+def measure(function, repeat, warmup=1):
+    """
+    Calls function repeatedly, returning statistics on how long it took and how much memory it
+    used (the growth in the peak resident set size of the process while it ran.)
+    """
+    rss = peak_rss()
+
+    for _ in range(warmup):
+        function()
+
+    timings = []
+
+    for _ in range(repeat):
+        gc.collect()
+        started = time.time()
+        function()
+        timings.append(time.time() - started)
+
+    result = OrderedDict()
+    result['runs'] = repeat
+    result['mean'] = sum(timings) / len(timings)
+    result['min'] = min(timings)
+    result['max'] = max(timings)
+    result['p50'] = percentile(timings, 50)
+    result['p90'] = percentile(timings, 90)
+    result['p99'] = percentile(timings, 99)
+    result['throughput'] = (1.0 / result['mean'] if result['mean'] else None)
+    result['peak_rss'] = peak_rss()
+    result['rss_growth'] = result['peak_rss'] - rss
+
+    return result
+
+
+def measure_isolated(function, repeat, warmup=1):
+    """
+    Runs `measure` in a forked child process, so that every case starts from the same memory
+    footprint and the peak resident set size it reports is its own rather than that of the largest
+    case run before it.
+    """
+    read_fd, write_fd = os.pipe()
+    pid = os.fork()
+
+    if pid == 0:
+        os.close(read_fd)
+
+        try:
+            result = measure(function, repeat, warmup=warmup)
+        except Exception as e:
+            result = OrderedDict([('error', str(e))])
+        finally:
+            workers.shutdown_pool()
+
+        with os.fdopen(write_fd, 'w') as f:
+            json.dump(result, f)
+
+        os._exit(0)
+
+    os.close(write_fd)
+
+    with os.fdopen(read_fd) as f:
+        data = f.read()
+
+    os.waitpid(pid, 0)
+
+    if not data:
+        raise RuntimeError('The benchmark process exited without reporting a result')
+
+    result = json.loads(data, object_pairs_hook=OrderedDict)
+
+    if 'error' in result:
+        raise RuntimeError(result['error'])
+
+    return result
+
+
+def compare(results, baseline, threshold):
+    """
+    Returns a list of (name, metric, baseline value, current value, change) for each case that has
+    slowed down (metric *p50*) or used more memory (metric *rss_growth*) by more than the threshold
+    (a fraction) since the baseline.
+    """
+    regressions = []
+
+    for name, current in results.items():
+        previous = baseline.get(name)
+
+        if not previous:
+            continue
+
+        if previous.get('p50') and 'p50' in current:
+            change = (current['p50'] - previous['p50']) / previous['p50']
+
+            if change > threshold:
+                regressions.append((name, 'p50', previous['p50'], current['p50'], change))
+
+        if 'rss_growth' in previous and 'rss_growth' in current:
+            growth = current['rss_growth'] - previous['rss_growth']
+            change = growth / float(max(previous['rss_growth'], RSS_NOISE))
+
+            if growth > RSS_NOISE and change > threshold:
+                regressions.append((name, 'rss_growth', previous['rss_growth'], current['rss_growth'], change))
+
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmarks the webfriend image commands.')
+    parser.add_argument('--fixtures', default=os.path.join(os.path.dirname(__file__), 'fixtures'),
+                        help='The directory to render the fixture images into.')
+    parser.add_argument('--output', help='Write the results to this file as JSON.')
+    parser.add_argument('--baseline', help='Compare the results against those in this file.')
+    parser.add_argument('--threshold', type=float, default=0.10,
+                        help='How much slower (as a fraction) a case can get before being a regression.')
+    parser.add_argument('--repeat', type=int, default=5, help='The number of timed runs of each case.')
+    parser.add_argument('--filter', help='Only run cases whose name matches this regular expression.')
+    parser.add_argument('--quick', action='store_true', help='Skip the largest fixtures.')
+    parser.add_argument('--no-ocr', action='store_true', help='Skip the text extraction cases.')
+    parser.add_argument('--ocr-engine', help='The OCR backend to run the text extraction cases with.')
+    args = parser.parse_args(argv)
+
+    logging.disable(logging.CRITICAL)
+
+    images = fixtures.generate(args.fixtures, huge=(not args.quick))
+    proxy = new_proxy(images)
+    ocr = not args.no_ocr
+
+    if args.ocr_engine:
+        proxy.configure(ocr_engine=args.ocr_engine)
+
+    if ocr and (proxy.ocr_engine or backends.default_engine()) != 'stub' and not pyocr.get_available_tools():
+        print('No OCR tools are installed; skipping text extraction', file=sys.stderr)
+        ocr = False
+
+    results = OrderedDict()
+
+    for name, function in cases(proxy, images, ocr=ocr):
+        if args.filter and not re.search(args.filter, name):
+            continue
+
+        try:
+            results[name] = measure_isolated(function, args.repeat)
+        except Exception as e:
+            results[name] = OrderedDict([('error', str(e))])
+            print('{:<60} ERROR {}'.format(name, e))
+            continue
+
+        print('{:<60} p50 {:9.2f}ms  p90 {:9.2f}ms  p99 {:9.2f}ms  {:8.1f}/s  rss +{:7.1f}MB'.format(
+            name,
+            results[name]['p50'] * 1000,
+            results[name]['p90'] * 1000,
+            results[name]['p99'] * 1000,
+            results[name]['throughput'] or 0,
+            results[name]['rss_growth'] / 1048576.0
+        ))
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=4)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f), args.threshold)
+
+        for name, metric, previous, current, change in regressions:
+            if metric == 'p50':
+                print('REGRESSION {:<60} {:9.2f}ms -> {:9.2f}ms (+{:.0%})'.format(
+                    name,
+                    previous * 1000,
+                    current * 1000,
+                    change
+                ))
+            else:
+                print('REGRESSION {:<60} rss +{:7.1f}MB -> +{:7.1f}MB (+{:.0%})'.format(
+                    name,
+                    previous / 1048576.0,
+                    current / 1048576.0,
+                    change
+                ))
+
+        if regressions:
+            return 1
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
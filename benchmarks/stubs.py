@@ -0,0 +1,110 @@
+from __future__ import absolute_import
+
+
+class Events(object):
+    def __init__(self):
+        self.handlers = {}
+
+    def on(self, event, callback):
+        self.handlers.setdefault(event, []).append(callback)
+
+    def trigger(self, event, *args, **kwargs):
+        for callback in self.handlers.get(event, []):
+            callback(*args, **kwargs)
+
+
+class Element(dict):
+    """
+    An element with the given attributes whose position on the page is at the top-left corner of
+    the viewport and the same size as its image.
+    """
+    def __init__(self, width=0, height=0, **attributes):
+        super(Element, self).__init__(**attributes)
+        self.bounds = {
+            'x':      0,
+            'y':      0,
+            'left':   0,
+            'top':    0,
+            'right':  width,
+            'bottom': height,
+            'width':  width,
+            'height': height,
+        }
+
+
+class DOM(object):
+    def __init__(self, tab):
+        self.tab = tab
+        self.elements = {}
+
+    def select_nodes(self, selector, wait_for_match=False):
+        return {
+            'nodes': self.elements.get(selector, []),
+        }
+
+    def ensure_unique_element(self, selector, elements):
+        if len(elements['nodes']) != 1:
+            raise Exception("Expected 1 element matching '{}', got {}".format(
+                selector,
+                len(elements['nodes'])
+            ))
+
+        return elements['nodes'][0]
+
+    def get_resource(self, url=None, request_id=None):
+        for resource in self.tab.resources.values():
+            if resource['url'] == url or resource['id'] == request_id:
+                return resource
+
+        return None
+
+
+class Network(object):
+    def __init__(self, tab):
+        self.tab = tab
+
+    def get_response_body(self, request_id):
+        return self.tab.bodies[request_id]
+
+
+class Tab(object):
+    """
+    Stands in for a browser tab that has already loaded a page of images, serving the image data
+    from memory so that the selector and URL code paths can be measured without a browser.
+    """
+    def __init__(self, tab_id='benchmark'):
+        self.description = {
+            'id': tab_id,
+        }
+
+        self.page = Events()
+        self.dom = DOM(self)
+        self.network = Network(self)
+        self.resources = {}
+        self.bodies = {}
+
+    def add_image(self, url, data, selector=None, size=(0, 0)):
+        request_id = str(len(self.resources) + 1)
+
+        self.resources[request_id] = {
+            'id':        request_id,
+            'url':       url,
+            'completed': True,
+        }
+
+        self.bodies[request_id] = data
+
+        if selector:
+            self.dom.elements.setdefault(selector, []).append(
+                Element(width=size[0], height=size[1], src=url)
+            )
+
+        return request_id
+
+    def navigate(self):
+        self.page.trigger('frameNavigated')
+
+
+class Browser(object):
+    def __init__(self):
+        self.default = Tab()
@@ -10,6 +10,7 @@ setup(
     author_email='garyhetzel@gmail.com',
     url='https://github.com/ghetzel/webfriend-images',
     install_requires=[
+        'numpy',
         'pyocr',
         'unidecode',
         'webfriend',
@@ -0,0 +1,100 @@
+from __future__ import absolute_import
+from PIL import Image
+from webfriend.images import workers
+import multiprocessing
+import pytest
+
+
+class PendingJob(object):
+    """
+    Stands in for an extraction that never finishes.
+    """
+
+    def wait(self, timeout=None):
+        pass
+
+    def ready(self):
+        return False
+
+    def get(self, timeout=None):
+        raise multiprocessing.TimeoutError()
+
+
+@pytest.fixture
+def loaded(stub_pool):
+    stub_pool.tab.add('/a.png', Image.new('RGB', (200, 50), 'white'))
+    stub_pool.tab.add('/b.png', Image.new('RGB', (200, 50), 'white'))
+    return stub_pool
+
+
+def test_collect_one(loaded):
+    handle = loaded.extract_text_async(url='/a.png')
+
+    assert loaded.collect(handle) == 'hello world\nsecond line'
+
+    with pytest.raises(KeyError):
+        loaded.collect(handle)
+
+
+def test_image_data_is_captured_before_returning(loaded):
+    handle = loaded.extract_text_async(url='/a.png', output_format='lines')
+
+    assert loaded.tab.network.calls == ['1']
+
+    # navigating away discards the response bodies of the page
+    loaded.tab.bodies.clear()
+
+    assert [line['text'] for line in loaded.collect(handle)] == ['hello world', 'second line']
+
+
+def test_region(loaded):
+    handle = loaded.extract_text_async(url='/a.png', output_format='lines', region=[50, 10, 150, 50])
+    lines = loaded.collect(handle)
+
+    assert [line['bounding']['start'] for line in lines] == [{'x': 50, 'y': 10}, {'x': 50, 'y': 30}]
+    assert lines[-1]['bounding']['end'] == {'x': 150, 'y': 50}
+
+
+def test_collect_all_in_order(loaded):
+    handles = [
+        loaded.extract_text_async(url='/b.png'),
+        loaded.extract_text_async(url='/a.png'),
+    ]
+    results = loaded.collect()
+
+    assert [item['handle'] for item in results] == handles
+    assert [item['source'] for item in results] == ['/b.png', '/a.png']
+    assert all(item['done'] and item['error'] is None for item in results)
+    assert [item['text'] for item in results] == ['hello world\nsecond line'] * 2
+    assert loaded.collect() == []
+
+
+def test_collect_failure(loaded):
+    loaded.tab.add('/page.html', b'<html></html>')
+    handles = [loaded.extract_text_async(url='/page.html'), loaded.extract_text_async(url='/page.html')]
+
+    with pytest.raises(Exception):
+        loaded.collect(handles[0])
+
+    [item] = loaded.collect([handles[1]])
+
+    assert item['done']
+    assert item['text'] is None
+    assert item['error']
+
+
+def test_collect_timeout(loaded, monkeypatch):
+    pool = workers.get_pool(loaded.ocr_workers)
+    monkeypatch.setattr(pool, 'submit', lambda *args: PendingJob())
+    handle = loaded.extract_text_async(url='/a.png')
+
+    with pytest.raises(multiprocessing.TimeoutError):
+        loaded.collect(handle, timeout=0)
+
+    [item] = loaded.collect(timeout=0)
+
+    assert not item['done']
+    assert item['error'] == 'Timed out waiting for the result'
+
+    # extractions that time out can be collected again
+    assert [item['handle'] for item in loaded.collect(timeout=0)] == [handle]
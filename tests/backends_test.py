@@ -0,0 +1,107 @@
+from __future__ import absolute_import
+from PIL import Image
+from pyocr import builders
+from webfriend.images import backends, workers
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def no_engine_variable(monkeypatch):
+    monkeypatch.delenv(backends.ENGINE_VARIABLE, raising=False)
+
+
+def test_names():
+    assert backends.names() == ['libtesseract', 'stub', 'tesseract', 'tool', 'workers']
+
+
+def test_get_unrecognized_engine():
+    with pytest.raises(ValueError) as error:
+        backends.get('magic')
+
+    assert 'stub' in str(error.value)
+
+
+def test_default_engine(monkeypatch):
+    assert backends.default_engine() == 'tool'
+    assert backends.resolve().name == 'tool'
+
+    monkeypatch.setenv(backends.ENGINE_VARIABLE, 'stub')
+
+    assert backends.default_engine() == 'stub'
+    assert backends.resolve().name == 'stub'
+    assert backends.resolve('tesseract').name == 'tesseract'
+
+
+def test_resolve_workers():
+    assert backends.resolve('workers', 'words').name == 'workers'
+    assert backends.resolve('workers', 'characters').name == 'tool'
+
+
+def test_resolve_inside_worker(monkeypatch):
+    monkeypatch.setattr(workers, '_worker', True)
+
+    assert backends.resolve('tool', 'lines').name == 'workers'
+    assert backends.resolve('stub', 'lines').name == 'stub'
+
+
+def test_register_replaces_existing():
+    original = backends.get('stub')
+
+    try:
+        replacement = backends.register(backends.StubBackend(text='replaced'))
+
+        assert backends.get('stub') is replacement
+    finally:
+        backends.register(original)
+
+
+def test_stub_lays_out_words_evenly():
+    backend = backends.StubBackend(text='one two\n\nthree four five')
+    [(tool, env)] = backend.engines('eng', [])
+
+    lines = backend.recognize(tool, env, Image.new('RGB', (300, 100)), 'eng', builders.LineBoxBuilder())
+
+    assert [line.content for line in lines] == ['one two', 'three four five']
+    assert [line.position for line in lines] == [((0, 0), (300, 50)), ((0, 50), (300, 100))]
+    assert [word.position for word in lines[1].word_boxes] == [
+        ((0, 50), (100, 100)),
+        ((100, 50), (200, 100)),
+        ((200, 50), (300, 100)),
+    ]
+
+
+def test_stub_text_from_environment(monkeypatch):
+    monkeypatch.setenv('WEBFRIEND_OCR_STUB_TEXT', 'from the environment')
+    backend = backends.StubBackend()
+    [(tool, env)] = backend.engines('eng', [])
+
+    text = backend.recognize(tool, env, Image.new('RGB', (300, 100)), 'eng', builders.TextBuilder())
+
+    assert text == 'from the environment'
+
+
+def test_ocr_cache_is_separate_for_each_engine(proxy, tmpdir):
+    proxy.tab.add('/text.png', Image.new('RGB', (200, 50), 'white'))
+    proxy.ocr_cache_path = str(tmpdir.join('results.db'))
+    original = backends.get('stub')
+
+    try:
+        backends.register(backends.StubBackend(text='first'))
+        proxy.ocr_engine = 'stub'
+
+        assert proxy.extract_text(url='/text.png') == 'first'
+
+        other = backends.StubBackend(text='second')
+        other.name = 'other'
+        backends.register(other)
+        proxy.ocr_engine = 'other'
+
+        assert proxy.extract_text(url='/text.png') == 'second'
+
+        proxy.ocr_engine = 'stub'
+
+        assert proxy.extract_text(url='/text.png') == 'first'
+        assert proxy.cache_stats()['ocr']['hits'] == 1
+    finally:
+        backends.register(original)
+        backends._backends.pop('other', None)
@@ -0,0 +1,48 @@
+from __future__ import absolute_import
+from PIL import Image
+import io
+import pytest
+
+
+def test_extract_text_batch(stub_pool):
+    stub_pool.tab.add('/a.png', Image.new('RGB', (200, 50), 'white'))
+    stub_pool.tab.add('/b.png', Image.new('RGB', (200, 50), 'white'))
+    stub_pool.tab.add('/c.png', Image.new('RGB', (200, 50), 'white'), selector='.other')
+
+    f = io.BytesIO()
+    Image.new('RGB', (200, 50), 'white').save(f, 'PNG')
+    f.seek(0)
+
+    results = stub_pool.extract_text_batch(selector='img', urls=['/c.png'], files=[f])
+
+    assert [item['source'] for item in results[:3]] == ['/a.png', '/b.png', '/c.png']
+    assert [item['text'] for item in results] == ['hello world\nsecond line'] * 4
+    assert [item['error'] for item in results] == [None] * 4
+
+
+@pytest.mark.parametrize('output_format', ['words', 'lines', 'lines-words'])
+def test_extract_text_batch_matches_extract_text(stub_pool, output_format):
+    stub_pool.tab.add('/a.png', Image.new('RGB', (200, 50), 'white'))
+
+    [item] = stub_pool.extract_text_batch(urls=['/a.png'], output_format=output_format)
+
+    assert item['text'] == stub_pool.extract_text(url='/a.png', output_format=output_format)
+    assert len(item['text']) == (4 if output_format == 'words' else 2)
+
+
+def test_extract_text_batch_reports_errors_per_image(stub_pool):
+    stub_pool.tab.add('/a.png', Image.new('RGB', (200, 50), 'white'))
+    stub_pool.tab.add('/page.html', b'<html></html>')
+    stub_pool.tab.add_element('img', alt='no source')
+
+    results = stub_pool.extract_text_batch(selector='img', urls=['/missing.png'])
+
+    assert [item['source'] for item in results] == ['/a.png', '/page.html', None, '/missing.png']
+    assert results[0]['text'] == 'hello world\nsecond line'
+    assert results[0]['error'] is None
+
+    for item in results[1:]:
+        assert item['text'] is None
+        assert item['error']
+
+    assert results[2]['error'] == "Element does not have a 'src' attribute"
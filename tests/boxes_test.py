@@ -0,0 +1,104 @@
+from __future__ import absolute_import
+from collections import namedtuple
+from webfriend.images.boxes import BoxList
+import json
+import pickle
+import pytest
+
+PyocrBox = namedtuple('PyocrBox', ['content', 'position'])
+
+
+@pytest.fixture
+def boxes():
+    #   one   two
+    #       three   four
+    return BoxList(
+        ['two', 'one', 'four', 'three'],
+        [
+            60, 0, 90, 20,
+            0, 2, 40, 18,
+            120, 31, 160, 50,
+            50, 30, 100, 52,
+        ]
+    )
+
+
+def test_from_boxes():
+    result = BoxList.from_boxes(
+        [PyocrBox(u'Caf\xe9', ((20, 10), (81, 31)))],
+        text_handler=lambda text: text.upper(),
+        rescale_factor=2.0,
+        offset=(100, 200)
+    )
+
+    assert result.texts == [u'CAF\xc9']
+    assert result.bounds(0) == (110, 205, 140, 215)
+
+
+def test_box_form(boxes):
+    assert boxes[1] == {
+        'text': 'one',
+        'bounding': {
+            'start': {'x': 0, 'y': 2},
+            'end': {'x': 40, 'y': 18},
+        },
+        'width': 40,
+        'height': 16,
+    }
+
+
+def test_indexing(boxes):
+    assert boxes[-1]['text'] == 'three'
+
+    with pytest.raises(IndexError):
+        boxes[4]
+
+
+def test_slicing(boxes):
+    assert boxes[1:3] == BoxList(['one', 'four'], [0, 2, 40, 18, 120, 31, 160, 50])
+    assert boxes[::-1].texts == ['three', 'four', 'one', 'two']
+    assert isinstance(boxes[:2], BoxList)
+
+
+def test_equals_list_of_dicts(boxes):
+    assert boxes == list(boxes)
+    assert boxes != list(boxes)[1:]
+
+
+def test_pickle_round_trip(boxes):
+    assert pickle.loads(pickle.dumps(boxes, 2)) == boxes
+
+
+def test_to_json(boxes):
+    assert json.loads(json.dumps(boxes.to_json())) == list(boxes)
+
+
+def test_concatenate(boxes):
+    result = BoxList.concatenate([boxes[:2], None, BoxList(), boxes[2:]])
+
+    assert result == boxes
+
+
+def test_mismatched_coordinates():
+    with pytest.raises(ValueError):
+        BoxList(['one'], [0, 0, 1])
+
+
+def test_filter(boxes):
+    assert boxes.filter('^t').texts == ['two', 'three']
+    assert boxes.filter(function=lambda text: len(text) == 4).texts == ['four']
+    assert boxes.filter('o', function=lambda text: len(text) == 3).texts == ['two', 'one']
+
+
+def test_within(boxes):
+    assert boxes.within([0, 0, 100, 25]).texts == ['two', 'one']
+    assert boxes.within({'x': 50, 'y': 25, 'width': 200, 'height': 40}).texts == ['four', 'three']
+    assert boxes.within([80, 40, 130, 60], partial=True).texts == ['four', 'three']
+
+
+def test_sorted(boxes):
+    assert boxes.sorted().texts == ['two', 'one', 'three', 'four']
+
+
+def test_lines(boxes):
+    assert [line.texts for line in boxes.lines()] == [['one', 'two'], ['three', 'four']]
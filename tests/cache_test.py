@@ -0,0 +1,139 @@
+from __future__ import absolute_import
+from PIL import Image
+from webfriend.images.cache import ImageCache, image_nbytes
+
+
+def image(size=10, mode='RGB'):
+    return Image.new(mode, (size, size))
+
+
+def test_image_nbytes():
+    assert image_nbytes(image(10, 'RGB')) == 300
+    assert image_nbytes(image(10, 'RGBA')) == 400
+    assert image_nbytes(image(10, 'L')) == 100
+    assert image_nbytes(image(16, '1')) == 32
+    assert image_nbytes(image(10, 'I')) == 400
+
+
+def test_get_and_put():
+    cache = ImageCache()
+    cached = image()
+
+    assert cache.get('a') is None
+    assert cache.put('a', cached) is cached
+    assert cache.get('a') is cached
+    assert 'a' in cache
+    assert cache.current_bytes == 300
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_evicts_least_recently_used():
+    cache = ImageCache(max_bytes=900)
+
+    for key in 'abc':
+        cache.put(key, image())
+
+    # using 'a' makes 'b' the least recently used
+    cache.get('a')
+    cache.put('d', image())
+
+    assert 'b' not in cache
+    assert all(key in cache for key in 'acd')
+    assert cache.current_bytes == 900
+    assert cache.evictions == 1
+
+
+def test_evicts_by_size_rather_than_count():
+    cache = ImageCache(max_bytes=1000)
+    cache.put('small', image(5))
+    cache.put('large', image(18))
+
+    assert len(cache) == 1
+    assert 'large' in cache
+
+
+def test_oversized_image_is_not_cached():
+    cache = ImageCache(max_bytes=1000)
+    cache.put('a', image())
+    oversized = image(100)
+
+    assert cache.put('b', oversized) is oversized
+    assert 'b' not in cache
+    assert 'a' in cache
+    assert cache.evictions == 0
+
+
+def test_replacing_an_entry():
+    cache = ImageCache()
+    cache.put('a', image(10))
+    cache.put('a', image(20))
+
+    assert len(cache) == 1
+    assert cache.current_bytes == 1200
+
+
+def test_discard():
+    cache = ImageCache()
+    cache.put('a', image())
+
+    assert cache.discard('a') is True
+    assert cache.discard('a') is False
+    assert cache.current_bytes == 0
+
+
+def test_shrink_to_new_size():
+    cache = ImageCache()
+
+    for key in 'abcd':
+        cache.put(key, image())
+
+    cache.shrink(600)
+
+    assert list(cache._entries.keys()) == ['c', 'd']
+    assert cache.max_bytes == 600
+
+
+def test_clear_accepts_event_arguments():
+    cache = ImageCache()
+    cache.put('a', image())
+    cache.clear({'frame': {}})
+
+    assert len(cache) == 0
+    assert cache.current_bytes == 0
+    assert cache.stats()['entries'] == 0
+
+
+def test_open_is_cached_until_navigation(proxy):
+    proxy.tab.add('/image.png', image())
+
+    first = proxy.open(url='/image.png')
+
+    assert proxy.open(url='/image.png') is first
+    assert proxy.tab.network.calls == ['1']
+    assert proxy.cache_stats()['images']['hits'] == 1
+
+    proxy.tab.page.trigger('frameNavigated', {})
+
+    assert proxy.open(url='/image.png') is not first
+    assert proxy.tab.network.calls == ['1', '1']
+
+
+def test_open_without_cache(proxy):
+    proxy.tab.add('/image.png', image())
+    proxy.open(url='/image.png', cache=False)
+    proxy.open(url='/image.png', cache=False)
+
+    assert proxy.tab.network.calls == ['1', '1']
+    assert proxy.cache_stats()['images']['entries'] == 0
+
+
+def test_files_are_cached_until_changed(proxy, tmpdir):
+    path = str(tmpdir.join('image.png'))
+    image(10).save(path)
+    first = proxy.open(file=path)
+
+    assert proxy.open(file=path) is first
+
+    image(20).save(path)
+
+    assert proxy.open(file=path).size == (20, 20)
@@ -0,0 +1,106 @@
+from __future__ import absolute_import
+from PIL import Image
+from webfriend.images import colors
+import numpy
+import pytest
+
+RED = (200, 0, 0)
+BLUE = (0, 0, 200)
+
+
+@pytest.fixture
+def banner(proxy):
+    # three quarters red, with the right quarter blue
+    image = Image.new('RGB', (40, 20), RED)
+    image.paste(BLUE, (30, 0, 40, 20))
+    proxy.tab.add('/banner.png', image)
+    return proxy
+
+
+def test_histograms():
+    values = numpy.array([[0, 10], [0, 255], [3, 10]], dtype=numpy.uint8)
+    counts, edges = colors.histograms(values)
+
+    assert counts.shape == (2, 256)
+    assert len(edges) == 257
+    assert counts[0][0] == 2
+    assert counts[0][3] == 1
+    assert counts[1][10] == 2
+    assert counts[1][255] == 1
+
+
+def test_histograms_binned():
+    values = numpy.array([[0], [63], [64], [255]], dtype=numpy.uint8)
+    counts, edges = colors.histograms(values, bins=4)
+
+    assert counts.tolist() == [[2, 1, 0, 1]]
+    assert edges.tolist() == [0, 64, 128, 192, 256]
+
+
+def test_downsample():
+    image = Image.new('RGB', (400, 100))
+
+    assert colors.downsample(image, 0) is image
+    assert colors.downsample(image, 40000) is image
+    assert colors.downsample(image, 400).size == (40, 10)
+
+
+@pytest.mark.parametrize('method', [colors.kmeans, colors.median_cut])
+def test_palettes_find_both_colors(method):
+    values = numpy.array([RED] * 30 + [BLUE] * 10, dtype=numpy.uint8)
+    palette, counts = method(values, 2)
+    found = sorted(zip(counts, [tuple(int(round(v)) for v in color) for color in palette]))
+
+    assert found == [(10, BLUE), (30, RED)]
+
+
+def test_histogram_command(banner):
+    result = banner.histogram(url='/banner.png')
+
+    assert result['count'] == 800
+    assert result['r'][200] == 600
+    assert result['r'][0] == 200
+    assert result['b'][200] == 200
+    assert sum(result['g']) == 800
+
+
+def test_histogram_region(banner):
+    result = banner.histogram(url='/banner.png', region=[30, 0, 40, 20], bins=2)
+
+    assert result['count'] == 200
+    assert result['edges'] == [0, 128]
+    assert result['b'] == [0, 200]
+
+
+@pytest.mark.parametrize('method', ['kmeans', 'median-cut'])
+def test_dominant_colors(banner, method):
+    result = banner.dominant_colors(url='/banner.png', colors=2, method=method)
+
+    assert [(color['r'], color['g'], color['b']) for color in result] == [RED, BLUE]
+    assert [color['hex'] for color in result] == ['#c80000', '#0000c8']
+    assert [color['count'] for color in result] == [600, 200]
+    assert [color['fraction'] for color in result] == [0.75, 0.25]
+
+
+def test_dominant_colors_unrecognized_method(banner):
+    with pytest.raises(ValueError):
+        banner.dominant_colors(url='/banner.png', method='magic')
+
+
+def test_average_color(banner):
+    assert banner.average_color(url='/banner.png') == {
+        'r': 150,
+        'g': 0,
+        'b': 50,
+        'hex': '#960032',
+        'count': 800,
+        'fraction': 1.0,
+    }
+    assert banner.average_color(url='/banner.png', method='median')['hex'] == '#c80000'
+
+
+def test_palette_images_are_analyzed_in_color(proxy):
+    proxy.tab.add('/palette.gif', Image.new('RGB', (10, 10), RED), format='GIF')
+
+    assert proxy.average_color(url='/palette.gif')['hex'] == '#c80000'
+    assert 'r' in proxy.histogram(url='/palette.gif')
@@ -0,0 +1,153 @@
+from __future__ import absolute_import
+from PIL import Image
+import io
+import pytest
+import sys
+import types
+
+try:
+    import webfriend.scripting.commands.base  # noqa: F401
+except ImportError:
+    # the rest of webfriend isn't installed alongside the image commands here, and all they need
+    # from it is a CommandProxy that knows the browser (and its current tab)
+    import webfriend.scripting.commands
+
+    class CommandProxy(object):
+        def __init__(self, browser, *args, **kwargs):
+            self.browser = browser
+
+        @property
+        def tab(self):
+            return self.browser.default
+
+    base = types.ModuleType('webfriend.scripting.commands.base')
+    base.CommandProxy = CommandProxy
+    sys.modules[base.__name__] = base
+    webfriend.scripting.commands.base = base
+
+
+class Events(object):
+    def __init__(self):
+        self.handlers = {}
+
+    def on(self, event, callback):
+        self.handlers.setdefault(event, []).append(callback)
+
+    def trigger(self, event, *args):
+        for callback in self.handlers.get(event, []):
+            callback(*args)
+
+
+class DOM(object):
+    def __init__(self, tab):
+        self.tab = tab
+        self.elements = {}
+
+    def select_nodes(self, selector, wait_for_match=False):
+        return {'nodes': self.elements.get(selector, [])}
+
+    def ensure_unique_element(self, selector, elements):
+        if len(elements['nodes']) != 1:
+            raise Exception("Expected 1 element matching '{}', got {}".format(selector, len(elements['nodes'])))
+
+        return elements['nodes'][0]
+
+    def get_resource(self, url=None):
+        return self.tab.resources.get(url)
+
+
+class Network(object):
+    def __init__(self, tab):
+        self.tab = tab
+        self.calls = []
+        self.active = 0
+        self.most_active = 0
+
+    def get_response_body(self, request_id):
+        self.calls.append(request_id)
+        self.active += 1
+        self.most_active = max(self.most_active, self.active)
+
+        try:
+            body = self.tab.bodies[request_id]
+
+            if isinstance(body, Exception):
+                raise body
+
+            return body
+        finally:
+            self.active -= 1
+
+
+class Element(dict):
+    def __init__(self, bounds=None, **attributes):
+        super(Element, self).__init__(**attributes)
+        self.bounds = bounds
+
+
+class Tab(object):
+    """
+    Stands in for a browser tab that has loaded some images, serving their data from memory.
+    """
+    def __init__(self):
+        self.description = {'id': 'test'}
+        self.page = Events()
+        self.dom = DOM(self)
+        self.network = Network(self)
+        self.resources = {}
+        self.bodies = {}
+
+    def add(self, url, body, format='PNG', completed=True, selector='img', **attributes):
+        """
+        Adds a resource for the given URL (encoding body first if it's an image), along with an
+        element matching selector that refers to it.
+        """
+        if isinstance(body, Image.Image):
+            f = io.BytesIO()
+            body.save(f, format)
+            body = f.getvalue()
+
+        request_id = str(len(self.resources) + 1)
+        self.resources[url] = {'id': request_id, 'url': url, 'completed': completed}
+        self.bodies[request_id] = body
+        self.add_element(selector, src=url, **attributes)
+
+        return request_id
+
+    def add_element(self, selector, **attributes):
+        element = Element(**attributes)
+        self.dom.elements.setdefault(selector, []).append(element)
+        return element
+
+
+class Browser(object):
+    def __init__(self):
+        self.default = Tab()
+
+
+@pytest.fixture
+def proxy():
+    """
+    An ImageProxy attached to a tab that has not loaded any images yet.
+    """
+    from webfriend.scripting.commands.image import ImageProxy
+
+    return ImageProxy(Browser())
+
+
+@pytest.fixture
+def stub_pool(proxy, monkeypatch):
+    """
+    An ImageProxy whose OCR tasks run in a freshly started worker pool, with every image
+    "recognized" (by the stub engine) as containing two lines of text.
+    """
+    from webfriend.images import workers
+
+    monkeypatch.setenv('WEBFRIEND_OCR_STUB_TEXT', 'hello world\nsecond line')
+    workers.shutdown_pool()
+    proxy.ocr_engine = 'stub'
+    proxy.ocr_workers = 1
+
+    yield proxy
+
+    workers.shutdown_pool()
@@ -0,0 +1,137 @@
+from __future__ import absolute_import
+from PIL import Image, ImageDraw
+from webfriend.images import frames
+import io
+import pytest
+
+DURATIONS = [100, 120, 100, 200, 250, 300]
+
+
+def make_frames(texts, size=(120, 40)):
+    out = []
+
+    for i, text in enumerate(texts):
+        image = Image.new('RGB', size, 'white')
+        ImageDraw.Draw(image).text((5, 5), text, fill='black')
+
+        # keeps frames with the same text from being merged together when saving
+        image.putpixel((size[0] - 1, i), (200, 200, 200))
+        out.append(image)
+
+    return out
+
+
+def encode(images, format, **options):
+    f = io.BytesIO()
+    images[0].save(f, format, save_all=True, append_images=images[1:], **options)
+    return f.getvalue()
+
+
+def seeked_durations(data):
+    image = Image.open(io.BytesIO(data))
+    durations = []
+
+    for index in range(getattr(image, 'n_frames', 1)):
+        image.seek(index)
+        durations.append(image.info.get('duration'))
+
+    return durations
+
+
+@pytest.fixture
+def gif():
+    return encode(make_frames(['AAA', 'AAA', 'AAA', 'BBB', 'BBB', 'CCC']), 'GIF', duration=DURATIONS, loop=0)
+
+
+def test_gif_durations(gif):
+    image = Image.open(io.BytesIO(gif))
+
+    assert frames.frame_details(image) == DURATIONS
+    assert frames.frame_details(image) == seeked_durations(gif)
+    assert image.tell() == 0
+
+
+def test_gif_durations_are_read_from_headers(gif, monkeypatch):
+    image = Image.open(io.BytesIO(gif))
+
+    def seek(frame):
+        raise AssertionError('Frames should not be seeked to')
+
+    monkeypatch.setattr(image, 'seek', seek)
+
+    assert frames.frame_details(image) == DURATIONS
+
+
+@pytest.mark.parametrize('options', [
+    {'duration': DURATIONS},
+    {'duration': DURATIONS[:-1], 'default_image': True},
+])
+def test_apng_durations(options):
+    data = encode(make_frames(['A', 'B', 'C', 'D', 'E', 'F']), 'PNG', **options)
+
+    assert frames.frame_details(Image.open(io.BytesIO(data))) == seeked_durations(data)
+
+
+def test_multipage_tiff():
+    data = encode(make_frames(['one', 'two', 'three']), 'TIFF')
+    image = Image.open(io.BytesIO(data))
+
+    assert frames.frame_count(image) == 3
+    assert frames.frame_details(image) == [None, None, None]
+
+
+def test_single_frame():
+    f = io.BytesIO()
+    Image.new('RGB', (10, 10)).save(f, 'PNG')
+    image = Image.open(f)
+
+    assert frames.frame_count(image) == 1
+    assert frames.frame_details(image) == [None]
+
+
+def test_iter_frames_selected(gif):
+    image = Image.open(io.BytesIO(gif))
+    selected = list(frames.iter_frames(image, [5, 0]))
+
+    assert [(index, duration) for index, _, duration in selected] == [(5, 300), (0, 100)]
+    assert all(frame.size == (120, 40) for _, frame, _ in selected)
+
+
+def test_iter_frames_out_of_range(gif):
+    with pytest.raises(ValueError):
+        list(frames.iter_frames(Image.open(io.BytesIO(gif)), [6]))
+
+
+def test_frame_filter_skips_consecutive_duplicates(gif):
+    sequence = frames.FrameFilter(frames.iter_frames(Image.open(io.BytesIO(gif))))
+
+    assert [index for index, _, _ in sequence] == [0, 3, 5]
+    assert sequence.duplicates == {1: 0, 2: 0, 4: 3}
+    assert sequence.durations == dict(enumerate(DURATIONS))
+
+
+def test_frame_filter_tolerance(gif):
+    sequence = frames.FrameFilter(frames.iter_frames(Image.open(io.BytesIO(gif))), tolerance=-1)
+
+    assert [index for index, _, _ in sequence] == list(range(6))
+    assert sequence.duplicates == {}
+
+
+def test_webp_durations():
+    data = encode(make_frames(['A', 'B', 'C']), 'WEBP', duration=DURATIONS[:3], lossless=True)
+    image = Image.open(io.BytesIO(data))
+
+    assert frames.frame_details(image) == DURATIONS[:3]
+    assert [duration for _, _, duration in frames.iter_frames(image)] == DURATIONS[:3]
+
+
+def test_frame_filter_compares_colors():
+    images = [Image.new('RGB', (40, 40), color) for color in [(255, 0, 0), (0, 130, 0), (0, 130, 0)]]
+
+    # red and this green have the same luminance, so they'd look the same in greyscale
+    assert images[0].convert('L').getpixel((0, 0)) == images[1].convert('L').getpixel((0, 0))
+
+    sequence = frames.FrameFilter((i, image, None) for i, image in enumerate(images))
+
+    assert [index for index, _, _ in sequence] == [0, 1]
+    assert sequence.duplicates == {2: 1}
@@ -0,0 +1,54 @@
+from __future__ import absolute_import
+from PIL import Image
+import pytest
+
+
+@pytest.fixture
+def gradient():
+    image = Image.new('RGB', (20, 10))
+    image.putdata([(x * 10, y * 20, 255) for y in range(10) for x in range(20)])
+    return image
+
+
+def test_harvest(proxy, gradient):
+    proxy.tab.add('/a.png', gradient)
+    proxy.tab.add('/b.gif', gradient, format='GIF')
+    proxy.tab.add_element('img', src='/a.png')
+    result = proxy.harvest()
+
+    assert result['count'] == 2
+    assert [image.url for image in result['images']] == ['/a.png', '/b.gif']
+    assert result['images'][0].occurrences == 2
+    assert result['skipped'] == []
+    assert proxy.pixel(file=result['images'][0], x=3, y=2)['r'] == 30
+
+
+def test_harvest_skip_reasons(proxy, gradient):
+    proxy.tab.add('/image.png', gradient)
+    proxy.tab.add('/loading.png', gradient, completed=False)
+    proxy.tab.add('/empty.png', b'')
+    proxy.tab.add('/page.html', b'<html></html>')
+    proxy.tab.add('/gone.png', Exception('No resource with given identifier found'))
+    proxy.tab.add_element('img', src='/missing.png')
+    proxy.tab.add_element('img', alt='no source')
+
+    result = proxy.harvest()
+    reasons = dict((item['url'], item['reason']) for item in result['skipped'])
+
+    assert [image.url for image in result['images']] == ['/image.png']
+    assert reasons[None] == "Element does not have a 'src' attribute"
+    assert reasons['/missing.png'] == 'Resource not found'
+    assert reasons['/loading.png'] == 'Resource has not finished loading'
+    assert reasons['/empty.png'] == 'Resource is empty'
+    assert reasons['/page.html'].startswith('Not a recognized image: ')
+    assert reasons['/gone.png'] == 'No resource with given identifier found'
+    assert len(reasons) == 6
+
+
+def test_harvest_retrieves_one_body_at_a_time(proxy, gradient):
+    for i in range(10):
+        proxy.tab.add('/{}.png'.format(i), gradient)
+
+    assert proxy.harvest()['count'] == 10
+    assert proxy.tab.network.most_active == 1
+    assert proxy.tab.network.calls == [str(i + 1) for i in range(10)]
@@ -0,0 +1,105 @@
+from __future__ import absolute_import
+from PIL import Image, ImageDraw
+from webfriend.images import hashing
+import pytest
+import random
+
+
+def drawing(seed):
+    rng = random.Random(seed)
+    image = Image.new('RGB', (200, 150), 'white')
+    draw = ImageDraw.Draw(image)
+
+    for _ in range(12):
+        x, y = rng.randint(0, 180), rng.randint(0, 130)
+        draw.ellipse((x, y, x + rng.randint(10, 60), y + rng.randint(10, 60)), fill=(
+            rng.randint(0, 255),
+            rng.randint(0, 255),
+            rng.randint(0, 255),
+        ))
+
+    return image
+
+
+def test_hamming():
+    assert hashing.hamming(0, 0) == 0
+    assert hashing.hamming(0b1011, 0b0110) == 3
+    assert hashing.hamming(2 ** 64 - 1, 0) == 64
+
+
+@pytest.mark.parametrize('method', sorted(hashing.METHODS.keys()))
+def test_similar_images_have_close_hashes(method):
+    original = drawing(1)
+    resized = original.resize((120, 90), Image.BILINEAR)
+    other = drawing(2)
+
+    value = hashing.image_hash(original, method)
+
+    assert 0 <= value < 2 ** 64
+    assert hashing.hamming(value, hashing.image_hash(resized, method)) <= 6
+    assert hashing.hamming(value, hashing.image_hash(other, method)) > 10
+
+
+def test_unrecognized_method():
+    with pytest.raises(ValueError):
+        hashing.image_hash(drawing(1), 'md5')
+
+
+def test_bk_tree_matches_linear_search():
+    rng = random.Random(1)
+    values = [rng.getrandbits(64) for _ in range(500)]
+
+    # near-duplicates of a few of the values, so that there is something to find nearby
+    values += [v ^ (1 << rng.randint(0, 63)) for v in values[:50]]
+
+    tree = hashing.BKTree()
+
+    for i, value in enumerate(values):
+        tree.add(value, i)
+
+    assert len(tree) == len(values)
+
+    for query in values[:60] + [rng.getrandbits(64) for _ in range(20)]:
+        for distance in (0, 3, 20):
+            expected = sorted(
+                (hashing.hamming(query, value), value, i) for i, value in enumerate(values)
+                if hashing.hamming(query, value) <= distance
+            )
+            found = sorted(
+                (d, value, i) for d, value, items in tree.search(query, distance) for i in items
+            )
+
+            assert found == expected
+
+
+def test_bk_tree_groups_identical_hashes():
+    tree = hashing.BKTree()
+    tree.add(5, 'a')
+    tree.add(5, 'b')
+    tree.add(4, 'c')
+
+    assert tree.search(5, 1) == [(0, 5, ['a', 'b']), (1, 4, ['c'])]
+    assert hashing.BKTree().search(5, 64) == []
+
+
+def test_hash_index_persists(tmpdir):
+    path = str(tmpdir.join('hashes.jsonl'))
+    index = hashing.HashIndex(path)
+    index.add(0xff, label='first')
+    index.add(0xfe, label='second')
+    index.add(0xff, method='dhash', label='other method')
+
+    reopened = hashing.HashIndex(path)
+
+    assert reopened.search(0xff, distance=1) == [(0, 0xff, ['first']), (1, 0xfe, ['second'])]
+    assert reopened.search(0xff, method='dhash', distance=0) == [(0, 0xff, ['other method'])]
+    assert reopened.stats() == {'phash': 2, 'dhash': 1}
+
+    reopened.clear()
+
+    assert not tmpdir.join('hashes.jsonl').exists()
+    assert hashing.HashIndex(path).stats() == {}
+
+
+def test_format_hash():
+    assert hashing.format_hash(0xabc) == '0000000000000abc'
@@ -0,0 +1,153 @@
+from __future__ import absolute_import
+from PIL import Image
+from webfriend.images import loading
+import io
+import mmap
+import pytest
+
+
+def encode(image, format, **options):
+    f = io.BytesIO()
+    image.save(f, format, **options)
+    return f.getvalue()
+
+
+def exif():
+    tags = Image.Exif()
+    tags[0x0110] = 'Camera'
+    tags.get_ifd(loading.EXIF_IFD)[0x9003] = '2020:01:02 03:04:05'
+    return tags
+
+
+@pytest.mark.parametrize('format', ['JPEG', 'PNG'])
+def test_header_exif(format):
+    image = Image.open(io.BytesIO(encode(Image.new('RGB', (10, 10)), format, exif=exif())))
+    tags = loading.header_exif(image)
+
+    assert tags[0x0110] == 'Camera'
+    assert tags[0x9003] == '2020:01:02 03:04:05'
+    assert not loading.is_decoded(image)
+
+
+@pytest.mark.parametrize('format', ['JPEG', 'PNG', 'GIF', 'TIFF'])
+def test_header_exif_missing(format):
+    image = Image.open(io.BytesIO(encode(Image.new('RGB', (10, 10)), format)))
+
+    assert loading.header_exif(image) is None
+    assert not loading.is_decoded(image)
+
+
+@pytest.fixture
+def opened(proxy, monkeypatch):
+    """
+    Records the images that the proxy opens.
+    """
+    images = []
+    original = proxy._open
+
+    def record(*args, **kwargs):
+        image, element = original(*args, **kwargs)
+        images.append(image)
+        return image, element
+
+    monkeypatch.setattr(proxy, '_open', record)
+    return images
+
+
+@pytest.mark.parametrize('options', [{}, {'exif': exif()}])
+def test_info_does_not_decode_png(proxy, opened, options):
+    proxy.tab.add('/image.png', encode(Image.new('RGB', (10, 10)), 'PNG', **options))
+    data = proxy.info(url='/image.png')
+
+    assert (data['width'], data['height']) == (10, 10)
+    assert ('exif' in data) == bool(options)
+    assert not loading.is_decoded(opened[0])
+    assert proxy.cache_stats()['images']['entries'] == 0
+
+
+def test_info_exif_tag_names(proxy):
+    proxy.tab.add('/photo.jpg', encode(Image.new('RGB', (10, 10)), 'JPEG', exif=exif()))
+
+    assert proxy.info(url='/photo.jpg')['exif'][0x0110] == 'Model'
+
+
+def test_scaled_size():
+    assert loading.scaled_size((1000, 500), scale=0.25) == (250, 125)
+    assert loading.scaled_size((1000, 500), size=(100, 100)) == (100, 50)
+    assert loading.scaled_size((1000, 3), scale=0.1) == (100, 1)
+
+
+@pytest.mark.parametrize('format', ['JPEG', 'PNG'])
+def test_decode_reduced(format):
+    original = Image.new('RGB', (1600, 1200), 'white')
+    original.paste((200, 0, 0), (0, 0, 800, 1200))
+    image = Image.open(io.BytesIO(encode(original, format)))
+
+    reduced = loading.decode_reduced(image, (400, 300))
+
+    assert reduced.size == (400, 300)
+    assert reduced.getpixel((100, 150))[0] > 180
+    assert reduced.getpixel((300, 150)) == (255, 255, 255)
+
+
+def test_decode_reduced_jpeg_uses_draft():
+    image = Image.open(io.BytesIO(encode(Image.new('RGB', (1600, 1200), 'white'), 'JPEG')))
+    reduced = loading.decode_reduced(image, (200, 150))
+
+    # the DCT scaling of the decoder does all of the work for a 1/8 reduction
+    assert reduced is image
+    assert reduced.size == (200, 150)
+
+
+def test_decode_reduced_already_decoded():
+    image = Image.new('RGB', (100, 100))
+
+    assert loading.decode_reduced(image, (50, 50)).size == (50, 50)
+
+
+def test_open_bytes():
+    body = encode(Image.new('RGB', (20, 10), 'red'), 'PNG')
+    f = loading.open_bytes(body, spill_size=len(body))
+
+    assert isinstance(f, io.BytesIO)
+    assert Image.open(f).getpixel((0, 0)) == (255, 0, 0)
+
+
+def test_open_bytes_spills_large_bodies():
+    body = encode(Image.new('RGB', (20, 10), 'red'), 'PNG')
+    f = loading.open_bytes(body, spill_size=len(body) - 1)
+
+    assert isinstance(f, mmap.mmap)
+    assert f[:] == body
+    assert Image.open(f).getpixel((0, 0)) == (255, 0, 0)
+
+
+def test_open_file(tmpdir):
+    path = tmpdir.join('image.png')
+    path.write_binary(encode(Image.new('RGB', (20, 10), 'red'), 'PNG'))
+    f = loading.open_file(str(path))
+
+    assert isinstance(f, mmap.mmap)
+    assert Image.open(f).getpixel((0, 0)) == (255, 0, 0)
+
+
+def test_open_empty_file(tmpdir):
+    path = tmpdir.join('empty.png')
+    path.write_binary(b'')
+
+    assert loading.open_file(str(path)).read() == b''
+
+
+@pytest.mark.parametrize('spill_size', [None, 1])
+def test_proxy_opens_resources(proxy, spill_size):
+    proxy.resource_spill_size = spill_size
+    proxy.tab.add('/red.png', Image.new('RGB', (20, 10), 'red'))
+
+    assert proxy.pixel(url='/red.png', x=1, y=1)['hex'] == proxy.rgb2hex(255, 0, 0)
+
+
+def test_proxy_opens_files(proxy, tmpdir):
+    path = tmpdir.join('image.png')
+    path.write_binary(encode(Image.new('RGB', (20, 10), 'red'), 'PNG'))
+
+    assert proxy.pixel(file=str(path), x=1, y=1)['hex'] == proxy.rgb2hex(255, 0, 0)
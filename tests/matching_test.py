@@ -0,0 +1,150 @@
+from __future__ import absolute_import
+from PIL import Image, ImageDraw
+from webfriend.images import matching
+import numpy
+import pytest
+import random
+import time
+
+WORDS = ['lorem', 'ipsum', 'dolor', 'sit', 'amet', 'consectetur', 'adipiscing', 'elit', 'sed', 'do']
+
+
+def text_page(width, height, seed=1):
+    """
+    Returns a page of lines of similar (but not repeating) text, which is full of lookalikes for
+    any piece of it.
+    """
+    rng = random.Random(seed)
+    image = Image.new('L', (width, height), 255)
+    draw = ImageDraw.Draw(image)
+
+    for y in range(0, image.height, 14):
+        draw.text((rng.randint(0, 6), y), ' '.join(rng.choice(WORDS) for _ in range(width // 30)), fill=0)
+
+    return image.convert('RGB')
+
+
+@pytest.fixture(scope='module')
+def page():
+    return text_page(960, 1200)
+
+
+@pytest.fixture(scope='module')
+def large_page():
+    return text_page(1920, 4000)
+
+
+def noise(size, seed=0):
+    data = numpy.random.RandomState(seed).randint(0, 256, (size[1], size[0], 3)).astype('uint8')
+    return Image.fromarray(data)
+
+
+@pytest.mark.parametrize('position', [(500, 600), (501, 600), (500, 601), (501, 603), (503, 607), (77, 1101)])
+def test_finds_text_at_any_offset(page, position):
+    x, y = position
+    needle = page.crop((x, y, x + 64, y + 24))
+    matches = matching.match(page, needle)
+
+    assert matches
+    assert matches[0][:2] == position
+    assert matches[0][2] == pytest.approx(1.0)
+
+
+@pytest.mark.parametrize('position', [(333, 777), (334, 778), (123, 45)])
+def test_finds_noise_at_any_offset(page, position):
+    haystack = page.copy()
+    needle = noise((64, 24))
+    haystack.paste(needle, position)
+
+    matches = matching.match(haystack, needle)
+
+    assert [match[:2] for match in matches] == [position]
+    assert matches[0][2] == pytest.approx(1.0)
+
+
+def test_finds_every_occurrence():
+    haystack = noise((800, 600), seed=1).convert('L').convert('RGB')
+    needle = noise((40, 30), seed=2)
+    positions = [(11, 13), (400, 301), (731, 555)]
+
+    for position in positions:
+        haystack.paste(needle, position)
+
+    matches = matching.match(haystack, needle)
+
+    assert sorted(match[:2] for match in matches) == positions
+
+
+def test_limit():
+    haystack = Image.new('RGB', (400, 300), 'white')
+    needle = noise((20, 20), seed=3)
+
+    for position in [(10, 10), (100, 101), (201, 150)]:
+        haystack.paste(needle, position)
+
+    assert len(matching.match(haystack, needle, limit=2)) == 2
+
+
+def test_missing_needle(page):
+    assert matching.match(page, noise((64, 24), seed=4)) == []
+
+
+def test_needle_larger_than_haystack():
+    assert matching.match(noise((20, 20)), noise((30, 30))) == []
+
+
+def test_solid_needle():
+    with pytest.raises(ValueError):
+        matching.match(noise((100, 100)), Image.new('RGB', (10, 10), 'red'))
+
+
+def icon():
+    image = Image.new('RGB', (24, 24), 'white')
+    draw = ImageDraw.Draw(image)
+    draw.ellipse((2, 2, 21, 21), outline='black', width=2)
+    draw.line((7, 12, 17, 12), fill='black', width=2)
+    draw.line((12, 7, 12, 17), fill='black', width=2)
+    return image
+
+
+def timed_match(haystack, needle):
+    started = time.time()
+    matches = matching.match(haystack, needle)
+    return matches, time.time() - started
+
+
+@pytest.mark.parametrize('needle', [
+    lambda: noise((64, 24), seed=5),
+    lambda: icon(),
+    lambda: text_page(400, 100, seed=9).crop((100, 20, 164, 44)),
+])
+def test_absent_needle_in_large_haystack_is_fast(large_page, needle):
+    matches, elapsed = timed_match(large_page, needle())
+
+    assert all(score < 0.99 for _, _, score in matches)
+    assert elapsed < 1.0
+
+
+@pytest.mark.parametrize('size', [(64, 24), (48, 48), (300, 200)])
+@pytest.mark.parametrize('position', [(701, 1203), (970, 2562)])
+def test_present_needle_in_large_haystack_is_fast(large_page, size, position):
+    needle = large_page.crop(position + (position[0] + size[0], position[1] + size[1]))
+    matches, elapsed = timed_match(large_page, needle)
+
+    assert matches[0][:2] == position
+    assert elapsed < 1.0
+
+
+def test_icon_on_large_page(large_page):
+    haystack = large_page.copy()
+    haystack.paste(icon(), (1601, 2001))
+
+    assert matching.match(haystack, icon())[0][:2] == (1601, 2001)
+
+
+def test_needle_too_small_to_shrink():
+    haystack = noise((300, 200), seed=6)
+    needle = noise((12, 10), seed=7)
+    haystack.paste(needle, (151, 77))
+
+    assert [match[:2] for match in matching.match(haystack, needle)] == [(151, 77)]
@@ -0,0 +1,162 @@
+from __future__ import absolute_import
+from PIL import Image
+from webfriend.images import backends, metrics
+import json
+import pytest
+
+
+class Clock(object):
+    def __init__(self):
+        self.now = 0.0
+
+    def time(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(metrics, 'time', clock)
+    return clock
+
+
+@pytest.fixture
+def exported():
+    out = []
+    metrics.add_exporter(out.append)
+
+    yield out
+
+    metrics.remove_exporter(out.append)
+
+
+def test_nested_stages_are_exclusive(clock):
+    timings = metrics.Timings('test')
+
+    with timings.stage('outer'):
+        clock.now += 1
+
+        with timings.stage('inner'):
+            clock.now += 2
+
+        clock.now += 3
+
+    with timings.stage('inner'):
+        clock.now += 4
+
+    timings.finish()
+
+    assert timings.stages == {'outer': 4, 'inner': 6}
+    assert timings.duration == 10
+
+
+def test_values():
+    timings = metrics.Timings('test')
+    timings.set('size', [10, 20])
+    timings.count('hits')
+    timings.count('hits', 2)
+
+    assert timings.to_dict()['values'] == {'size': [10, 20], 'hits': 3}
+
+
+def test_nothing_recorded_outside_of_commands():
+    with metrics.stage('ignored'):
+        metrics.record('size', [1, 1])
+        metrics.count('hits')
+
+    assert metrics.current() is metrics.NULL
+
+
+def test_nested_commands_are_recorded_as_the_outer_one(exported):
+    with metrics.recording('outer') as outer:
+        with metrics.recording('inner') as inner:
+            metrics.count('hits')
+
+        assert inner is outer
+
+    assert [timings.command for timings in exported] == ['outer']
+    assert exported[0].values == {'hits': 1}
+    assert metrics.last() is outer
+
+
+def test_failing_exporter_is_ignored(exported):
+    def broken(timings):
+        raise Exception('broken')
+
+    metrics.add_exporter(broken)
+
+    try:
+        with metrics.recording('test'):
+            pass
+    finally:
+        metrics.remove_exporter(broken)
+
+    assert len(exported) == 1
+
+
+def test_json_lines_exporter(tmpdir):
+    path = str(tmpdir.join('metrics.jsonl'))
+    exporter = metrics.JsonLinesExporter(path)
+    timings = metrics.Timings('test')
+    timings.count('hits')
+    timings.finish()
+
+    exporter(timings)
+    exporter(timings)
+
+    with open(path) as f:
+        lines = [json.loads(line) for line in f]
+
+    assert [line['command'] for line in lines] == ['test', 'test']
+    assert lines[0]['values'] == {'hits': 1}
+    assert exporter == metrics.JsonLinesExporter(path)
+
+
+@pytest.fixture
+def text_image(proxy, monkeypatch):
+    monkeypatch.setenv('WEBFRIEND_OCR_STUB_TEXT', 'hello world')
+    proxy.ocr_engine = 'stub'
+    proxy.tab.add('/text.png', Image.new('RGB', (200, 50), 'white'))
+    return proxy
+
+
+def test_extract_text_timings(text_image):
+    result = text_image.extract_text(url='/text.png', timings=True)
+    recorded = result['timings']
+
+    assert result['text'] == 'hello world'
+    assert recorded['command'] == 'extract_text'
+    assert set(['lookup', 'fetch', 'decode', 'rescale', 'recognize', 'postprocess']) <= set(recorded['stages'])
+    assert sum(recorded['stages'].values()) <= recorded['duration']
+    assert recorded['values']['size'] == [200, 50]
+    assert recorded['values']['rescaled_size'] == [400, 100]
+    assert recorded['values']['bytes_fetched'] == len(text_image.tab.bodies['1'])
+    assert recorded['values']['ocr_tool'] == backends.get('stub').get_name()
+
+
+def test_timings_command(text_image):
+    assert text_image.extract_text(url='/text.png') == 'hello world'
+    assert text_image.timings()['command'] == 'extract_text'
+
+    text_image.pixel(url='/text.png', x=0, y=0)
+    recorded = text_image.timings()
+
+    assert recorded['command'] == 'pixel'
+    assert recorded['values']['image_cache_hits'] == 1
+
+
+def test_configure_metrics(text_image, tmpdir):
+    path = str(tmpdir.join('metrics.jsonl'))
+    text_image.configure(metrics=path)
+
+    try:
+        text_image.extract_text(url='/text.png')
+    finally:
+        text_image.configure(metrics='')
+
+    text_image.extract_text(url='/text.png')
+
+    with open(path) as f:
+        lines = [json.loads(line) for line in f]
+
+    assert [line['command'] for line in lines] == ['extract_text']
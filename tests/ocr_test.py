@@ -0,0 +1,88 @@
+# -*- coding: utf-8 -*-
+from __future__ import absolute_import
+from PIL import Image
+from webfriend.images import workers
+from webfriend.scripting.commands.image import prepare_for_ocr, recognize_text, text_asciify
+import pytest
+
+
+@pytest.fixture
+def stub_text(monkeypatch):
+    monkeypatch.setenv('WEBFRIEND_OCR_STUB_TEXT', u'Café crème\nnaïve façade')
+
+
+def test_text_asciify_returns_str():
+    assert text_asciify(u'Café') == 'Cafe'
+    assert isinstance(text_asciify(u'Café'), str)
+
+
+def test_text_asciify_decodes_bytes():
+    assert text_asciify(u'façade'.encode('UTF-8')) == 'facade'
+
+
+def result_texts(result):
+    if isinstance(result, list):
+        return [text for line in result for text in line['words'].texts]
+
+    return result.texts
+
+
+@pytest.mark.parametrize('output_format', ['words', 'lines', 'lines-words', 'numeric-words'])
+def test_box_formats_with_default_text_to_ascii(stub_text, output_format):
+    result = recognize_text(Image.new('RGB', (200, 100), 'white'), output_format=output_format, engine='stub')
+
+    assert result is not None
+    assert all(isinstance(text, str) for text in result_texts(result))
+    assert all(text == text.encode('ascii', 'ignore').decode('ascii') for text in result_texts(result))
+
+
+def test_lines_words_are_asciified(stub_text):
+    result = recognize_text(Image.new('RGB', (200, 100), 'white'), output_format='lines-words', engine='stub')
+
+    assert result_texts(result) == ['Cafe', 'creme', 'naive', 'facade']
+
+
+def test_words_are_asciified(stub_text):
+    result = recognize_text(Image.new('RGB', (200, 100), 'white'), output_format='words', engine='stub')
+
+    assert result.texts == ['Cafe', 'creme', 'naive', 'facade']
+
+
+def test_raw_with_default_text_to_ascii(stub_text):
+    result = recognize_text(Image.new('RGB', (200, 100), 'white'), output_format='raw', engine='stub')
+
+    assert result == 'Cafe creme\nnaive facade'
+
+
+def test_text_to_ascii_disabled_keeps_text(stub_text):
+    result = recognize_text(
+        Image.new('RGB', (200, 100), 'white'),
+        output_format='words',
+        text_to_ascii=False,
+        engine='stub'
+    )
+
+    assert result.texts == [u'Café', u'crème', u'naïve', u'façade']
+
+
+@pytest.mark.parametrize('mode', ['RGBA', 'LA', 'P'])
+@pytest.mark.parametrize('preprocess', [None, ['autocontrast']])
+def test_serial_and_worker_paths_flatten_identically(mode, preprocess):
+    image = Image.new('RGBA', (40, 20), (0, 0, 0, 0))
+    image.paste((200, 0, 0, 128), (10, 5, 30, 15))
+    image.paste((0, 0, 200, 255), (20, 0, 25, 20))
+
+    if mode == 'P':
+        image = image.convert('RGB').convert('P')
+        image.info['transparency'] = image.getpixel((0, 0))
+    else:
+        image = image.convert(mode)
+
+    serial, _ = prepare_for_ocr(image, 1.0, preprocess=preprocess)
+    worker, _ = prepare_for_ocr(workers.unpack_image(workers.pack_image(image)), 1.0, preprocess=preprocess)
+
+    assert serial.mode == worker.mode
+    assert serial.tobytes() == worker.tobytes()
+
+    if not preprocess:
+        assert serial.convert('RGB').getpixel((0, 0)) == (255, 255, 255)
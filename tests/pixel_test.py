@@ -0,0 +1,98 @@
+from __future__ import absolute_import
+from PIL import Image
+import io
+import pytest
+
+
+@pytest.fixture
+def gradient():
+    image = Image.new('RGB', (20, 10))
+    image.putdata([(x * 10, y * 20, 255) for y in range(10) for x in range(20)])
+    return image
+
+
+@pytest.fixture
+def loaded(proxy, gradient):
+    proxy.tab.add('/gradient.png', gradient)
+    return proxy
+
+
+def test_pixel(loaded):
+    assert loaded.pixel(url='/gradient.png', x=3, y=2) == {'r': 30, 'g': 40, 'b': 255, 'hex': '#1e28ff'}
+
+
+def test_pixel_points(loaded):
+    result = loaded.pixel(url='/gradient.png', points=[[0, 0], [3, 2], [19, 9]])
+
+    assert result['count'] == 3
+    assert result['coordinates']['x'] == [0, 3, 19]
+    assert result['coordinates']['y'] == [0, 2, 9]
+    assert result['r'] == [0, 30, 190]
+    assert result['g'] == [0, 40, 180]
+    assert result['b'] == [255, 255, 255]
+    assert result['hex'] == ['#0000ff', '#1e28ff', '#beb4ff']
+
+
+def test_pixel_points_within_region(loaded):
+    result = loaded.pixel(url='/gradient.png', region=[10, 5, 20, 10], points=[[0, 0], [2, 1]])
+
+    assert result['coordinates']['x'] == [10, 12]
+    assert result['coordinates']['y'] == [5, 6]
+    assert result['r'] == [100, 120]
+
+
+def test_pixel_stride(loaded):
+    result = loaded.pixel(url='/gradient.png', stride=5, statistics=True, include_hex=False)
+
+    assert result['count'] == 8
+    assert sorted(set(result['coordinates']['x'])) == [0, 5, 10, 15]
+    assert sorted(set(result['coordinates']['y'])) == [0, 5]
+    assert 'hex' not in result
+    assert result['statistics']['r']['min'] == 0
+    assert result['statistics']['r']['max'] == 150
+
+
+def test_pixel_region(loaded):
+    result = loaded.pixel(url='/gradient.png', region={'x': 1, 'y': 1, 'width': 2, 'height': 2})
+
+    assert list(zip(result['coordinates']['x'], result['coordinates']['y'])) == [(1, 1), (2, 1), (1, 2), (2, 2)]
+
+
+def test_pixel_requires_coordinates(loaded):
+    with pytest.raises(ValueError):
+        loaded.pixel(url='/gradient.png', x=1)
+
+
+def test_pixel_cmyk_points(proxy):
+    image = Image.new('CMYK', (4, 4), (10, 20, 30, 40))
+    image.putpixel((2, 3), (50, 60, 70, 80))
+    proxy.tab.add('/cmyk.tif', image, format='TIFF')
+
+    result = proxy.pixel(url='/cmyk.tif', points=[[0, 0], [2, 3]], statistics=True)
+
+    assert result['coordinates'] == {'x': [0, 2], 'y': [0, 3]}
+    assert result['c'] == [10, 50]
+    assert result['m'] == [20, 60]
+    assert result['y'] == [30, 70]
+    assert result['k'] == [40, 80]
+    assert result['statistics']['y']['max'] == 70
+    assert 'hex' not in result
+
+
+@pytest.mark.parametrize('frame', [0, 1])
+def test_pixel_gif_frames(proxy, frame):
+    colors = [(10, 20, 30), (200, 100, 50)]
+    f = io.BytesIO()
+    frames = [Image.new('RGB', (20, 10), color) for color in colors]
+    frames[0].save(f, 'GIF', save_all=True, append_images=frames[1:])
+    proxy.tab.add('/animated.gif', f.getvalue())
+
+    r, g, b = colors[frame]
+
+    assert proxy.pixel(url='/animated.gif', x=3, y=2, frame=frame) == {
+        'r': r,
+        'g': g,
+        'b': b,
+        'hex': proxy.rgb2hex(r, g, b),
+    }
+    assert proxy.pixel(url='/animated.gif', points=[[3, 2]], frame=frame)['hex'] == [proxy.rgb2hex(r, g, b)]
@@ -0,0 +1,88 @@
+from __future__ import absolute_import
+from PIL import Image
+from webfriend.images import preprocess
+import pytest
+
+
+@pytest.fixture
+def recorded(monkeypatch):
+    """
+    Replaces the preprocessing steps with ones that record the order they ran in.
+    """
+    calls = []
+
+    def step(name):
+        def run(image):
+            calls.append(name)
+            return image
+
+        return run
+
+    monkeypatch.setattr(preprocess, 'STEPS', [
+        (name, (step(name), placement)) for name, (_, placement) in preprocess.STEPS
+    ])
+
+    def rescale(image):
+        calls.append('rescale')
+        return image, 2.0
+
+    return calls, rescale
+
+
+def test_steps_run_in_pipeline_order(recorded):
+    calls, rescale = recorded
+    _, factor = preprocess.run(Image.new('RGB', (10, 10)), ['threshold', 'deskew', 'greyscale'], rescale=rescale)
+
+    assert calls == ['greyscale', 'deskew', 'rescale', 'threshold']
+    assert factor == 2.0
+
+
+def test_smallest_steps_run_after_shrinking(recorded):
+    calls, rescale = recorded
+    preprocess.run(Image.new('RGB', (10, 10)), ['autocontrast', 'greyscale', 'threshold'], rescale=rescale, shrinking=True)
+
+    assert calls == ['greyscale', 'rescale', 'autocontrast', 'threshold']
+
+
+def test_without_rescaling(recorded):
+    calls, _ = recorded
+    _, factor = preprocess.run(Image.new('RGB', (10, 10)), ['denoise', 'autocontrast'])
+
+    assert calls == ['autocontrast', 'denoise']
+    assert factor == 1.0
+
+
+def test_unrecognized_step():
+    with pytest.raises(ValueError):
+        preprocess.run(Image.new('RGB', (10, 10)), ['greyscale', 'sharpen'])
+
+
+def test_register_step(recorded):
+    calls, rescale = recorded
+
+    preprocess.register_step('sharpen', lambda image: calls.append('sharpen') or image, before='denoise')
+    preprocess.run(Image.new('RGB', (10, 10)), ['denoise', 'sharpen', 'autocontrast'], rescale=rescale)
+
+    assert calls == ['autocontrast', 'sharpen', 'denoise', 'rescale']
+
+    with pytest.raises(ValueError):
+        preprocess.register_step('sharpen', lambda image: image, placement='middle')
+
+    preprocess.unregister_step('sharpen')
+
+    assert 'sharpen' not in [name for name, _ in preprocess.STEPS]
+
+
+def test_greyscale_flattens_transparency_onto_white():
+    image = Image.new('RGBA', (2, 1), (0, 0, 0, 0))
+    image.putpixel((1, 0), (0, 0, 0, 255))
+
+    result = preprocess.greyscale(image)
+
+    assert (result.getpixel((0, 0)), result.getpixel((1, 0))) == (255, 0)
+
+
+def test_threshold_is_black_and_white():
+    image = Image.linear_gradient('L').resize((64, 64))
+
+    assert set(bytearray(preprocess.threshold(image).convert('L').tobytes())) == set([0, 255])
@@ -0,0 +1,89 @@
+from __future__ import absolute_import
+from webfriend.images import ocr
+import os
+import pytest
+
+
+class Tool(object):
+    def __init__(self, name, languages):
+        self.name = name
+        self.languages = languages
+        self.probes = []
+
+    def get_name(self):
+        return self.name
+
+    def get_available_languages(self):
+        path = os.environ.get('TESSDATA_PREFIX')
+        self.probes.append(path)
+
+        if path not in self.languages:
+            raise Exception('No data at {}'.format(path))
+
+        return self.languages[path]
+
+
+class Pyocr(object):
+    def __init__(self, tools):
+        self.tools = tools
+        self.discoveries = 0
+
+    def get_available_tools(self):
+        self.discoveries += 1
+        return self.tools
+
+
+@pytest.fixture
+def tools(monkeypatch):
+    first = Tool('first', {'/a': ['eng'], '/b': ['eng', 'deu']})
+    second = Tool('second', {'/b': ['fra']})
+    fake = Pyocr([first, second])
+
+    monkeypatch.setattr(ocr, 'pyocr', fake)
+    monkeypatch.setattr(ocr, '_registries', {})
+    monkeypatch.setitem(os.environ, 'TESSDATA_PREFIX', '')
+
+    return fake
+
+
+def test_discovery_happens_once(tools):
+    registry = ocr.OcrToolRegistry({'TESSDATA_PREFIX': ['/a', '/b']})
+
+    assert tools.discoveries == 0
+
+    registry.find('eng')
+    registry.find('deu')
+    registry.languages()
+
+    assert tools.discoveries == 1
+    assert tools.tools[0].probes == ['/a', '/b']
+    assert tools.tools[1].probes == ['/a', '/b']
+
+
+def test_find_in_order_of_preference(tools):
+    registry = ocr.OcrToolRegistry({'TESSDATA_PREFIX': ['/a', '/b']})
+    first, second = tools.tools
+
+    assert registry.find('eng') == [
+        (first, {'TESSDATA_PREFIX': '/a'}),
+        (first, {'TESSDATA_PREFIX': '/b'}),
+    ]
+    assert registry.find('fra') == [(second, {'TESSDATA_PREFIX': '/b'})]
+    assert registry.find('jpn') == []
+    assert registry.languages() == ['deu', 'eng', 'fra']
+
+
+def test_invalidate_rediscovers(tools):
+    registry = ocr.OcrToolRegistry({'TESSDATA_PREFIX': ['/a']})
+    registry.languages()
+    registry.invalidate()
+    registry.languages()
+
+    assert tools.discoveries == 2
+
+
+def test_get_registry_is_shared(tools):
+    registry = ocr.get_registry({'TESSDATA_PREFIX': ['/a', '/b']})
+
+    assert ocr.get_registry({'TESSDATA_PREFIX': ['/a', '/b']}) is registry
+    assert ocr.get_registry({'TESSDATA_PREFIX': ['/b']}) is not registry
@@ -0,0 +1,83 @@
+from __future__ import absolute_import
+from PIL import Image
+from webfriend.images.boxes import BoxList
+from webfriend.images.results import OcrResultCache
+import pytest
+import time
+
+
+@pytest.fixture
+def path(tmpdir):
+    return str(tmpdir.join('ocr', 'results.db'))
+
+
+def test_key_depends_on_pixels_and_options():
+    image = Image.new('RGB', (10, 10), 'white')
+    key = OcrResultCache.key(image, language='eng', engine='tool')
+
+    assert key == OcrResultCache.key(image.copy(), engine='tool', language='eng')
+    assert key != OcrResultCache.key(image, language='deu', engine='tool')
+    assert key != OcrResultCache.key(image, language='eng', engine='stub')
+    assert key != OcrResultCache.key(Image.new('RGB', (10, 10), 'black'), language='eng', engine='tool')
+    assert key != OcrResultCache.key(Image.new('RGB', (20, 5), 'white'), language='eng', engine='tool')
+    assert key != OcrResultCache.key(image.convert('L'), language='eng', engine='tool')
+
+
+def test_get_and_put(path):
+    cache = OcrResultCache(path)
+    boxes = BoxList(['hello', 'world'], [0, 0, 10, 10, 20, 0, 30, 10])
+
+    assert cache.get('a') == (False, None)
+
+    cache.put('a', boxes)
+    cache.put('b', u'some text')
+
+    assert cache.get('a') == (True, boxes)
+    assert cache.get('b') == (True, u'some text')
+    assert (cache.hits, cache.misses) == (2, 1)
+
+
+def test_results_persist(path):
+    cache = OcrResultCache(path)
+    cache.put('a', 'text')
+    cache.close()
+
+    assert OcrResultCache(path).get('a') == (True, 'text')
+
+
+def test_evicts_least_recently_accessed(path):
+    cache = OcrResultCache(path, max_bytes=None)
+
+    for key in 'abc':
+        cache.put(key, 'x' * 100)
+        time.sleep(0.01)
+
+    cache.get('a')
+    size = cache.stats()['bytes'] // 3
+
+    cache.max_bytes = 3 * size
+    cache.put('d', 'x' * 100)
+
+    assert cache.get('b') == (False, None)
+    assert all(cache.get(key)[0] for key in 'acd')
+    assert cache.stats()['entries'] == 3
+
+
+def test_expires_old_results(path):
+    cache = OcrResultCache(path, max_age=60)
+    cache.put('a', 'text')
+
+    assert cache.get('a') == (True, 'text')
+
+    cache.max_age = -1
+
+    assert cache.get('a') == (False, None)
+    assert cache.stats()['entries'] == 0
+
+
+def test_clear(path):
+    cache = OcrResultCache(path)
+    cache.put('a', 'text')
+    cache.clear()
+
+    assert cache.get('a') == (False, None)
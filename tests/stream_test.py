@@ -0,0 +1,59 @@
+from __future__ import absolute_import
+from PIL import Image
+from webfriend.images import workers
+import types
+
+
+def document(proxy, height=2500):
+    proxy.tab.add('/document.png', Image.new('RGB', (300, height), 'white'))
+
+
+def test_stream_lines_of_text(stub_pool):
+    document(stub_pool)
+    lines = stub_pool.extract_text(url='/document.png', stream=True)
+
+    assert isinstance(lines, types.GeneratorType)
+    assert list(lines) == ['hello world', 'second line'] * 3
+
+
+def test_stream_boxes_in_order(stub_pool):
+    document(stub_pool)
+    lines = list(stub_pool.extract_text(url='/document.png', stream=True, output_format='lines'))
+    tops = [line['bounding']['start']['y'] for line in lines]
+
+    assert [line['text'] for line in lines] == ['hello world', 'second line'] * 3
+    assert tops == sorted(tops)
+    assert tops[0] == 0
+    assert lines[-1]['bounding']['end']['y'] == 2500
+
+
+def test_stream_stops_early(stub_pool, monkeypatch):
+    document(stub_pool)
+    pool = workers.get_pool(stub_pool.ocr_workers)
+    submitted = []
+    submit = pool.submit
+
+    def counting_submit(*args):
+        submitted.append(args)
+        return submit(*args)
+
+    monkeypatch.setattr(pool, 'submit', counting_submit)
+    lines = stub_pool.extract_text(url='/document.png', stream=True)
+
+    assert next(lines) == 'hello world'
+
+    # one band in flight per worker, plus the one that replaced the band being read
+    assert len(submitted) == 2
+
+    lines.close()
+
+    assert len(submitted) == 2
+
+
+def test_stream_is_not_cached(stub_pool, tmpdir):
+    document(stub_pool, height=500)
+    stub_pool.ocr_cache_path = str(tmpdir.join('results.db'))
+
+    assert list(stub_pool.extract_text(url='/document.png', stream=True)) == ['hello world', 'second line']
+    assert list(stub_pool.extract_text(url='/document.png', stream=True)) == ['hello world', 'second line']
+    assert stub_pool.cache_stats()['ocr']['hits'] == 0
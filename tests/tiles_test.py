@@ -0,0 +1,104 @@
+from __future__ import absolute_import
+from webfriend.images import tiles
+from webfriend.images.boxes import BoxList
+import pytest
+
+
+def covered(boxes, width, height):
+    """
+    Returns how many times each pixel is covered by the cores of the given tiles.
+    """
+    counts = {}
+
+    for _, core in boxes:
+        for y in range(height):
+            for x in range(width):
+                if core[0] <= x + 0.5 < core[2] and core[1] <= y + 0.5 < core[3]:
+                    counts[(x, y)] = counts.get((x, y), 0) + 1
+
+    return counts
+
+
+def test_single_tile_covers_whole_image():
+    assert tiles.tile_boxes(300, 200, 1000, 100) == [
+        ((0, 0, 300, 200), (0, 0, 300, 200)),
+    ]
+
+
+@pytest.mark.parametrize('tile_size', [1000, [300, 1000], [1000, 1000]])
+def test_small_image_with_default_overlap(tile_size):
+    assert tiles.tile_boxes(300, 40, tile_size, 100) == [
+        ((0, 0, 300, 40), (0, 0, 300, 40)),
+    ]
+
+
+def test_overlap_ignored_along_dimension_covered_by_one_tile():
+    boxes = tiles.tile_boxes(1000, 40, [300, 1000], 100)
+
+    assert [tile for tile, _ in boxes] == [
+        (0, 0, 300, 40),
+        (200, 0, 500, 40),
+        (400, 0, 700, 40),
+        (600, 0, 900, 40),
+        (700, 0, 1000, 40),
+    ]
+
+
+def test_overlap_limited_to_tile_size():
+    boxes = tiles.tile_boxes(200, 20, 50, 100)
+
+    assert all(tile[2] - tile[0] == 50 for tile, _ in boxes)
+    assert set(covered(boxes, 200, 20).values()) == set([1])
+
+
+def test_cores_partition_image():
+    boxes = tiles.tile_boxes(130, 90, [40, 30], 10)
+
+    assert set(covered(boxes, 130, 90).values()) == set([1])
+    assert len(covered(boxes, 130, 90)) == 130 * 90
+
+
+def test_negative_overlap():
+    with pytest.raises(ValueError):
+        tiles.tile_boxes(100, 100, 50, -1)
+
+
+def item(text, left, top, right, bottom):
+    return {
+        'text': text,
+        'bounding': {
+            'start': {'x': left, 'y': top},
+            'end': {'x': right, 'y': bottom},
+        },
+    }
+
+
+def test_merge_drops_duplicates_from_overlap():
+    # "b" was detected by both tiles, but is only kept from the tile whose core contains it
+    merged = tiles.merge_tiles([
+        ((0, 0, 50, 100), [item('a', 0, 0, 20, 10), item('b', 40, 50, 70, 60)]),
+        ((50, 0, 100, 100), [item('b', 41, 50, 71, 60), item('c', 80, 0, 95, 10)]),
+    ])
+
+    assert [(i['text'], i['bounding']['start']['x']) for i in merged] == [('a', 0), ('c', 80), ('b', 41)]
+
+
+def test_merge_box_lists():
+    merged = tiles.merge_tiles([
+        ((0, 0, 50, 100), BoxList(['a', 'b'], [0, 0, 20, 10, 40, 50, 70, 60])),
+        ((50, 0, 100, 100), BoxList(['b', 'c'], [41, 50, 71, 60, 80, 0, 95, 10])),
+    ])
+
+    assert isinstance(merged, BoxList)
+    assert merged.texts == ['a', 'c', 'b']
+    assert merged.bounds(2) == (41, 50, 71, 60)
+
+
+def test_merge_mixed_results():
+    merged = tiles.merge_tiles([
+        ((0, 0, 50, 100), BoxList(['a'], [0, 20, 20, 30])),
+        ((50, 0, 100, 100), [item('c', 80, 0, 95, 10)]),
+        ((0, 100, 100, 200), None),
+    ])
+
+    assert [i['text'] for i in merged] == ['c', 'a']
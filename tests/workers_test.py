@@ -0,0 +1,47 @@
+from __future__ import absolute_import
+from PIL import Image
+from webfriend.images import workers
+import pytest
+
+
+def roundtrip(image):
+    return workers.unpack_image(workers.pack_image(image))
+
+
+@pytest.mark.parametrize('mode', ['1', 'L', 'RGB'])
+def test_roundtrip_keeps_mode(mode):
+    image = Image.new(mode, (7, 5), 'white')
+    image.putpixel((3, 2), 0)
+    unpacked = roundtrip(image)
+
+    assert unpacked.mode == mode
+    assert unpacked.tobytes() == image.tobytes()
+
+
+def test_transparency_is_flattened_onto_white():
+    image = Image.new('RGBA', (4, 4), (0, 0, 0, 0))
+    image.putpixel((1, 1), (255, 0, 0, 255))
+    image.putpixel((2, 2), (0, 0, 0, 128))
+    unpacked = roundtrip(image)
+
+    assert unpacked.mode == 'RGB'
+    assert unpacked.getpixel((0, 0)) == (255, 255, 255)
+    assert unpacked.getpixel((1, 1)) == (255, 0, 0)
+    assert unpacked.getpixel((2, 2)) == (127, 127, 127)
+
+
+def test_palette_transparency_is_flattened_onto_white():
+    image = Image.new('P', (4, 4), 0)
+    image.putpalette([0, 0, 0, 0, 0, 255] + [0] * 762)
+    image.putpixel((1, 1), 1)
+    image.info['transparency'] = 0
+    unpacked = roundtrip(image)
+
+    assert unpacked.getpixel((0, 0)) == (255, 255, 255)
+    assert unpacked.getpixel((1, 1)) == (0, 0, 255)
+
+
+def test_greyscale_alpha_is_flattened_onto_white():
+    image = Image.new('LA', (2, 2), (0, 0))
+
+    assert roundtrip(image).getpixel((0, 0)) == (255, 255, 255)
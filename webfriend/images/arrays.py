@@ -0,0 +1,125 @@
+from __future__ import absolute_import
+from collections import OrderedDict
+from webfriend.images import lazy
+
+numpy = lazy.module('numpy')
+
+
+def image_array(image):
+    """
+    Returns a (height, width, bands) NumPy view of the decoded pixel data of the given image.
+    """
+    data = numpy.asarray(image)
+
+    # bilevel images come back as booleans, but getpixel() reports them as 0 or 255
+    if data.dtype == numpy.bool_:
+        data = data.astype(numpy.uint8) * 255
+
+    if data.ndim == 2:
+        data = data[:, :, numpy.newaxis]
+
+    return data
+
+
+def region_box(region):
+    """
+    Converts a region specification into a (left, top, right, bottom) tuple.  Regions may be given
+    as a sequence of `[left, top, right, bottom]`, as a `dict` with the keys *x*, *y*, *width*, and
+    *height*, or as a `dict` containing a *bounding* box like those returned from OCR results.
+    """
+    if isinstance(region, dict):
+        if 'bounding' in region:
+            box = (
+                region['bounding']['start']['x'],
+                region['bounding']['start']['y'],
+                region['bounding']['end']['x'],
+                region['bounding']['end']['y'],
+            )
+        else:
+            x = region.get('x', region.get('left', 0))
+            y = region.get('y', region.get('top', 0))
+            box = (x, y, x + region['width'], y + region['height'])
+
+    elif isinstance(region, (list, tuple)) and len(region) == 4:
+        box = tuple(region)
+    else:
+        raise ValueError("Region must be a list of [left, top, right, bottom] or a dict")
+
+    return tuple([int(round(float(v))) for v in box])
+
+
+def parse_region(region, width, height):
+    """
+    Normalizes a region specification (see `region_box`) into a (left, top, right, bottom) tuple
+    clipped to the given dimensions.
+    """
+    left, top, right, bottom = region_box(region)
+
+    left   = min(max(left, 0), width)
+    top    = min(max(top, 0), height)
+    right  = min(max(right, left), width)
+    bottom = min(max(bottom, top), height)
+
+    if right <= left or bottom <= top:
+        raise ValueError("Region {} does not overlap the {}x{} image".format(region, width, height))
+
+    return (left, top, right, bottom)
+
+
+def grid_points(box, stride=1):
+    """
+    Returns flat arrays of the X and Y coordinates of every *stride*-th pixel within the given
+    (left, top, right, bottom) box, in row-major order.
+    """
+    stride = max(int(stride or 1), 1)
+    left, top, right, bottom = box
+
+    ys, xs = numpy.mgrid[top:bottom:stride, left:right:stride]
+
+    return xs.ravel(), ys.ravel()
+
+
+def sample_points(data, xs, ys):
+    """
+    Returns an (n, bands) array of the pixel values at the given coordinates.
+    """
+    xs = numpy.asarray(xs, dtype=numpy.intp)
+    ys = numpy.asarray(ys, dtype=numpy.intp)
+    height, width = data.shape[:2]
+
+    if len(xs) and (xs.min() < 0 or ys.min() < 0 or xs.max() >= width or ys.max() >= height):
+        raise IndexError("One or more points lie outside of the {}x{} image".format(width, height))
+
+    return data[ys, xs]
+
+
+def channel_statistics(values, channels):
+    """
+    Computes the mean, minimum, maximum, and standard deviation of each channel of an (n, bands)
+    array of pixel values.
+    """
+    values = values.astype(numpy.float64)
+    stats = OrderedDict()
+
+    means   = values.mean(axis=0)
+    minimum = values.min(axis=0)
+    maximum = values.max(axis=0)
+    stddevs = values.std(axis=0)
+
+    for i, channel in enumerate(channels):
+        stats[channel] = OrderedDict()
+        stats[channel]['mean']   = float(means[i])
+        stats[channel]['min']    = float(minimum[i])
+        stats[channel]['max']    = float(maximum[i])
+        stats[channel]['stddev'] = float(stddevs[i])
+
+    return stats
+
+
+def hex_values(values):
+    """
+    Returns a list of `#RRGGBB` or `#RRGGBBAA` strings for an (n, 3) or (n, 4) array of values.
+    """
+    template = '#' + ('{:02x}' * values.shape[1])
+
+    return [template.format(*row) for row in values.tolist()]
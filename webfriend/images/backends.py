@@ -0,0 +1,204 @@
+from __future__ import absolute_import
+from webfriend.images import ocr, workers
+from webfriend.images.ocr import is_libtesseract
+import os
+
+# the environment variable that chooses the OCR backend when one hasn't been configured
+ENGINE_VARIABLE = 'WEBFRIEND_OCR_ENGINE'
+DEFAULT_ENGINE = 'tool'
+
+
+class OcrBackend(object):
+    """
+    Performs character recognition on behalf of the image commands.  A backend offers engines,
+    which are (tool, environment) pairs where the tool behaves like a pyocr tool (it has
+    `get_name()` and `image_to_string(image, lang, builder)`) and the environment holds the
+    variables to set while it runs.  Engines are tried in order until one of them succeeds.
+    """
+
+    name = None
+
+    def engines(self, language, env_paths):
+        """
+        Returns a list of (tool, environment) pairs capable of recognizing the given language, in
+        order of preference.
+        """
+        raise NotImplementedError()
+
+    def languages(self, env_paths):
+        """
+        Returns a sorted list of the languages this backend can recognize.
+        """
+        raise NotImplementedError()
+
+    def recognize(self, tool, env, image, language, builder, processes=None):
+        """
+        Recognizes the text in an image with one of this backend's engines, feeding the results
+        into the given pyocr builder.
+        """
+        return tool.image_to_string(image, lang=language, builder=builder)
+
+
+class PyocrBackend(OcrBackend):
+    """
+    Uses the OCR tools detected by pyocr, optionally limited to those implemented by the given
+    pyocr modules.
+    """
+
+    def __init__(self, name, modules=None):
+        self.name = name
+        self.modules = modules
+
+    def accepts(self, tool):
+        return (self.modules is None or getattr(tool, '__name__', None) in self.modules)
+
+    def engines(self, language, env_paths):
+        registry = ocr.get_registry(env_paths)
+        tools = [tool for tool in registry.tools if self.accepts(tool)]
+
+        if not len(tools):
+            raise Exception("No OCR tools available")
+
+        return [
+            (tool, env) for tool, env in registry.find(language) if self.accepts(tool)
+        ]
+
+    def languages(self, env_paths):
+        out = set()
+
+        for tool, _, languages in ocr.get_registry(env_paths).engines:
+            if self.accepts(tool):
+                out.update(languages)
+
+        return sorted(out)
+
+    def recognize(self, tool, env, image, language, builder, processes=None):
+        # inside of a worker process, reuse the Tesseract instances the worker keeps loaded
+        if workers.in_worker() and is_libtesseract(tool):
+            return workers.recognize(image, language, builder, env=env)
+
+        return tool.image_to_string(image, lang=language, builder=builder)
+
+
+class WorkerPoolBackend(PyocrBackend):
+    """
+    Performs recognition in the pool of long-lived OCR worker processes, each of which keeps the
+    Tesseract language models it has used loaded between calls.  This requires the Tesseract C
+    library; the other tools detected by pyocr are used directly if it is not available.
+    """
+
+    def engines(self, language, env_paths):
+        return sorted(
+            super(WorkerPoolBackend, self).engines(language, env_paths),
+            key=lambda engine: not is_libtesseract(engine[0])
+        )
+
+    def recognize(self, tool, env, image, language, builder, processes=None):
+        if is_libtesseract(tool):
+            return workers.recognize(image, language, builder, env=env, processes=processes)
+
+        return tool.image_to_string(image, lang=language, builder=builder)
+
+
+class StubBackend(OcrBackend):
+    """
+    Doesn't perform any recognition, and instead "recognizes" the same text in every image (laid
+    out as evenly-spaced words on evenly-spaced lines across the whole image.)  This is useful for
+    testing scripts on hosts that don't have any OCR tools installed.
+    """
+
+    name = 'stub'
+
+    def __init__(self, text=None):
+        self.text = text
+
+    def get_name(self):
+        return 'Stub'
+
+    def engines(self, language, env_paths):
+        return [(self, {})]
+
+    def languages(self, env_paths):
+        return []
+
+    def image_to_string(self, image, lang=None, builder=None):
+        text = self.text
+
+        if text is None:
+            text = os.environ.get('WEBFRIEND_OCR_STUB_TEXT', '')
+
+        lines = [line.split() for line in text.splitlines() if line.strip()]
+
+        for i, words in enumerate(lines):
+            top = image.height * i // len(lines)
+            bottom = image.height * (i + 1) // len(lines)
+
+            builder.start_line(((0, top), (image.width, bottom)))
+
+            for j, word in enumerate(words):
+                left = image.width * j // len(words)
+                right = image.width * (j + 1) // len(words)
+                builder.add_word(word, ((left, top), (right, bottom)), 100)
+
+            builder.end_line()
+
+        return builder.get_output()
+
+
+_backends = {}
+
+
+def register(backend):
+    """
+    Makes an OCR backend available to be chosen by name, replacing any existing backend with the
+    same name.
+    """
+    _backends[backend.name] = backend
+    return backend
+
+
+def names():
+    return sorted(_backends.keys())
+
+
+def get(name):
+    try:
+        return _backends[name]
+    except KeyError:
+        raise ValueError("Unrecognized ocr_engine '{}' (valid engines: {})".format(
+            name,
+            ', '.join(names())
+        ))
+
+
+def default_engine():
+    """
+    Returns the name of the backend to use when none has been configured.
+    """
+    return (os.environ.get(ENGINE_VARIABLE) or DEFAULT_ENGINE)
+
+
+def resolve(name=None, output_format=None):
+    """
+    Returns the backend to use for recognizing text in the given output_format, given the name of
+    the configured backend (if any.)
+    """
+    name = (name or default_engine())
+
+    # recognition that was handed off to a worker process uses the worker's persistent Tesseract
+    # instances if it can
+    if name == 'tool' and workers.in_worker():
+        name = 'workers'
+
+    # the worker processes can't produce character boxes
+    if name == 'workers' and output_format == 'characters':
+        name = 'tool'
+
+    return get(name)
+
+
+register(PyocrBackend('tool'))
+register(PyocrBackend('tesseract', modules=('pyocr.tesseract',)))
+register(PyocrBackend('libtesseract', modules=('pyocr.libtesseract',)))
+register(WorkerPoolBackend('workers'))
+register(StubBackend())
@@ -0,0 +1,216 @@
+from __future__ import absolute_import
+from array import array
+from collections import OrderedDict
+from webfriend.images.arrays import region_box
+import re
+
+
+class BoxList(object):
+    """
+    A compact, read-only list of OCR text boxes.  Rather than holding a nested `dict` per box, the
+    text of each box is kept in a flat list and the coordinates of all of the boxes in a single
+    array of 32-bit integers.  Indexing or iterating yields each box in the same `dict` form that
+    `postprocess_boxes` has always produced, built on demand.
+    """
+
+    __slots__ = ('_texts', '_coords')
+
+    def __init__(self, texts=None, coords=None):
+        self._texts = list(texts or [])
+        self._coords = array('i', coords or [])
+
+        if len(self._coords) != 4 * len(self._texts):
+            raise ValueError("Expected 4 coordinates per box")
+
+    @classmethod
+    def from_boxes(cls, boxes, text_handler=None, rescale_factor=1.0, offset=(0, 0)):
+        """
+        Builds a list from pyocr boxes, scaling their coordinates back down by rescale_factor and
+        then translating them by offset.
+        """
+        texts = []
+        coords = array('i')
+
+        for box in boxes:
+            text = box.content
+
+            if text_handler:
+                text = text_handler(text)
+
+            (x0, y0), (x1, y1) = box.position
+
+            texts.append(text)
+            coords.extend((
+                int(x0 / rescale_factor) + offset[0],
+                int(y0 / rescale_factor) + offset[1],
+                int(x1 / rescale_factor) + offset[0],
+                int(y1 / rescale_factor) + offset[1],
+            ))
+
+        return cls(texts, coords)
+
+    @classmethod
+    def concatenate(cls, lists):
+        out = cls()
+
+        for boxes in lists:
+            if boxes:
+                out._texts.extend(boxes._texts)
+                out._coords.extend(boxes._coords)
+
+        return out
+
+    def __len__(self):
+        return len(self._texts)
+
+    def __iter__(self):
+        for i in range(len(self._texts)):
+            yield self._box(i)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return self.take(range(*index.indices(len(self))))
+
+        if index < 0:
+            index += len(self)
+
+        if not 0 <= index < len(self):
+            raise IndexError("box index out of range")
+
+        return self._box(index)
+
+    def __eq__(self, other):
+        if isinstance(other, BoxList):
+            return self._texts == other._texts and self._coords == other._coords
+
+        return list(self) == other
+
+    def __ne__(self, other):
+        return not self.__eq__(other)
+
+    def __repr__(self):
+        return 'BoxList({})'.format(self._texts)
+
+    def __getstate__(self):
+        return (self._texts, self._coords)
+
+    def __setstate__(self, state):
+        self._texts, self._coords = state
+
+    def _box(self, i):
+        x0, y0, x1, y1 = self._coords[4 * i:4 * i + 4]
+
+        box = OrderedDict()
+        box['text'] = self._texts[i]
+        box['bounding'] = OrderedDict()
+        box['bounding']['start'] = OrderedDict()
+        box['bounding']['start']['x'] = x0
+        box['bounding']['start']['y'] = y0
+        box['bounding']['end'] = OrderedDict()
+        box['bounding']['end']['x'] = x1
+        box['bounding']['end']['y'] = y1
+        box['width'] = x1 - x0
+        box['height'] = y1 - y0
+        return box
+
+    def to_json(self):
+        return list(self)
+
+    @property
+    def texts(self):
+        return list(self._texts)
+
+    def text(self, index):
+        return self._texts[index]
+
+    def bounds(self, index):
+        """
+        Returns the (left, top, right, bottom) of the box at the given index.
+        """
+        return tuple(self._coords[4 * index:4 * index + 4])
+
+    def centers(self):
+        c = self._coords
+        return [((c[i] + c[i + 2]) / 2.0, (c[i + 1] + c[i + 3]) / 2.0) for i in range(0, len(c), 4)]
+
+    def take(self, indices):
+        """
+        Returns a new list containing the boxes at the given indices, in that order.
+        """
+        texts = []
+        coords = array('i')
+
+        for i in indices:
+            texts.append(self._texts[i])
+            coords.extend(self._coords[4 * i:4 * i + 4])
+
+        return BoxList(texts, coords)
+
+    def filter(self, pattern=None, function=None):
+        """
+        Returns the boxes whose text matches the given regular expression and/or for whose text the
+        given function returns true.
+        """
+        if pattern is not None and not hasattr(pattern, 'search'):
+            pattern = re.compile(pattern)
+
+        return self.take([
+            i for i, text in enumerate(self._texts) if (
+                (pattern is None or pattern.search(text)) and (function is None or function(text))
+            )
+        ])
+
+    def within(self, region, partial=False):
+        """
+        Returns the boxes that lie entirely inside of the given region (see `arrays.region_box` for
+        the forms a region can take), or that overlap it at all if partial is true.
+        """
+        left, top, right, bottom = region_box(region)
+        c = self._coords
+        indices = []
+
+        for i in range(len(self._texts)):
+            x0, y0, x1, y1 = c[4 * i:4 * i + 4]
+
+            if partial:
+                if x0 < right and x1 > left and y0 < bottom and y1 > top:
+                    indices.append(i)
+
+            elif x0 >= left and x1 <= right and y0 >= top and y1 <= bottom:
+                indices.append(i)
+
+        return self.take(indices)
+
+    def sorted(self):
+        """
+        Returns the boxes in reading order: top to bottom, then left to right.
+        """
+        c = self._coords
+        return self.take(sorted(range(len(self._texts)), key=lambda i: (c[4 * i + 1], c[4 * i])))
+
+    def lines(self, tolerance=0.5):
+        """
+        Groups boxes into lines of text, returning a list of lists of boxes (each ordered left to
+        right, and the lines ordered top to bottom.)  A box joins a line when it vertically overlaps
+        the line by at least the given fraction of the smaller of their heights.
+        """
+        c = self._coords
+        lines = []
+
+        for i in sorted(range(len(self._texts)), key=lambda i: (c[4 * i + 1] + c[4 * i + 3])):
+            y0, y1 = c[4 * i + 1], c[4 * i + 3]
+
+            for line in lines:
+                overlap = min(y1, line[1]) - max(y0, line[0])
+
+                if overlap >= tolerance * max(1, min(y1 - y0, line[1] - line[0])):
+                    line[0] = min(y0, line[0])
+                    line[1] = max(y1, line[1])
+                    line[2].append(i)
+                    break
+            else:
+                lines.append([y0, y1, [i]])
+
+        lines.sort(key=lambda line: line[0])
+
+        return [self.take(sorted(line[2], key=lambda i: c[4 * i])) for line in lines]
@@ -0,0 +1,113 @@
+from __future__ import absolute_import
+from collections import OrderedDict
+import logging
+import threading
+
+
+def image_nbytes(image):
+    """
+    Estimates the number of bytes the decoded pixel data of the given image occupies in memory.
+    """
+    bands = len(image.getbands())
+
+    if image.mode == '1':
+        bits = 1
+    elif image.mode in ('I', 'F', 'I;32'):
+        bits = 32
+    elif image.mode.startswith('I;16'):
+        bits = 16
+    else:
+        bits = 8
+
+    return max(1, (image.width * image.height * bands * bits) // 8)
+
+
+class ImageCache(object):
+    """
+    A least-recently-used cache of decoded images, bounded by the total number of bytes of pixel
+    data it holds rather than by the number of entries.
+    """
+
+    def __init__(self, max_bytes=67108864):
+        self.max_bytes = max_bytes
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._lock = threading.RLock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def get(self, key):
+        with self._lock:
+            try:
+                image, size = self._entries.pop(key)
+            except KeyError:
+                self.misses += 1
+                return None
+
+            # re-insert to mark this entry as the most recently used
+            self._entries[key] = (image, size)
+            self.hits += 1
+            return image
+
+    def put(self, key, image):
+        size = image_nbytes(image)
+
+        with self._lock:
+            self.discard(key)
+
+            # images that would never fit are not worth evicting everything else for
+            if size > self.max_bytes:
+                logging.debug('Not caching image {}: {} bytes exceeds cache size of {} bytes'.format(
+                    key,
+                    size,
+                    self.max_bytes
+                ))
+                return image
+
+            self._entries[key] = (image, size)
+            self.current_bytes += size
+            self.shrink()
+
+        return image
+
+    def discard(self, key):
+        with self._lock:
+            try:
+                _, size = self._entries.pop(key)
+                self.current_bytes -= size
+                return True
+            except KeyError:
+                return False
+
+    def shrink(self, max_bytes=None):
+        if max_bytes is not None:
+            self.max_bytes = max_bytes
+
+        with self._lock:
+            while self._entries and self.current_bytes > self.max_bytes:
+                key, (_, size) = self._entries.popitem(last=False)
+                self.current_bytes -= size
+                self.evictions += 1
+                logging.debug('Evicted image {} from cache ({} bytes)'.format(key, size))
+
+    def clear(self, *args, **kwargs):
+        with self._lock:
+            self._entries.clear()
+            self.current_bytes = 0
+
+    def stats(self):
+        stats = OrderedDict()
+        stats['entries']   = len(self._entries)
+        stats['bytes']     = self.current_bytes
+        stats['max_bytes'] = self.max_bytes
+        stats['hits']      = self.hits
+        stats['misses']    = self.misses
+        stats['evictions'] = self.evictions
+        return stats
@@ -0,0 +1,169 @@
+from __future__ import absolute_import
+from webfriend.images import lazy
+import math
+
+Image = lazy.module('PIL.Image')
+numpy = lazy.module('numpy')
+
+# the number of pixels compared against the cluster centers at a time while clustering, which
+# bounds the memory used by the (pixels, clusters, bands) distance calculation
+KMEANS_CHUNK_SIZE = 65536
+
+
+def downsample(image, pixels):
+    """
+    Shrinks an image to roughly the given number of pixels (preserving its aspect ratio) if it is
+    larger than that.  Nearest-neighbor sampling is used so that no new colors are introduced.
+    """
+    if not pixels or image.width * image.height <= pixels:
+        return image
+
+    scale = math.sqrt(float(pixels) / (image.width * image.height))
+
+    return image.resize(
+        (max(1, int(image.width * scale)), max(1, int(image.height * scale))),
+        resample=Image.NEAREST
+    )
+
+
+def histograms(values, bins=256):
+    """
+    Computes a histogram of each channel of an (n, bands) array of pixel values.  Returns the
+    (bands, bins) counts and the (bins + 1) edges of the bins.  8-bit values are binned over their
+    full range (0-255); other values over the range actually present.
+    """
+    if values.dtype == numpy.uint8:
+        value_range = (0, 256)
+    elif len(values):
+        value_range = (float(values.min()), float(values.max()) + 1)
+    else:
+        value_range = (0, 1)
+
+    if values.dtype == numpy.uint8 and bins == 256:
+        counts = numpy.array([
+            numpy.bincount(values[:, i], minlength=256) for i in range(values.shape[1])
+        ])
+        edges = numpy.arange(257)
+    else:
+        counts = []
+
+        for i in range(values.shape[1]):
+            channel_counts, edges = numpy.histogram(values[:, i], bins=bins, range=value_range)
+            counts.append(channel_counts)
+
+        counts = numpy.array(counts)
+
+    return counts, edges
+
+
+def median_cut(values, colors):
+    """
+    Reduces an (n, bands) array of pixel values to a palette of (up to) the given number of
+    colors by repeatedly splitting the group of pixels with the widest range of values in any one
+    channel at its median (keeping pixels with the same value in that channel together.)  Returns
+    the (colors, bands) palette (the mean of each group) and the number of pixels in each group.
+    """
+    groups = [values]
+
+    while len(groups) < colors:
+        ranges = [
+            (group.max(axis=0) - group.min(axis=0)).astype(numpy.float64) if len(group) > 1 else None
+            for group in groups
+        ]
+
+        candidates = [(r.max(), i) for i, r in enumerate(ranges) if r is not None and r.max() > 0]
+
+        if not candidates:
+            break
+
+        _, i = max(candidates)
+        group = groups.pop(i)
+        channel = int(ranges[i].argmax())
+
+        group = group[group[:, channel].argsort(kind='mergesort')]
+        ordered = group[:, channel]
+        median = ordered[len(group) // 2]
+        middle = numpy.searchsorted(ordered, median, side='left')
+
+        if middle == 0:
+            middle = numpy.searchsorted(ordered, median, side='right')
+
+        groups.extend([group[:middle], group[middle:]])
+
+    palette = numpy.array([group.astype(numpy.float64).mean(axis=0) for group in groups])
+    counts = numpy.array([len(group) for group in groups])
+
+    return palette, counts
+
+
+def assign(values, centers):
+    """
+    Returns the index of the nearest center for each of an (n, bands) array of values.
+    """
+    labels = numpy.empty(len(values), dtype=numpy.intp)
+
+    for start in range(0, len(values), KMEANS_CHUNK_SIZE):
+        chunk = values[start:start + KMEANS_CHUNK_SIZE]
+        distances = ((chunk[:, numpy.newaxis, :] - centers[numpy.newaxis, :, :]) ** 2).sum(axis=2)
+        labels[start:start + KMEANS_CHUNK_SIZE] = distances.argmin(axis=1)
+
+    return labels
+
+
+def initial_centers(values, colors, seed=0):
+    """
+    Chooses (up to) the given number of starting cluster centers from an (n, bands) array of
+    values using k-means++ seeding: each center is chosen with a probability proportional to its
+    squared distance from the nearest center chosen so far.  A fixed seed keeps the choice (and so
+    the clustering) the same every time for the same values.
+    """
+    random = numpy.random.RandomState(seed)
+    centers = [values[random.randint(len(values))]]
+    distances = ((values - centers[0]) ** 2).sum(axis=1)
+
+    while len(centers) < colors:
+        total = distances.sum()
+
+        # every value is already a center
+        if total <= 0:
+            break
+
+        index = numpy.searchsorted(numpy.cumsum(distances), random.uniform(0, total), side='right')
+        center = values[min(index, len(values) - 1)]
+        centers.append(center)
+        distances = numpy.minimum(distances, ((values - center) ** 2).sum(axis=1))
+
+    return numpy.array(centers)
+
+
+def kmeans(values, colors, iterations=20):
+    """
+    Clusters an (n, bands) array of pixel values into (up to) the given number of colors using
+    k-means.  Returns the (colors, bands) cluster centers and the number of pixels in each cluster.
+    """
+    values = values.astype(numpy.float64)
+    centers = initial_centers(values, colors)
+    labels = None
+
+    for _ in range(iterations):
+        updated = assign(values, centers)
+
+        if labels is not None and numpy.array_equal(updated, labels):
+            break
+
+        labels = updated
+        counts = numpy.bincount(labels, minlength=len(centers))
+
+        for i in range(values.shape[1]):
+            sums = numpy.bincount(labels, weights=values[:, i], minlength=len(centers))
+
+            # clusters that lost all of their pixels stay where they were
+            centers[:, i] = numpy.where(counts > 0, sums / numpy.maximum(counts, 1), centers[:, i])
+
+    if labels is None:
+        labels = assign(values, centers)
+
+    counts = numpy.bincount(labels, minlength=len(centers))
+    keep = counts > 0
+
+    return centers[keep], counts[keep]
@@ -0,0 +1,285 @@
+from __future__ import absolute_import
+from webfriend.images import lazy
+from webfriend.images.preprocess import flatten
+import struct
+
+Image = lazy.module('PIL.Image')
+numpy = lazy.module('numpy')
+
+# the size of the thumbnails compared to decide whether consecutive frames are the same
+THUMBNAIL_SIZE = (64, 64)
+
+
+def frame_count(image):
+    """
+    Returns the number of frames (or pages) in an image.
+    """
+    return getattr(image, 'n_frames', 1)
+
+
+def _skip_sub_blocks(f):
+    while True:
+        size = f.read(1)
+
+        if not size or not ord(size):
+            return
+
+        f.seek(ord(size), 1)
+
+
+def gif_durations(f):
+    """
+    Reads the duration of each frame of a GIF from the Graphic Control Extension preceding it,
+    skipping over the image data itself.
+    """
+    header = f.read(13)
+
+    if len(header) < 13 or header[:3] != b'GIF':
+        raise ValueError("Not a GIF")
+
+    flags = ord(header[10:11])
+
+    if flags & 0x80:
+        f.seek(3 << ((flags & 7) + 1), 1)
+
+    durations = []
+    delay = None
+
+    while True:
+        introducer = f.read(1)
+
+        # a trailer (or a truncated file) ends the image
+        if not introducer or introducer == b'\x3b':
+            break
+
+        if introducer == b'\x21':
+            label = f.read(1)
+
+            # graphic control extension: block size, flags, delay (in hundredths of a second),
+            # transparent color index, then the terminator left for _skip_sub_blocks
+            if label == b'\xf9':
+                block = f.read(5)
+                delay = struct.unpack('<H', block[2:4])[0] * 10
+
+            _skip_sub_blocks(f)
+
+        elif introducer == b'\x2c':
+            descriptor = f.read(9)
+
+            if len(descriptor) < 9:
+                break
+
+            flags = ord(descriptor[8:9])
+
+            if flags & 0x80:
+                f.seek(3 << ((flags & 7) + 1), 1)
+
+            # LZW minimum code size, then the image data
+            f.seek(1, 1)
+            _skip_sub_blocks(f)
+
+            durations.append(delay)
+            delay = None
+
+        else:
+            raise ValueError("Unexpected block in GIF")
+
+    return durations
+
+
+def png_durations(f):
+    """
+    Reads the duration of each frame of an animated PNG from its frame control chunks, skipping
+    over the image data itself.  Returns `None` if the PNG isn't animated.
+    """
+    if f.read(8) != b'\x89PNG\r\n\x1a\n':
+        raise ValueError("Not a PNG")
+
+    count = None
+    durations = []
+    separate_default = False
+
+    while True:
+        header = f.read(8)
+
+        if len(header) < 8:
+            break
+
+        length, kind = struct.unpack('>I4s', header)
+
+        if kind == b'IEND':
+            break
+
+        if kind in (b'acTL', b'fcTL'):
+            data = f.read(length)
+
+            if kind == b'acTL':
+                count = struct.unpack('>I', data[:4])[0]
+            else:
+                numerator, denominator = struct.unpack('>HH', data[20:24])
+                durations.append(float(numerator) / (denominator or 100) * 1000)
+
+            # skip the checksum
+            f.seek(4, 1)
+        else:
+            # a default image that comes before any frame control chunk isn't part of the
+            # animation, but is still the first frame
+            if kind == b'IDAT' and not durations:
+                separate_default = True
+
+            f.seek(length + 4, 1)
+
+    if count is None:
+        return None
+
+    return ([None] if separate_default else []) + durations
+
+
+def webp_durations(f):
+    """
+    Reads the duration of each frame of an animated WebP from its ANMF chunks, skipping over the
+    image data itself.  Returns `None` if the WebP isn't animated.
+    """
+    header = f.read(12)
+
+    if len(header) < 12 or header[:4] != b'RIFF' or header[8:12] != b'WEBP':
+        raise ValueError("Not a WebP")
+
+    durations = []
+
+    while True:
+        chunk = f.read(8)
+
+        if len(chunk) < 8:
+            break
+
+        kind, length = struct.unpack('<4sI', chunk)
+
+        # frame position and size (3 bytes each), then the duration, also 3 bytes
+        if kind == b'ANMF':
+            data = f.read(16)
+            durations.append(struct.unpack('<I', data[12:15] + b'\x00')[0])
+            length -= len(data)
+
+        # chunks are padded to an even length
+        f.seek(length + (length & 1), 1)
+
+    return durations or None
+
+
+HEADER_READERS = {
+    'GIF': gif_durations,
+    'PNG': png_durations,
+    'WEBP': webp_durations,
+}
+
+
+def _read_headers(image):
+    reader = HEADER_READERS.get(image.format)
+    f = getattr(image, 'fp', None)
+
+    if reader is None or f is None:
+        return None
+
+    position = f.tell()
+
+    try:
+        f.seek(0)
+        return reader(f)
+    except Exception:
+        return None
+    finally:
+        f.seek(position)
+
+
+def frame_details(image):
+    """
+    Returns a list of the duration (in milliseconds, or `None` if the format doesn't have one) of
+    each frame of an image.  For GIFs, animated PNGs and animated WebPs this is read straight from the headers of
+    each frame without decoding any of them; for other formats (like TIFF, where moving to a page
+    only reads its directory) each frame is seeked to in turn, and the image is left at its first
+    frame.
+    """
+    durations = _read_headers(image)
+
+    if durations is not None and (len(durations) or image.format != 'GIF'):
+        return durations
+
+    count = frame_count(image)
+
+    if count == 1:
+        return [image.info.get('duration')]
+
+    durations = []
+
+    try:
+        for index in range(count):
+            image.seek(index)
+            durations.append(image.info.get('duration'))
+    finally:
+        image.seek(0)
+
+    return durations
+
+
+def iter_frames(image, frames=None):
+    """
+    A generator that seeks to each of the given frame indices of an image in turn (or all of them)
+    and yields each index along with a copy of that frame and its duration.  Frames are only
+    decoded as they are reached.
+    """
+    count = frame_count(image)
+
+    if frames is None:
+        frames = range(count)
+
+    for index in frames:
+        index = int(index)
+
+        if not 0 <= index < count:
+            raise ValueError("Image does not have a frame {} (it has {})".format(index, count))
+
+        image.seek(index)
+
+        yield index, image.copy(), image.info.get('duration')
+
+
+def thumbnail(frame):
+    # frames are compared in color, so that ones differing only in color aren't taken to be the same
+    return numpy.asarray(
+        flatten(frame).convert('RGB').resize(THUMBNAIL_SIZE, Image.BILINEAR),
+        dtype=numpy.int16
+    )
+
+
+class FrameFilter(object):
+    """
+    Iterates over (index, frame, duration) tuples, skipping frames that look the same as the last
+    frame that was not skipped.  The frames that were skipped are recorded in *duplicates*, mapping
+    each skipped index to the index of the frame it was the same as, and the duration of every frame
+    seen is recorded in *durations*.
+    """
+
+    def __init__(self, frames, tolerance=1.0):
+        self.frames = frames
+        self.tolerance = tolerance
+        self.duplicates = {}
+        self.durations = {}
+
+    def __iter__(self):
+        previous = None
+        previous_index = None
+
+        for index, frame, duration in self.frames:
+            current = thumbnail(frame)
+            self.durations[index] = duration
+
+            # each pixel differs by as much as its most different component
+            if previous is not None and numpy.abs(current - previous).max(axis=2).mean() <= self.tolerance:
+                self.duplicates[index] = previous_index
+                continue
+
+            previous = current
+            previous_index = index
+
+            yield index, frame, duration
@@ -0,0 +1,85 @@
+from __future__ import absolute_import
+from collections import OrderedDict
+from webfriend.images import lazy, loading
+
+Image = lazy.module('PIL.Image')
+
+
+class HarvestedImage(object):
+    """
+    The data of an image retrieved from a page by `image::harvest`, which is only decoded when
+    it is first used.  These can be passed as the *file* argument of the other image commands
+    (which cache the decoded image like any other loaded from the page), and behave like a
+    read-only file containing the encoded image data otherwise.
+    """
+
+    def __init__(self, url, resource_id, body, element=None, occurrences=1):
+        self.url = url
+        self.resource_id = resource_id
+        self.body = body
+        self.element = element
+        self.occurrences = occurrences
+        self._stream = None
+        self._image = None
+
+    @property
+    def name(self):
+        return self.url
+
+    @property
+    def cache_key(self):
+        return ('resource', self.resource_id, self.url)
+
+    def open(self):
+        """
+        Returns a new file-like object for reading the encoded image data.
+        """
+        return loading.open_bytes(self.body)
+
+    @property
+    def image(self):
+        """
+        The image, having only had its headers read until its pixel data is needed.
+        """
+        if self._image is None:
+            self._image = Image.open(self.open())
+
+        return self._image
+
+    def _file(self):
+        if self._stream is None:
+            self._stream = self.open()
+
+        return self._stream
+
+    def read(self, size=-1):
+        return self._file().read(size)
+
+    def seek(self, offset, whence=0):
+        return self._file().seek(offset, whence)
+
+    def tell(self):
+        return self._file().tell()
+
+    def __len__(self):
+        return len(self.body)
+
+    def __repr__(self):
+        return 'HarvestedImage({!r}, {} bytes)'.format(self.url, len(self.body))
+
+    def to_json(self):
+        out = OrderedDict()
+        out['url'] = self.url
+        out['bytes'] = len(self.body)
+        out['occurrences'] = self.occurrences
+
+        try:
+            out['format'] = self.image.format
+            out['width'] = self.image.width
+            out['height'] = self.image.height
+        except Exception:
+            out['format'] = None
+            out['width'] = None
+            out['height'] = None
+
+        return out
@@ -0,0 +1,220 @@
+from __future__ import absolute_import
+from webfriend.images import lazy
+from webfriend.images.preprocess import greyscale
+import json
+import math
+import os
+import threading
+
+Image = lazy.module('PIL.Image')
+numpy = lazy.module('numpy')
+
+# the size that images are reduced to (when decoding) ahead of hashing, which is plenty for
+# every method while keeping the decode cheap
+DECODE_SIZE = (128, 128)
+
+
+def bits_to_int(bits):
+    value = 0
+
+    for bit in bits:
+        value = (value << 1) | int(bool(bit))
+
+    return value
+
+
+def average_hash(image, size=8):
+    """
+    Hashes an image by shrinking it to size x size and recording whether each pixel is brighter
+    than the average.
+    """
+    data = numpy.asarray(greyscale(image).resize((size, size), Image.BICUBIC), dtype=numpy.float64)
+
+    return bits_to_int((data > data.mean()).ravel())
+
+
+def difference_hash(image, size=8):
+    """
+    Hashes an image by shrinking it to (size + 1) x size and recording whether each pixel is
+    brighter than the one to its right.
+    """
+    data = numpy.asarray(greyscale(image).resize((size + 1, size), Image.BICUBIC), dtype=numpy.float64)
+
+    return bits_to_int((data[:, :-1] > data[:, 1:]).ravel())
+
+
+def dct_matrix(n):
+    k = numpy.arange(n)[:, numpy.newaxis]
+    i = numpy.arange(n)[numpy.newaxis, :]
+
+    return numpy.cos(math.pi * (2 * i + 1) * k / (2.0 * n))
+
+
+def perceptual_hash(image, size=8, factor=4):
+    """
+    Hashes an image by taking the discrete cosine transform of a (size * factor) square copy of it
+    and recording whether each of the size x size lowest frequencies is above their median.  This
+    is the most robust of the methods to scaling, compression, and small edits.
+    """
+    n = size * factor
+    data = numpy.asarray(greyscale(image).resize((n, n), Image.BICUBIC), dtype=numpy.float64)
+    dct = dct_matrix(n)
+    frequencies = dct.dot(data).dot(dct.T)[:size, :size]
+
+    # the first coefficient is the average brightness, which says nothing about the content
+    median = numpy.median(frequencies.ravel()[1:])
+
+    return bits_to_int((frequencies > median).ravel())
+
+
+METHODS = {
+    'ahash': average_hash,
+    'dhash': difference_hash,
+    'phash': perceptual_hash,
+}
+
+
+def image_hash(image, method='phash'):
+    """
+    Returns the 64-bit perceptual hash of an image using the named method.
+    """
+    try:
+        return METHODS[method](image)
+    except KeyError:
+        raise ValueError("Unrecognized hash method '{}'".format(method))
+
+
+def hamming(a, b):
+    """
+    Returns the number of bits that differ between two hashes.
+    """
+    return bin(a ^ b).count('1')
+
+
+class BKTree(object):
+    """
+    A BK-tree of hashes, which finds every hash within a given Hamming distance of another without
+    comparing against all of them.  Each node's children are keyed by their distance from it, so
+    by the triangle inequality only the children whose key is within the search distance of the
+    node's own distance from the query need to be visited.
+    """
+
+    def __init__(self):
+        self.root = None
+        self.size = 0
+
+    def __len__(self):
+        return self.size
+
+    def add(self, value, item):
+        """
+        Adds an item under the given hash.  Items with identical hashes share a node.
+        """
+        self.size += 1
+
+        if self.root is None:
+            self.root = (value, [item], {})
+            return
+
+        node = self.root
+
+        while True:
+            distance = hamming(value, node[0])
+
+            if distance == 0:
+                node[1].append(item)
+                return
+
+            child = node[2].get(distance)
+
+            if child is None:
+                node[2][distance] = (value, [item], {})
+                return
+
+            node = child
+
+    def search(self, value, distance):
+        """
+        Returns a list of (distance, hash, items) for each hash within the given distance of value,
+        closest first.
+        """
+        found = []
+        pending = ([self.root] if self.root is not None else [])
+
+        while pending:
+            node = pending.pop()
+            d = hamming(value, node[0])
+
+            if d <= distance:
+                found.append((d, node[0], list(node[1])))
+
+            for key, child in node[2].items():
+                if d - distance <= key <= d + distance:
+                    pending.append(child)
+
+        found.sort(key=lambda match: (match[0], match[1]))
+
+        return found
+
+
+class HashIndex(object):
+    """
+    An index of the perceptual hashes of images that have been seen, optionally persisted to a
+    file.  Hashes made with different methods aren't comparable, so each method has its own tree.
+    The file is a log of JSON objects (one per line) that is appended to as hashes are added and
+    read back in full when the index is opened.
+    """
+
+    def __init__(self, path=None):
+        self.path = path
+        self._trees = {}
+        self._lock = threading.RLock()
+
+        if path and os.path.exists(path):
+            self._load()
+
+    def _tree(self, method):
+        if method not in self._trees:
+            self._trees[method] = BKTree()
+
+        return self._trees[method]
+
+    def _load(self):
+        with open(self.path) as f:
+            for line in f:
+                line = line.strip()
+
+                if line:
+                    entry = json.loads(line)
+                    self._tree(entry['method']).add(int(entry['hash'], 16), entry.get('label'))
+
+    def add(self, value, method='phash', label=None):
+        with self._lock:
+            self._tree(method).add(value, label)
+
+            if self.path:
+                with open(self.path, 'a') as f:
+                    f.write(json.dumps({
+                        'method': method,
+                        'hash':   format_hash(value),
+                        'label':  label,
+                    }) + '\n')
+
+    def search(self, value, method='phash', distance=4):
+        with self._lock:
+            return self._tree(method).search(value, distance)
+
+    def clear(self):
+        with self._lock:
+            self._trees = {}
+
+            if self.path and os.path.exists(self.path):
+                os.remove(self.path)
+
+    def stats(self):
+        with self._lock:
+            return dict([(method, len(tree)) for method, tree in self._trees.items()])
+
+
+def format_hash(value):
+    return '{:016x}'.format(value)
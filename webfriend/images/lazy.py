@@ -0,0 +1,50 @@
+from __future__ import absolute_import
+import importlib
+import threading
+
+
+class LazyModule(object):
+    """
+    Stands in for a module that is only imported when one of its attributes is first used.  The
+    image commands depend on several packages (PIL, numpy, pyocr) that take a noticeable amount of
+    time to import, which every webfriend process would otherwise pay for when loading its command
+    sets, whether or not it ever works with an image.
+    """
+
+    def __init__(self, name):
+        self._lazy_name = name
+        self._lazy_module = None
+        self._lazy_lock = threading.Lock()
+
+    def _load(self):
+        if self._lazy_module is None:
+            with self._lazy_lock:
+                if self._lazy_module is None:
+                    self._lazy_module = importlib.import_module(self._lazy_name)
+
+        return self._lazy_module
+
+    @property
+    def loaded(self):
+        return (self._lazy_module is not None)
+
+    def __getattr__(self, attr):
+        # only reached for attributes not set in __init__, so the module itself is never needed to
+        # look up the proxy's own state
+        if attr.startswith('_lazy_'):
+            raise AttributeError(attr)
+
+        return getattr(self._load(), attr)
+
+    def __dir__(self):
+        return dir(self._load())
+
+    def __repr__(self):
+        return '<lazy module {!r}{}>'.format(self._lazy_name, (' (loaded)' if self.loaded else ''))
+
+
+def module(name):
+    """
+    Returns a stand-in for the named module that imports it on first use.
+    """
+    return LazyModule(name)
@@ -0,0 +1,121 @@
+from __future__ import absolute_import
+from webfriend.images import lazy
+import io
+import logging
+import mmap
+import tempfile
+
+Image = lazy.module('PIL.Image')
+
+# the tag pointing to the Exif sub-IFD, which holds the tags describing how a photo was taken
+EXIF_IFD = 0x8769
+
+
+def open_bytes(body, spill_size=None):
+    """
+    Returns a file-like object for reading image data from the given bytes without copying them.
+    Bodies larger than spill_size bytes are written out to an (anonymous) temporary file and read
+    back through a memory map instead, so that the data can be paged out rather than held in memory
+    while the image is in use.
+    """
+    if spill_size is not None and len(body) > spill_size:
+        with tempfile.TemporaryFile() as spill:
+            spill.write(body)
+            spill.flush()
+
+            return mmap.mmap(spill.fileno(), 0, access=mmap.ACCESS_READ)
+
+    # BytesIO shares the buffer of the bytes it is initialized with until it is written to
+    return io.BytesIO(body)
+
+
+def open_file(path):
+    """
+    Returns a read-only memory map of the given file for reading image data from.
+    """
+    with open(path, 'rb') as f:
+        try:
+            return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        # empty files cannot be mapped (and will fail to open as images anyway)
+        except (ValueError, mmap.error):
+            return io.BytesIO(f.read())
+
+
+def is_decoded(image):
+    """
+    Returns whether the pixel data of the given image has been decoded yet.  Images returned from
+    `Image.open` only have their headers read until they are first loaded.
+    """
+    return not getattr(image, 'tile', None)
+
+
+def header_exif(image):
+    """
+    Returns a `dict` of the EXIF tags (including those of the Exif sub-IFD) that were read along
+    with the headers of an image, or `None` if there aren't any.  Unlike `Image.getexif()`, which
+    loads PNG images in search of EXIF data stored after the pixel data, this never decodes the
+    image.
+    """
+    if not image.info.get('exif'):
+        return None
+
+    # the base implementation only parses the EXIF data that was read while opening the image
+    exif = Image.Image.getexif(image)
+    tags = dict(exif)
+
+    if EXIF_IFD in exif and hasattr(exif, 'get_ifd'):
+        tags.update(exif.get_ifd(EXIF_IFD))
+
+    return (tags or None)
+
+
+def scaled_size(original, scale=None, size=None):
+    """
+    Returns the dimensions an image of the *original* (width, height) should be reduced to, either
+    by a *scale* factor or to fit within a maximum (width, height) *size* while preserving its
+    aspect ratio.
+    """
+    width, height = original
+
+    if size is not None:
+        scale = min(
+            float(size[0]) / width,
+            float(size[1]) / height,
+        )
+
+    return (max(1, int(width * scale)), max(1, int(height * scale)))
+
+
+def decode_reduced(image, size):
+    """
+    Decodes an opened (but not yet loaded) image directly at a reduced size, avoiding the time and
+    memory it takes to decode at full resolution and then shrink it.  JPEG images are decoded at
+    the nearest DCT scale (1/2, 1/4, or 1/8) at or above the target size, integer factors are
+    reduced by block averaging, and whatever scaling remains is done by resampling.
+    """
+    if is_decoded(image) or size[0] >= image.width or size[1] >= image.height:
+        return image.resize(size, resample=Image.BICUBIC)
+
+    original = image.size
+
+    # only has an effect on JPEG images, and only before they are loaded
+    image.draft(image.mode, size)
+    image.load()
+
+    factor = min(image.width // size[0], image.height // size[1])
+
+    if factor >= 2 and hasattr(image, 'reduce'):
+        image = image.reduce(factor)
+
+    if image.size != size:
+        image.thumbnail(size, Image.BICUBIC)
+
+    logging.debug('Decoded image ({} x {}) at ({} x {})'.format(
+        original[0],
+        original[1],
+        image.width,
+        image.height
+    ))
+
+    return image
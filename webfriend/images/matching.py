@@ -0,0 +1,290 @@
+from __future__ import absolute_import
+from webfriend.images import lazy
+from webfriend.images.preprocess import greyscale
+
+numpy = lazy.module('numpy')
+
+# needles are not shrunk below this many pixels on their shortest side when building the image
+# pyramid, since very small needles match too much of the haystack to be useful
+MIN_NEEDLE_SIZE = 8
+
+# the most times the images are halved; any further, and the fine detail of busy images (like
+# text) is lost to aliasing, so that a needle lying half of a reduced pixel off of the grid stops
+# looking like its own reduced copy while plenty of lookalikes still do
+MAX_LEVEL = 1
+
+# how much lower the score of a match can be at the coarsest level of the pyramid than the
+# threshold it has to meet at full resolution, since shrinking blurs away detail (needles made of
+# nothing but fine detail, like noise, can score half as well when they lie at an odd offset)
+COARSE_MARGIN = 0.5
+
+# how many of the best candidate positions found on the smallest images are refined on the larger
+# ones: at least MAX_CANDIDATES, or as many as it takes to compare about REFINE_PIXELS pixels of
+# the needle at each offset searched (so that small needles, which have the most lookalikes, get
+# the most candidates)
+MAX_CANDIDATES = 32
+REFINE_PIXELS = 524288
+
+# windows of the haystack whose brightness varies by less than this (as a standard deviation) are
+# treated as a solid color, which nothing but another solid color looks like
+MIN_DEVIATION = 0.5
+
+# how far (in pixels, at each level of the pyramid) around the position a candidate was found at
+# on the level above is searched when refining it, which allows for the shift in position that
+# averaging pixels together can cause
+REFINE_MARGIN = 4
+
+
+def greyscale_array(image):
+    """
+    Returns the brightness of each pixel of an image as a (height, width) array of 32-bit floats.
+    Transparent areas are treated as white.
+    """
+    return numpy.asarray(greyscale(image), dtype=numpy.float32)
+
+
+# the weights of the (separable) blur applied before halving an image
+BLUR_KERNEL = (1 / 16.0, 4 / 16.0, 6 / 16.0, 4 / 16.0, 1 / 16.0)
+
+
+def shrink(data):
+    """
+    Halves the dimensions of a (height, width) array by blurring it and keeping every other value.
+    Blurring (rather than just averaging each 2x2 block) keeps a needle that lies at an odd offset
+    in the haystack looking like its own reduced copy, where thin details like text would
+    otherwise be averaged differently in the two.
+    """
+    reach = len(BLUR_KERNEL) // 2
+    height, width = data.shape
+    padded = numpy.pad(data, reach, mode='edge')
+
+    # only the values that are kept need to be blurred, which is a quarter of them
+    columns = sum(weight * padded[:, i:i + width:2] for i, weight in enumerate(BLUR_KERNEL))
+
+    return sum(weight * columns[i:i + height:2, :] for i, weight in enumerate(BLUR_KERNEL))
+
+
+def fast_size(n):
+    """
+    Returns the smallest number at least as large as n whose only prime factors are 2, 3, and 5,
+    which FFTs of that length are much faster for.
+    """
+    best = 2 ** int(numpy.ceil(numpy.log2(max(n, 1))))
+    fives = 1
+
+    while fives < best:
+        threes = fives
+
+        while threes < best:
+            size = threes
+
+            while size < n:
+                size *= 2
+
+            best = min(best, size)
+            threes *= 3
+
+        fives *= 5
+
+    return best
+
+
+def window_sums(data, height, width):
+    """
+    Returns the sum of every (height, width) window of a 2D array (or of each of a stack of them),
+    using a summed-area table.
+    """
+    table = numpy.zeros(data.shape[:-2] + (data.shape[-2] + 1, data.shape[-1] + 1))
+    table[..., 1:, 1:] = data.cumsum(axis=-2, dtype=numpy.float64).cumsum(axis=-1)
+
+    below = table[..., height:, width:] - table[..., height:, :-width]
+    above = table[..., :-height, width:] - table[..., :-height, :-width]
+
+    return below - above
+
+
+def centered_template(needle):
+    """
+    Returns the needle with its mean brightness taken out, and the norm of the result.
+    """
+    template = needle - needle.mean(dtype=numpy.float64)
+    template_norm = numpy.sqrt((template ** 2).sum(dtype=numpy.float64))
+
+    if template_norm == 0:
+        raise ValueError("The image to find is a single solid color")
+
+    return template, template_norm
+
+
+def normalize(correlation, data, template_norm, height, width):
+    """
+    Turns the correlation of a mean-centered template of the given size with every window of data
+    into normalized scores between -1 and 1.
+    """
+    sums = window_sums(data, height, width)
+    squares = window_sums(data ** 2, height, width)
+    variance = numpy.maximum(squares - (sums ** 2) / (height * width), 0)
+
+    # windows that are (all but) a solid color don't look like anything, and the rounding error of
+    # their tiny variance would otherwise make their scores meaningless
+    scores = numpy.zeros(correlation.shape)
+    nonzero = variance > (height * width) * (MIN_DEVIATION ** 2)
+    scores[nonzero] = correlation[nonzero] / (numpy.sqrt(variance[nonzero]) * template_norm)
+
+    return numpy.clip(scores, -1.0, 1.0)
+
+
+def ncc(haystack, needle):
+    """
+    Computes the normalized cross-correlation of a needle with every position it fits at in a
+    haystack (both 2D arrays of floats), using FFTs performed at the precision of the haystack.
+    Returns a (H - h + 1, W - w + 1) array of scores between -1 and 1, where 1 is an exact match
+    (up to brightness and contrast.)
+    """
+    h, w = needle.shape
+    H, W = haystack.shape
+    template, template_norm = centered_template(needle)
+    shape = (fast_size(H + h - 1), fast_size(W + w - 1))
+
+    # the scores don't depend on the overall brightness of the haystack, and taking it out keeps
+    # the rounding error of lower precision FFTs small
+    haystack = haystack - haystack.dtype.type(haystack.mean(dtype=numpy.float64))
+
+    # correlation is convolution with the template flipped in both directions
+    correlation = numpy.fft.irfft2(
+        numpy.fft.rfft2(haystack, shape) * numpy.fft.rfft2(template[::-1, ::-1].astype(haystack.dtype), shape),
+        shape
+    )[h - 1:H, w - 1:W]
+
+    return normalize(correlation, haystack, template_norm, h, w)
+
+
+def local_maxima(scores, threshold, limit=None):
+    """
+    Returns the (y, x, score) positions of (up to limit of) the highest scores at or above
+    threshold that are at least as high as the scores of all eight of their neighbors, highest
+    first.
+    """
+    padded = numpy.pad(scores, 1, mode='constant', constant_values=-numpy.inf)
+    height, width = scores.shape
+    mask = scores >= threshold
+
+    for dy in (0, 1, 2):
+        for dx in (0, 1, 2):
+            if dy != 1 or dx != 1:
+                mask &= scores >= padded[dy:dy + height, dx:dx + width]
+
+    ys, xs = numpy.nonzero(mask)
+    values = scores[ys, xs]
+
+    if limit is not None and len(values) > limit:
+        keep = numpy.argpartition(-values, limit)[:limit]
+        ys, xs, values = ys[keep], xs[keep], values[keep]
+
+    order = numpy.lexsort((xs, ys, -values))
+
+    return [(int(ys[i]), int(xs[i]), float(values[i])) for i in order]
+
+
+def refine(haystack, needle, positions, margin):
+    """
+    Searches within margin pixels of each of the given (y, x) positions in a haystack for where
+    the needle scores best, at full precision.  Returns the distinct (y, x, score) positions found,
+    highest scoring first.
+    """
+    if not len(positions):
+        return []
+
+    h, w = needle.shape
+    H, W = haystack.shape
+    span_y = min(2 * margin + 1, H - h + 1)
+    span_x = min(2 * margin + 1, W - w + 1)
+    template, template_norm = centered_template(needle.astype(numpy.float64))
+
+    tops = numpy.clip([y - margin for y, _ in positions], 0, H - h - span_y + 1)
+    lefts = numpy.clip([x - margin for _, x in positions], 0, W - w - span_x + 1)
+    windows = numpy.array([
+        haystack[top:top + span_y + h - 1, left:left + span_x + w - 1] for top, left in zip(tops, lefts)
+    ], dtype=numpy.float64)
+    windows -= windows.mean(axis=(1, 2), keepdims=True)
+
+    # the windows are small enough that correlating each offset directly beats using FFTs
+    correlation = numpy.empty((len(windows), span_y, span_x))
+
+    for dy in range(span_y):
+        for dx in range(span_x):
+            correlation[:, dy, dx] = numpy.tensordot(windows[:, dy:dy + h, dx:dx + w], template, axes=2)
+
+    scores = normalize(correlation, windows, template_norm, h, w).reshape(len(windows), -1)
+    best = scores.argmax(axis=1)
+    found = {}
+
+    for top, left, offset, score in zip(tops, lefts, best, scores[numpy.arange(len(windows)), best]):
+        dy, dx = divmod(int(offset), span_x)
+        found[(int(top) + dy, int(left) + dx)] = float(score)
+
+    return sorted([(y, x, score) for (y, x), score in found.items()], key=lambda c: (-c[2], c[0], c[1]))
+
+
+def match(haystack, needle, threshold=0.8, limit=10):
+    """
+    Finds where the needle image appears in the haystack image.  Both images are searched in
+    greyscale, first at a reduced size (halving both images up to MAX_LEVEL times, or until the
+    needle is about to become too small to be distinctive) to find candidate positions cheaply.
+    The best of those candidates are then refined at each larger size in turn by searching only the
+    immediate neighborhood of each, so the whole haystack is only ever searched at its smallest
+    size.  Needles that are too small to shrink at all are searched for at full resolution.
+
+    Returns a list of up to limit (left, top, score) matches scoring at least threshold, best
+    first.
+    """
+    haystacks = [greyscale_array(haystack)]
+    needles = [greyscale_array(needle)]
+
+    if needles[0].shape[0] > haystacks[0].shape[0] or needles[0].shape[1] > haystacks[0].shape[1]:
+        return []
+
+    while len(needles) <= MAX_LEVEL and min(needles[-1].shape) // 2 >= MIN_NEEDLE_SIZE:
+        haystacks.append(shrink(haystacks[-1]))
+        needles.append(shrink(needles[-1]))
+
+    level = len(needles) - 1
+    count = max(MAX_CANDIDATES, 2 * limit, REFINE_PIXELS // needles[0].size)
+
+    # scores from the search of the whole haystack are less precise than the final ones (and far
+    # less so when they come from reduced images), so candidates are allowed to fall a little short
+    candidates = local_maxima(
+        ncc(haystacks[level], needles[level]),
+        threshold - (COARSE_MARGIN if level else 0.01),
+        count
+    )
+
+    # settle the final scores at full precision
+    if level == 0:
+        candidates = refine(haystacks[0], needles[0], [(y, x) for y, x, _ in candidates], 0)
+
+    while level > 0:
+        level -= 1
+        candidates = refine(
+            haystacks[level],
+            needles[level],
+            [(2 * y, 2 * x) for y, x, _ in candidates],
+            REFINE_MARGIN
+        )[:count]
+
+    radius = (max(1, needles[0].shape[0] // 2), max(1, needles[0].shape[1] // 2))
+    matches = []
+
+    for y, x, score in candidates:
+        if score < threshold:
+            break
+
+        if any(abs(y - my) < radius[0] and abs(x - mx) < radius[1] for mx, my, _ in matches):
+            continue
+
+        matches.append((x, y, score))
+
+        if len(matches) >= limit:
+            break
+
+    return matches
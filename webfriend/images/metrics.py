@@ -0,0 +1,199 @@
+from __future__ import absolute_import
+from collections import OrderedDict
+from contextlib import contextmanager
+import json
+import logging
+import threading
+import time
+
+_local = threading.local()
+_exporters = []
+_exporters_lock = threading.Lock()
+
+
+class Timings(object):
+    """
+    Records how long each stage of a command took, along with any other values (image dimensions,
+    byte counts, cache hits) that help explain it.  Stages are timed exclusively: time spent in a
+    stage nested inside of another is only counted towards the inner one, so the stages of a
+    command never add up to more than its total duration.
+    """
+
+    def __init__(self, command):
+        self.command = command
+        self.stages = OrderedDict()
+        self.values = OrderedDict()
+        self.started = time.time()
+        self.duration = None
+        self._stack = []
+
+    @contextmanager
+    def stage(self, name):
+        # [started, time spent in nested stages]
+        frame = [time.time(), 0.0]
+        self._stack.append(frame)
+
+        try:
+            yield
+        finally:
+            self._stack.pop()
+            elapsed = time.time() - frame[0]
+
+            self.stages[name] = self.stages.get(name, 0.0) + elapsed - frame[1]
+
+            if self._stack:
+                self._stack[-1][1] += elapsed
+
+    def set(self, name, value):
+        self.values[name] = value
+
+    def count(self, name, amount=1):
+        self.values[name] = self.values.get(name, 0) + amount
+
+    def finish(self):
+        self.duration = time.time() - self.started
+
+    def to_dict(self):
+        out = OrderedDict()
+        out['command'] = self.command
+        out['duration'] = self.duration
+        out['stages'] = OrderedDict(self.stages)
+        out['values'] = OrderedDict(self.values)
+        return out
+
+    def to_json(self):
+        return self.to_dict()
+
+
+class NullTimings(object):
+    """
+    Stands in for Timings when nothing is being recorded.
+    """
+
+    @contextmanager
+    def stage(self, name):
+        yield
+
+    def set(self, name, value):
+        pass
+
+    def count(self, name, amount=1):
+        pass
+
+
+NULL = NullTimings()
+
+
+def current():
+    """
+    Returns the Timings being recorded by the current thread, or a stand-in that discards
+    everything if there are none.
+    """
+    return (getattr(_local, 'timings', None) or NULL)
+
+
+def last():
+    """
+    Returns the Timings most recently recorded by the current thread, or `None`.
+    """
+    return getattr(_local, 'last', None)
+
+
+@contextmanager
+def recording(command):
+    """
+    Records the timings of everything done within this context as those of the given command,
+    passing them to each of the registered exporters at the end.  When already recording (e.g.:
+    one command calling another), everything is recorded as part of the outer command.
+    """
+    timings = getattr(_local, 'timings', None)
+
+    if timings is not None:
+        yield timings
+        return
+
+    timings = Timings(command)
+    _local.timings = timings
+
+    try:
+        yield timings
+    finally:
+        _local.timings = None
+        _local.last = timings
+        timings.finish()
+        export(timings)
+
+
+def stage(name):
+    return current().stage(name)
+
+
+def record(name, value):
+    current().set(name, value)
+
+
+def count(name, amount=1):
+    current().count(name, amount)
+
+
+def add_exporter(exporter):
+    """
+    Registers a callable that will be called with the Timings of every command once it completes.
+    """
+    with _exporters_lock:
+        if exporter not in _exporters:
+            _exporters.append(exporter)
+
+
+def remove_exporter(exporter):
+    with _exporters_lock:
+        if exporter in _exporters:
+            _exporters.remove(exporter)
+
+
+def export(timings):
+    with _exporters_lock:
+        exporters = list(_exporters)
+
+    for exporter in exporters:
+        try:
+            exporter(timings)
+        except Exception as e:
+            logging.warning('Failed to export timings: {}'.format(e))
+
+
+def log_exporter(timings):
+    """
+    Writes timings to the log.
+    """
+    logging.info('{} took {:.3f}s: {}'.format(
+        timings.command,
+        timings.duration,
+        json.dumps(timings.to_dict())
+    ))
+
+
+class JsonLinesExporter(object):
+    """
+    Appends timings to a file, one JSON object per line.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def __call__(self, timings):
+        line = json.dumps(timings.to_dict())
+
+        with self._lock:
+            with open(self.path, 'a') as f:
+                f.write(line + '\n')
+
+    def __eq__(self, other):
+        return isinstance(other, JsonLinesExporter) and other.path == self.path
+
+    def __ne__(self, other):
+        return not self.__eq__(other)
+
+    def __hash__(self):
+        return hash(self.path)
@@ -0,0 +1,115 @@
+from __future__ import absolute_import
+from webfriend.images import lazy
+import logging
+import os
+import threading
+
+pyocr = lazy.module('pyocr')
+
+
+class OcrToolRegistry(object):
+    """
+    Discovers which OCR tools are installed and which languages each of them supports under each
+    of the candidate data paths.  Discovery runs each tool (often as a subprocess) once per data
+    path, so it is performed lazily on first use and the results are kept for the lifetime of the
+    process.
+    """
+
+    def __init__(self, env_paths):
+        self.env_paths = env_paths
+        self._tools = None
+        self._engines = None
+        self._lock = threading.Lock()
+
+    @property
+    def tools(self):
+        self.resolve()
+        return self._tools
+
+    @property
+    def engines(self):
+        self.resolve()
+        return self._engines
+
+    def environments(self):
+        for env, values in sorted(self.env_paths.items()):
+            for value in values:
+                yield {env: value}
+
+    def resolve(self):
+        if self._engines is not None:
+            return
+
+        with self._lock:
+            if self._engines is not None:
+                return
+
+            tools = pyocr.get_available_tools()
+            engines = []
+
+            for tool in tools:
+                for env in self.environments():
+                    os.environ.update(env)
+
+                    try:
+                        languages = tool.get_available_languages()
+                    except Exception as e:
+                        logging.debug('OCR tool {} is unusable with {}: {}'.format(tool.get_name(), env, e))
+                        continue
+
+                    logging.debug('OCR tool {} with {} supports languages: {}'.format(
+                        tool.get_name(),
+                        env,
+                        ', '.join(languages)
+                    ))
+
+                    engines.append((tool, env, languages))
+
+            self._tools = tools
+            self._engines = engines
+
+    def invalidate(self):
+        with self._lock:
+            self._tools = None
+            self._engines = None
+
+    def find(self, language):
+        """
+        Returns a list of (tool, environment) pairs capable of recognizing the given language, in
+        order of preference.
+        """
+        return [
+            (tool, env) for tool, env, languages in self.engines if language in languages
+        ]
+
+    def languages(self):
+        out = set()
+
+        for _, _, languages in self.engines:
+            out.update(languages)
+
+        return sorted(out)
+
+
+_registries = {}
+_registries_lock = threading.Lock()
+
+
+def get_registry(env_paths):
+    """
+    Returns the process-wide tool registry for the given set of candidate data paths.
+    """
+    key = tuple(sorted((env, tuple(values)) for env, values in env_paths.items()))
+
+    with _registries_lock:
+        if key not in _registries:
+            _registries[key] = OcrToolRegistry(env_paths)
+
+        return _registries[key]
+
+
+def is_libtesseract(tool):
+    """
+    Returns whether the given pyocr tool is the in-process Tesseract C library binding.
+    """
+    return getattr(tool, '__name__', None) == 'pyocr.libtesseract'
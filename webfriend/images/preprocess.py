@@ -0,0 +1,222 @@
+from __future__ import absolute_import
+from webfriend.images import lazy
+import logging
+
+Image = lazy.module('PIL.Image')
+ImageFilter = lazy.module('PIL.ImageFilter')
+ImageOps = lazy.module('PIL.ImageOps')
+numpy = lazy.module('numpy')
+
+
+def flatten(image):
+    """
+    Composites any transparency in an image onto white (so that transparent backgrounds don't turn
+    black when it is dropped), returning an RGB image.  Images without transparency are returned
+    as they are.
+    """
+    if image.mode in ('RGBA', 'LA', 'PA') or (image.mode == 'P' and 'transparency' in image.info):
+        image = image.convert('RGBA')
+        background = Image.new('RGBA', image.size, (255, 255, 255, 255))
+        image = Image.alpha_composite(background, image).convert('RGB')
+
+    return image
+
+
+def greyscale(image):
+    """
+    Reduces an image to a single 8-bit channel, flattening any transparency onto white first.
+    """
+    if image.mode == 'L':
+        return image
+
+    return flatten(image).convert('L')
+
+
+def autocontrast(image):
+    """
+    Stretches the range of values in the image to use the full range available.
+    """
+    if image.mode not in ('L', 'RGB'):
+        image = image.convert('RGB')
+
+    return ImageOps.autocontrast(image, cutoff=1)
+
+
+def otsu_level(histogram):
+    """
+    Returns the threshold that best separates a 256-bin histogram into two classes (Otsu's method.)
+    """
+    total = sum(histogram)
+    weighted_total = sum(i * count for i, count in enumerate(histogram))
+
+    best_level = 0
+    best_variance = 0.0
+    background = 0
+    weighted_background = 0.0
+
+    for level, count in enumerate(histogram):
+        background += count
+
+        if background == 0:
+            continue
+
+        foreground = total - background
+
+        if foreground == 0:
+            break
+
+        weighted_background += level * count
+
+        mean_background = weighted_background / background
+        mean_foreground = (weighted_total - weighted_background) / foreground
+        variance = background * foreground * (mean_background - mean_foreground) ** 2
+
+        if variance > best_variance:
+            best_variance = variance
+            best_level = level
+
+    return best_level
+
+
+def threshold(image):
+    """
+    Binarizes the image into black and white using Otsu's method to pick the threshold.
+    """
+    image = greyscale(image)
+    level = otsu_level(image.histogram())
+
+    return image.point([(0 if i <= level else 255) for i in range(256)])
+
+
+def denoise(image):
+    """
+    Removes speckles from the image with a 3x3 median filter.
+    """
+    if image.mode == 'P':
+        image = image.convert('RGB')
+
+    return image.filter(ImageFilter.MedianFilter(3))
+
+
+def skew_angle(image, max_angle=5.0, step=0.5, sample_size=800):
+    """
+    Estimates how many degrees the text in an image is rotated by, by finding the rotation under
+    which rows of text line up best (i.e.: the horizontal projection of the dark pixels varies the
+    most.)
+    """
+    sample = greyscale(image).copy()
+    sample.thumbnail((sample_size, sample_size))
+
+    ink = numpy.asarray(sample) <= otsu_level(sample.histogram())
+
+    # assume the text is whichever of dark or light pixels is less common
+    if ink.mean() > 0.5:
+        ink = ~ink
+
+    ink = Image.fromarray(ink.astype(numpy.uint8) * 255)
+    best_angle = 0.0
+    best_score = None
+
+    for angle in numpy.arange(-max_angle, max_angle + step, step):
+        profile = numpy.asarray(ink.rotate(angle, resample=Image.NEAREST, expand=True), dtype=numpy.float64)
+        profile = profile.sum(axis=1)
+        score = numpy.sum(numpy.diff(profile) ** 2)
+
+        if best_score is None or score > best_score:
+            best_score = score
+            best_angle = float(angle)
+
+    return best_angle
+
+
+def deskew(image):
+    """
+    Rotates the image so that its lines of text are horizontal.
+    """
+    angle = skew_angle(image)
+
+    if angle == 0:
+        return image
+
+    logging.debug('Rotating image by {} degrees to correct skew'.format(angle))
+
+    if image.mode not in ('L', 'RGB', 'RGBA'):
+        image = image.convert('RGB')
+
+    fill = (255 if image.mode == 'L' else tuple([255] * len(image.getbands())))
+
+    return image.rotate(angle, resample=Image.BICUBIC, expand=True, fillcolor=fill)
+
+
+# Preprocessing steps, in the order they are run.
+#
+# tuple format: function, placement
+#
+# Placement determines where a step runs relative to rescaling the image:
+#   first:    always before rescaling (steps that make the image cheaper to rescale)
+#   smallest: before or after rescaling, whichever has fewer pixels to process
+#   last:     always after rescaling (steps whose output rescaling would undo)
+#
+STEPS = [
+    ('greyscale',    (greyscale,    'first')),
+    ('autocontrast', (autocontrast, 'smallest')),
+    ('denoise',      (denoise,      'smallest')),
+    ('deskew',       (deskew,       'smallest')),
+    ('threshold',    (threshold,    'last')),
+]
+
+
+def register_step(name, function, placement='smallest', before=None):
+    """
+    Adds a preprocessing step (or replaces the existing step of the same name.)  Steps run in the
+    order they were registered, unless *before* names an existing step to insert this one ahead of.
+    """
+    if placement not in ('first', 'smallest', 'last'):
+        raise ValueError("Unrecognized placement '{}'".format(placement))
+
+    unregister_step(name)
+
+    index = len(STEPS)
+
+    if before is not None:
+        index = [n for n, _ in STEPS].index(before)
+
+    STEPS.insert(index, (name, (function, placement)))
+
+
+def unregister_step(name):
+    STEPS[:] = [(n, step) for n, step in STEPS if n != name]
+
+
+def run(image, steps=None, rescale=None, shrinking=False):
+    """
+    Runs the named preprocessing steps and the given rescale function over an image, in pipeline
+    order rather than the order they were named in.  *rescale* takes an image and returns a tuple
+    of the rescaled image and the factor it was scaled by, and *shrinking* says whether it will make
+    the image smaller.  Returns a tuple of the processed image and the factor it was scaled by.
+    """
+    steps = set(steps or [])
+    known = set(name for name, _ in STEPS)
+
+    if steps - known:
+        raise ValueError("Unrecognized preprocessing step(s): {}".format(', '.join(sorted(steps - known))))
+
+    selected = [(name, function, placement) for name, (function, placement) in STEPS if name in steps]
+    factor = 1.0
+
+    for name, function, placement in selected:
+        if placement == 'first':
+            image = function(image)
+
+    for name, function, placement in selected:
+        if placement == 'smallest' and not shrinking:
+            image = function(image)
+
+    if rescale is not None:
+        image, factor = rescale(image)
+
+    for name, function, placement in selected:
+        if placement == 'smallest' and shrinking or placement == 'last':
+            image = function(image)
+
+    return image, factor
@@ -0,0 +1,136 @@
+from __future__ import absolute_import
+from collections import OrderedDict
+import hashlib
+import logging
+import os
+import pickle
+import sqlite3
+import threading
+import time
+
+
+class OcrResultCache(object):
+    """
+    A persistent store of OCR results, addressed by a hash of the decoded pixel data of the image
+    that was processed and of the options it was processed with.  Entries are evicted when they
+    are older than *max_age* seconds, or (least recently used first) when the total size of the
+    stored results exceeds *max_bytes*.
+    """
+
+    def __init__(self, path, max_bytes=268435456, max_age=None):
+        self.path = os.path.expanduser(path)
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(self.path)
+
+        if directory and not os.path.isdir(directory):
+            os.makedirs(directory)
+
+        self._db = sqlite3.connect(self.path, check_same_thread=False)
+        self._db.execute(
+            'CREATE TABLE IF NOT EXISTS results ('
+            '  key      TEXT PRIMARY KEY,'
+            '  value    BLOB NOT NULL,'
+            '  size     INTEGER NOT NULL,'
+            '  created  REAL NOT NULL,'
+            '  accessed REAL NOT NULL'
+            ')'
+        )
+        self._db.execute('CREATE INDEX IF NOT EXISTS results_accessed ON results (accessed)')
+        self._db.commit()
+
+    @classmethod
+    def key(cls, image, **options):
+        digest = hashlib.sha1()
+        digest.update('{}:{}x{}:'.format(image.mode, image.width, image.height).encode('UTF-8'))
+        digest.update(image.tobytes())
+
+        for name, value in sorted(options.items()):
+            digest.update('{}={!r};'.format(name, value).encode('UTF-8'))
+
+        return digest.hexdigest()
+
+    def get(self, key):
+        """
+        Returns a (hit, value) tuple for the given key.
+        """
+        with self._lock:
+            row = self._db.execute('SELECT value, created FROM results WHERE key = ?', (key,)).fetchone()
+
+            if row is not None and self.max_age is not None and row[1] < time.time() - self.max_age:
+                self._db.execute('DELETE FROM results WHERE key = ?', (key,))
+                self._db.commit()
+                row = None
+
+            if row is None:
+                self.misses += 1
+                return False, None
+
+            self._db.execute('UPDATE results SET accessed = ? WHERE key = ?', (time.time(), key))
+            self._db.commit()
+            self.hits += 1
+
+        return True, pickle.loads(bytes(row[0]))
+
+    def put(self, key, value):
+        data = pickle.dumps(value, 2)
+        now = time.time()
+
+        with self._lock:
+            self._db.execute(
+                'INSERT OR REPLACE INTO results (key, value, size, created, accessed) VALUES (?, ?, ?, ?, ?)',
+                (key, sqlite3.Binary(data), len(data), now, now)
+            )
+            self._evict()
+            self._db.commit()
+
+    def _evict(self):
+        if self.max_age is not None:
+            self._db.execute('DELETE FROM results WHERE created < ?', (time.time() - self.max_age,))
+
+        if self.max_bytes is not None:
+            total = self._db.execute('SELECT COALESCE(SUM(size), 0) FROM results').fetchone()[0]
+
+            if total > self.max_bytes:
+                evicted = 0
+
+                for key, size in self._db.execute(
+                    'SELECT key, size FROM results ORDER BY accessed ASC'
+                ).fetchall():
+                    if total <= self.max_bytes:
+                        break
+
+                    self._db.execute('DELETE FROM results WHERE key = ?', (key,))
+                    total -= size
+                    evicted += 1
+
+                logging.debug('Evicted {} OCR results from {}'.format(evicted, self.path))
+
+    def clear(self):
+        with self._lock:
+            self._db.execute('DELETE FROM results')
+            self._db.commit()
+
+    def stats(self):
+        with self._lock:
+            entries, size = self._db.execute(
+                'SELECT COUNT(*), COALESCE(SUM(size), 0) FROM results'
+            ).fetchone()
+
+        stats = OrderedDict()
+        stats['path']      = self.path
+        stats['entries']   = entries
+        stats['bytes']     = size
+        stats['max_bytes'] = self.max_bytes
+        stats['max_age']   = self.max_age
+        stats['hits']      = self.hits
+        stats['misses']    = self.misses
+        return stats
+
+    def close(self):
+        with self._lock:
+            self._db.close()
@@ -0,0 +1,119 @@
+from __future__ import absolute_import
+from webfriend.images.boxes import BoxList
+
+
+def tile_boxes(width, height, tile_size, overlap=0):
+    """
+    Returns a list of (tile, core) pairs describing tiles that cover an image of the given
+    dimensions, in row-major order.  Both are (left, top, right, bottom) boxes: *tile* is the area
+    to process, which shares a band at least *overlap* pixels wide with each neighboring tile so
+    that anything straddling the edge of one tile appears whole in its neighbor; *core* is the part
+    of the tile that it alone is responsible for (up to the middle of each overlap.)  The cores of
+    all tiles partition the image.
+
+    The overlap is only needed between tiles, so it is ignored along a dimension that one tile
+    covers entirely, and is otherwise limited to less than the size of the tiles (which may be
+    smaller than requested for small images.)
+    """
+    if isinstance(tile_size, (list, tuple)):
+        tile_w, tile_h = [int(v) for v in tile_size]
+    else:
+        tile_w = tile_h = int(tile_size)
+
+    tile_w = min(tile_w, width)
+    tile_h = min(tile_h, height)
+    overlap = int(overlap)
+
+    if overlap < 0:
+        raise ValueError("Tile overlap cannot be negative")
+
+    overlap_w = _clamp_overlap(overlap, width, tile_w)
+    overlap_h = _clamp_overlap(overlap, height, tile_h)
+    boxes = []
+
+    for top, bottom, core_top, core_bottom in _spans(height, tile_h, overlap_h):
+        for left, right, core_left, core_right in _spans(width, tile_w, overlap_w):
+            boxes.append((
+                (left, top, right, bottom),
+                (core_left, core_top, core_right, core_bottom),
+            ))
+
+    return boxes
+
+
+def _clamp_overlap(overlap, length, size):
+    if size >= length:
+        return 0
+
+    return min(overlap, size - 1)
+
+
+def _spans(length, size, overlap):
+    starts = [0]
+
+    while starts[-1] + size < length:
+        starts.append(min(starts[-1] + size - overlap, length - size))
+
+    spans = []
+
+    for i, start in enumerate(starts):
+        end = start + size
+        core_start = 0
+        core_end = length
+
+        if i > 0:
+            core_start = (start + starts[i - 1] + size) / 2.0
+
+        if i < len(starts) - 1:
+            core_end = (starts[i + 1] + end) / 2.0
+
+        spans.append((start, end, core_start, core_end))
+
+    return spans
+
+
+def center(item):
+    bounding = item['bounding']
+
+    return (
+        (bounding['start']['x'] + bounding['end']['x']) / 2.0,
+        (bounding['start']['y'] + bounding['end']['y']) / 2.0,
+    )
+
+
+def merge_tiles(results):
+    """
+    Merges the box results of OCR'ing each tile (given as a list of (core, items) pairs, with
+    item coordinates already translated into those of the whole image.)  Items are only kept from
+    the tile whose core contains their center, which removes the duplicates detected in the
+    overlap between tiles.
+    """
+    merged = []
+    boxlists = []
+
+    for core, items in results:
+        left, top, right, bottom = core
+
+        if isinstance(items, BoxList):
+            boxlists.append(items.take([
+                i for i, (x, y) in enumerate(items.centers())
+                if left <= x < right and top <= y < bottom
+            ]))
+            continue
+
+        for item in (items or []):
+            x, y = center(item)
+
+            if left <= x < right and top <= y < bottom:
+                merged.append(item)
+
+    # keep compact box results compact unless some tiles produced plain items
+    if not merged:
+        return BoxList.concatenate(boxlists).sorted()
+
+    for boxes in boxlists:
+        merged.extend(boxes)
+
+    merged.sort(key=lambda item: (item['bounding']['start']['y'], item['bounding']['start']['x']))
+
+    return merged
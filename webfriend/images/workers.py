@@ -0,0 +1,192 @@
+from __future__ import absolute_import
+from webfriend.images import lazy
+from webfriend.images.preprocess import flatten
+import atexit
+import logging
+import multiprocessing
+import os
+import signal
+import threading
+
+Image = lazy.module('PIL.Image')
+
+# Per-process state of OCR workers: loaded Tesseract instances, keyed on (data path, language)
+_handles = {}
+_worker = False
+
+
+def _initialize_worker():
+    global _worker
+    _worker = True
+
+    # let the parent process decide what to do about Ctrl-C
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+
+def in_worker():
+    """
+    Returns whether the current process is one of the OCR worker processes.
+    """
+    return _worker
+
+
+def _get_handle(language, env):
+    from pyocr.libtesseract import tesseract_raw
+
+    tessdata = env.get('TESSDATA_PREFIX')
+    key = (tessdata, language)
+
+    if key not in _handles:
+        os.environ.update(env)
+
+        if tessdata:
+            tesseract_raw.TESSDATA_PREFIX = tessdata
+
+        logging.debug('Loading OCR model for language {} in worker {}'.format(language, os.getpid()))
+        _handles[key] = tesseract_raw.init(lang=language)
+
+    return _handles[key]
+
+
+def _box(box):
+    return ((box[0], box[1]), (box[2], box[3]))
+
+
+def recognize_with_handle(handle, image, builder):
+    """
+    Performs character recognition on the given image using an already-initialized Tesseract
+    instance, feeding the results into the given pyocr builder.  This mirrors what
+    `pyocr.libtesseract.image_to_string` does, minus loading and unloading the language model.
+    """
+    from pyocr.libtesseract import tesseract_raw
+
+    lvl_line = tesseract_raw.PageIteratorLevel.TEXTLINE
+    lvl_word = tesseract_raw.PageIteratorLevel.WORD
+
+    tesseract_raw.set_page_seg_mode(handle, builder.tesseract_layout)
+    tesseract_raw.set_debug_file(handle, os.devnull)
+    tesseract_raw.set_image(handle, image)
+    tesseract_raw.set_is_numeric(handle, ('digits' in builder.tesseract_configs))
+    tesseract_raw.recognize(handle)
+
+    res_iterator = tesseract_raw.get_iterator(handle)
+
+    if res_iterator is None:
+        return builder.get_output()
+
+    page_iterator = tesseract_raw.result_iterator_get_page_iterator(res_iterator)
+
+    while True:
+        if tesseract_raw.page_iterator_is_at_beginning_of(page_iterator, lvl_line):
+            _, box = tesseract_raw.page_iterator_bounding_box(page_iterator, lvl_line)
+            builder.start_line(_box(box))
+
+        last_word_in_line = tesseract_raw.page_iterator_is_at_final_element(
+            page_iterator,
+            lvl_line,
+            lvl_word
+        )
+
+        word = tesseract_raw.result_iterator_get_utf8_text(res_iterator, lvl_word)
+        confidence = tesseract_raw.result_iterator_get_confidence(res_iterator, lvl_word)
+
+        if word is not None and confidence is not None and word != '':
+            _, box = tesseract_raw.page_iterator_bounding_box(page_iterator, lvl_word)
+            builder.add_word(word, _box(box), confidence)
+
+            if last_word_in_line:
+                builder.end_line()
+
+        if not tesseract_raw.page_iterator_next(page_iterator, lvl_word):
+            break
+
+    return builder.get_output()
+
+
+def pack_image(image):
+    """
+    Converts an image into a compact, picklable form for sending to a worker process.  Any
+    transparency is flattened onto white, as it is when an image is reduced to greyscale.
+    """
+    if image.mode not in ('1', 'L', 'RGB'):
+        image = flatten(image).convert('RGB')
+
+    return (image.mode, image.size, image.tobytes())
+
+
+def unpack_image(packed):
+    mode, size, data = packed
+    return Image.frombytes(mode, size, data)
+
+
+def ocr_task(packed, language, builder, env):
+    """
+    Runs in a worker process: recognizes the text in a packed image using a Tesseract instance
+    that stays loaded for the lifetime of the worker.
+    """
+    image = unpack_image(packed)
+    return recognize_with_handle(_get_handle(language, env), image, builder)
+
+
+def recognize(image, language, builder, env=None, processes=None):
+    """
+    Recognizes the text in an image using a persistent Tesseract instance: directly when called
+    from within a worker process, or by handing the image off to the worker pool otherwise.
+    """
+    if _worker:
+        return recognize_with_handle(_get_handle(language, (env or {})), image, builder)
+
+    return get_pool(processes).recognize(image, language, builder, env=env)
+
+
+class OcrWorkerPool(object):
+    """
+    A pool of long-lived worker processes, each of which keeps one Tesseract instance loaded per
+    language so that the (considerable) cost of loading language models is paid once per worker
+    rather than once per image.
+    """
+
+    def __init__(self, processes=None):
+        self.processes = (processes or multiprocessing.cpu_count())
+        self._pool = multiprocessing.Pool(
+            processes=self.processes,
+            initializer=_initialize_worker
+        )
+
+    def submit(self, func, *args):
+        return self._pool.apply_async(func, args)
+
+    def recognize(self, image, language, builder, env=None):
+        return self.submit(ocr_task, pack_image(image), language, builder, (env or {})).get()
+
+    def close(self):
+        self._pool.terminate()
+        self._pool.join()
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool(processes=None):
+    """
+    Returns the process-wide OCR worker pool, starting it if necessary.
+    """
+    global _pool
+
+    with _pool_lock:
+        if _pool is None:
+            _pool = OcrWorkerPool(processes=processes)
+            logging.debug('Started {} OCR worker processes'.format(_pool.processes))
+
+        return _pool
+
+
+@atexit.register
+def shutdown_pool():
+    global _pool
+
+    with _pool_lock:
+        if _pool is not None:
+            _pool.close()
+            _pool = None
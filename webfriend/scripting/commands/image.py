@@ -1,64 +1,386 @@
 from __future__ import absolute_import
 from webfriend.scripting.commands.base import CommandProxy
-from PIL import Image
-from PIL.ExifTags import TAGS
-import io
+from webfriend.images import arrays, backends, hashing, lazy, loading, matching, tiles, workers
+from webfriend.images import colors as palettes
+from webfriend.images import frames as multiframe
+from webfriend.images import metrics as timing
+from webfriend.images import preprocess as preprocessing
+from webfriend.images.boxes import BoxList
+from webfriend.images.cache import ImageCache
+from webfriend.images.harvest import HarvestedImage
+from webfriend.images.results import OcrResultCache
+import itertools
 import logging
+import multiprocessing
 import os
-import pyocr
-import pyocr.builders
-from collections import OrderedDict
-from unidecode import unidecode
+import time
+from collections import OrderedDict, deque
 
+# these take a while to import, so they are only imported once an image command needs them
+Image = lazy.module('PIL.Image')
+ExifTags = lazy.module('PIL.ExifTags')
+numpy = lazy.module('numpy')
+pyocr = lazy.module('pyocr')
+unidecode = lazy.module('unidecode')
 
-def bbox2properties(bbox, rescale_factor=1.0):
+try:
+    basestring
+except NameError:
+    basestring = str
+
+
+def bbox2properties(bbox, rescale_factor=1.0, offset=(0, 0)):
     dest = OrderedDict()
     dest['bounding'] = OrderedDict()
     dest['bounding']['start'] = OrderedDict()
-    dest['bounding']['start']['x'] = int(bbox[0][0] / rescale_factor)
-    dest['bounding']['start']['y'] = int(bbox[0][1] / rescale_factor)
+    dest['bounding']['start']['x'] = int(bbox[0][0] / rescale_factor) + offset[0]
+    dest['bounding']['start']['y'] = int(bbox[0][1] / rescale_factor) + offset[1]
     dest['bounding']['end'] = OrderedDict()
-    dest['bounding']['end']['x'] = int(bbox[1][0] / rescale_factor)
-    dest['bounding']['end']['y'] = int(bbox[1][1] / rescale_factor)
+    dest['bounding']['end']['x'] = int(bbox[1][0] / rescale_factor) + offset[0]
+    dest['bounding']['end']['y'] = int(bbox[1][1] / rescale_factor) + offset[1]
     dest['width'] = dest['bounding']['end']['x'] - dest['bounding']['start']['x']
     dest['height'] = dest['bounding']['end']['y'] - dest['bounding']['start']['y']
     return dest
 
 
-def postprocess_lines_boxes(list_of_lineboxen, text_handler=None, rescale_factor=1.0, **kwargs):
+def postprocess_lines_boxes(list_of_lineboxen, text_handler=None, rescale_factor=1.0, offset=(0, 0), **kwargs):
     out = []
 
     for linebox in list_of_lineboxen:
         line = OrderedDict()
         logging.debug(linebox.position)
-        line.update(bbox2properties(linebox.position, rescale_factor=rescale_factor))
+        line.update(bbox2properties(linebox.position, rescale_factor=rescale_factor, offset=offset))
 
-        line['words']  = postprocess_boxes(linebox.word_boxes, rescale_factor=rescale_factor)
+        line['words']  = postprocess_boxes(
+            linebox.word_boxes,
+            text_handler=text_handler,
+            rescale_factor=rescale_factor,
+            offset=offset
+        )
 
         out.append(line)
 
     return out
 
 
-def postprocess_boxes(list_of_boxen, text_handler=None, rescale_factor=1.0, **kwargs):
+def postprocess_boxes(list_of_boxen, text_handler=None, rescale_factor=1.0, offset=(0, 0), **kwargs):
     if not len(list_of_boxen):
         return None
 
-    out = []
+    return BoxList.from_boxes(
+        list_of_boxen,
+        text_handler=text_handler,
+        rescale_factor=rescale_factor,
+        offset=offset
+    )
 
-    for box in list_of_boxen:
-        text = box.content
 
-        if text_handler:
-            text = text_handler(text)
+# the height of the bands that images are cut into when streaming OCR results, unless a tile_size
+# is given
+STREAM_BAND_HEIGHT = 1000
 
-        word = OrderedDict()
-        word['text']   = box.content
-        word.update(bbox2properties(box.position, rescale_factor=rescale_factor))
+TILED_OUTPUT_FORMATS = {
+    'raw':     'lines',
+    'numeric': 'numeric-words',
+}
 
-        out.append(word)
 
-    return out
+def output_format_builder(output_format):
+    """
+    Returns the OCR result builder and postprocessing function used to produce the given
+    output_format.
+    """
+    postprocess = passthrough
+
+    # Text Builders
+    # -------------
+    if output_format == 'raw':
+        builder = pyocr.builders.TextBuilder()
+
+    elif output_format == 'numeric':
+        builder = pyocr.builders.DigitBuilder()
+
+    elif output_format == 'numeric-words':
+        builder = pyocr.builders.DigitLineBoxBuilder()
+        postprocess = postprocess_boxes
+
+    elif output_format == 'words':
+        builder = pyocr.builders.WordBoxBuilder()
+        postprocess = postprocess_boxes
+
+    elif output_format == 'lines':
+        builder = pyocr.builders.LineBoxBuilder()
+        postprocess = postprocess_boxes
+
+    elif output_format == 'lines-words':
+        builder = pyocr.builders.LineBoxBuilder()
+        postprocess = postprocess_lines_boxes
+
+    elif output_format == 'characters':
+        builder = pyocr.tesseract.CharBoxBuilder()
+        postprocess = postprocess_boxes
+
+    else:
+        raise ValueError("Unrecognized output_format '{}'".format(
+            output_format
+        ))
+
+    return builder, postprocess
+
+
+def ocr_rescale_factor(width, rescale_factor=2.0, rescale_width_threshold=4160):
+    """
+    Returns the factor an image of the given width will actually be rescaled by ahead of OCR
+    processing.
+    """
+    # Tesseract will have a much better time with larger images, so as a safety margin we're
+    # going to double the size of any input image that's narrower than rescale_width_threshold.
+    #
+    # Unless we're trying to make the image smaller, in which case rescale_width_threshold is
+    # interpreted to mean "maximum size".
+    #
+    if rescale_factor < 1.0 and width > rescale_width_threshold or \
+       rescale_factor > 1.0 and width < rescale_width_threshold:
+        return rescale_factor
+
+    return 1.0
+
+
+def rescale_for_ocr(image, rescale_factor=2.0, rescale_width_threshold=4160):
+    """
+    Resizes an image ahead of OCR processing.  Returns the (possibly) resized image and the factor
+    that was actually applied to it.
+    """
+    rescale_factor = ocr_rescale_factor(image.width, rescale_factor, rescale_width_threshold)
+
+    if rescale_factor != 1.0:
+        size = (int(image.width * rescale_factor), int(image.height * rescale_factor))
+
+        logging.debug('Resizing image ({} x {}) {}x to ({} x {})'.format(
+            image.width,
+            image.height,
+            rescale_factor,
+            size[0],
+            size[1]
+        ))
+
+        with timing.stage('rescale'):
+            image = image.resize(size, resample=Image.BICUBIC)
+
+        timing.record('rescaled_size', list(size))
+
+        return image, rescale_factor
+
+    return image, 1.0
+
+
+def prepare_for_ocr(image, rescale_factor=2.0, rescale_width_threshold=4160, preprocess=None):
+    """
+    Runs the given preprocessing steps and rescales an image ahead of OCR processing.  Returns the
+    prepared image and the factor it was rescaled by.
+    """
+    # transparency is flattened onto white here rather than being left to each OCR tool, so that
+    # images recognized in this process and those sent to the OCR workers get the same input
+    image = preprocessing.flatten(image)
+
+    if not preprocess:
+        return rescale_for_ocr(image, rescale_factor, rescale_width_threshold)
+
+    with timing.stage('preprocess'):
+        return preprocessing.run(
+            image,
+            preprocess,
+            rescale=lambda i: rescale_for_ocr(i, rescale_factor, rescale_width_threshold),
+            shrinking=(ocr_rescale_factor(image.width, rescale_factor, rescale_width_threshold) < 1.0)
+        )
+
+
+def recognize_text(
+    image,
+    language='eng',
+    output_format='raw',
+    text_to_ascii=True,
+    rescale_factor=1.0,
+    env_paths=None,
+    engine=None,
+    processes=None,
+    offset=(0, 0)
+):
+    """
+    Performs character recognition on an (already rescaled) image using the named OCR backend (see
+    `webfriend.images.backends`) and returns the postprocessed result for the given output_format,
+    or `None` if no OCR tool could process it.  Boxes in the result are scaled back by
+    rescale_factor and then translated by offset.
+    """
+    with timing.stage('discovery'):
+        backend = backends.resolve(engine, output_format)
+        engines = backend.engines(language, (env_paths or ImageProxy.pyocr_env_paths))
+
+    builder, postprocess = output_format_builder(output_format)
+    text_handler = None
+
+    if text_to_ascii:
+        text_handler = text_asciify
+
+    for tool, env in engines:
+        os.environ.update(env)
+
+        try:
+            logging.debug('Performing character recognition on input image')
+
+            with timing.stage('recognize'):
+                result = backend.recognize(tool, env, image, language, builder, processes=processes)
+
+            timing.record('ocr_tool', tool.get_name())
+
+            with timing.stage('postprocess'):
+                return postprocess(
+                    result,
+                    text_handler=text_handler,
+                    rescale_factor=rescale_factor,
+                    offset=offset
+                )
+
+        except Exception as e:
+            logging.warning('OCR using {} failed: {}'.format(tool.get_name(), e))
+            continue
+
+    return None
+
+
+def extract_text_task(source, options):
+    """
+    Decodes, rescales, and performs OCR on a single image.  This is run inside of the OCR worker
+    processes by `image::extract_text_batch` and `image::extract_text_async`, where *source* is
+    either `('data', bytes)` holding an encoded image or `('file', path)` naming a local file.  If
+    the options include a *region* box, only that part of the image is processed.
+    """
+    kind, source = source
+
+    if kind == 'data':
+        source = loading.open_bytes(source)
+    else:
+        source = loading.open_file(source)
+
+    image = Image.open(source)
+    region = options.pop('region', None)
+
+    if region is not None:
+        image = image.crop(region)
+        options['offset'] = (region[0], region[1])
+
+    image, rescale_factor = prepare_for_ocr(
+        image,
+        options.pop('rescale_factor'),
+        options.pop('rescale_width_threshold'),
+        options.pop('preprocess', None)
+    )
+
+    return recognize_text(image, rescale_factor=rescale_factor, **options)
+
+
+def extract_text_tile_task(packed, options):
+    """
+    Rescales and performs OCR on one tile of a larger image.  This is run inside of the OCR worker
+    processes by `recognize_tiled()`.
+    """
+    image, rescale_factor = prepare_for_ocr(
+        workers.unpack_image(packed),
+        options.pop('rescale_factor'),
+        options.pop('rescale_width_threshold'),
+        options.pop('preprocess', None)
+    )
+
+    return recognize_text(image, rescale_factor=rescale_factor, **options)
+
+
+def submit_tiles(image, tile_size, tile_overlap, tile_format, pool, offset, options):
+    """
+    Submits each tile of an image to the OCR worker pool as it is iterated over, yielding the
+    tile's core (in the coordinates of the whole image) and the pending result.
+    """
+    for tile, core in tiles.tile_boxes(image.width, image.height, tile_size, tile_overlap):
+        tile_options = dict(options)
+        tile_options['output_format'] = tile_format
+        tile_options['offset'] = (tile[0] + offset[0], tile[1] + offset[1])
+        core = (core[0] + offset[0], core[1] + offset[1], core[2] + offset[0], core[3] + offset[1])
+
+        yield core, pool.submit(
+            extract_text_tile_task,
+            workers.pack_image(image.crop(tile)),
+            tile_options
+        )
+
+
+def recognize_tiled(
+    image,
+    tile_size,
+    tile_overlap=100,
+    output_format='raw',
+    processes=None,
+    offset=(0, 0),
+    **options
+):
+    """
+    Performs OCR on an image by cutting it into overlapping tiles, recognizing the tiles in
+    parallel in the OCR worker pool, and merging the results back together.  Boxes are reported in
+    the coordinates of the whole image (translated by offset), and those detected twice in the
+    overlap between two tiles are only reported once.
+    """
+    # text-only formats are recognized as boxes so that the overlaps can be deduplicated
+    tile_format = TILED_OUTPUT_FORMATS.get(output_format, output_format)
+    pool = workers.get_pool(processes)
+    jobs = list(submit_tiles(image, tile_size, tile_overlap, tile_format, pool, offset, options))
+
+    logging.debug('Performing character recognition on {} tiles'.format(len(jobs)))
+    timing.record('tiles', len(jobs))
+
+    with timing.stage('recognize'):
+        results = [(core, job.get()) for core, job in jobs]
+
+    with timing.stage('postprocess'):
+        merged = tiles.merge_tiles(results)
+
+    if not len(merged):
+        return None
+
+    if tile_format != output_format:
+        return '\n'.join([item['text'] for item in merged])
+
+    return merged
+
+
+def stream_tiled(
+    image,
+    tile_size,
+    tile_overlap=100,
+    output_format='lines',
+    processes=None,
+    offset=(0, 0),
+    **options
+):
+    """
+    A generator that performs OCR on an image tile by tile (see `recognize_tiled`), yielding the
+    results of each tile in order as soon as it (and every tile before it) has been recognized.
+    Only as many tiles as there are OCR workers are in flight at a time, so a consumer that stops
+    early also stops the remaining tiles from being recognized.
+
+    For text-only formats, each detected line of text is yielded as a string.
+    """
+    tile_format = TILED_OUTPUT_FORMATS.get(output_format, output_format)
+    pool = workers.get_pool(processes)
+    jobs = submit_tiles(image, tile_size, tile_overlap, tile_format, pool, offset, options)
+    pending = deque(itertools.islice(jobs, pool.processes))
+
+    while pending:
+        core, job = pending.popleft()
+        pending.extend(itertools.islice(jobs, 1))
+
+        for item in tiles.merge_tiles([(core, job.get())]):
+            if tile_format != output_format:
+                yield item['text']
+            else:
+                yield item
 
 
 def passthrough(value, text_handler=None, **kwargs):
@@ -69,10 +391,13 @@ def passthrough(value, text_handler=None, **kwargs):
 
 
 def text_asciify(value):
-    if isinstance(value, str):
-        value = value.encode('UTF-8')
+    """
+    Transliterates text into its closest ASCII equivalent, returning a `str`.
+    """
+    if isinstance(value, bytes):
+        value = value.decode('UTF-8')
 
-    return unidecode(value).encode('UTF-8')
+    return str(unidecode.unidecode(value))
 
 
 class ImageProxy(CommandProxy):
@@ -105,6 +430,285 @@ class ImageProxy(CommandProxy):
         'F':     ('opaque32f',  'F',     32, 4294967296),
     }
 
+    # the maximum number of bytes of decoded pixel data to keep cached for each tab
+    image_cache_size = 67108864
+
+    # response bodies larger than this many bytes are spilled to a temporary file while loading
+    resource_spill_size = 16777216
+
+    # which OCR backend performs recognition (see webfriend.images.backends); when not set, this
+    # is taken from the WEBFRIEND_OCR_ENGINE environment variable, or is 'tool'
+    ocr_engine = None
+    ocr_workers = None
+
+    # where (and whether) OCR results are cached on disk, and how large or old they can get
+    ocr_cache_path = None
+    ocr_cache_size = 268435456
+    ocr_cache_age = None
+
+    # where (and whether) the perceptual hashes of images seen by image::seen are saved
+    hash_index_path = None
+
+    def __init__(self, *args, **kwargs):
+        super(ImageProxy, self).__init__(*args, **kwargs)
+        self._image_caches = {}
+        self._ocr_cache = None
+        self._metrics_exporter = None
+        self._jobs = OrderedDict()
+        self._job_ids = itertools.count(1)
+        self._hash_index = None
+
+    def _get_image_cache(self):
+        tab = self.tab
+        tab_id = tab.description.get('id', id(tab))
+
+        if tab_id not in self._image_caches:
+            cache = ImageCache(max_bytes=self.image_cache_size)
+
+            # decoded images are only valid for the page that loaded them, so drop everything
+            # whenever the tab navigates elsewhere
+            tab.page.on('frameNavigated', cache.clear)
+
+            self._image_caches[tab_id] = cache
+
+        return self._image_caches[tab_id]
+
+    def _get_ocr_cache(self):
+        if not self.ocr_cache_path:
+            return None
+
+        if self._ocr_cache is None or self._ocr_cache.path != os.path.expanduser(self.ocr_cache_path):
+            if self._ocr_cache is not None:
+                self._ocr_cache.close()
+
+            self._ocr_cache = OcrResultCache(
+                self.ocr_cache_path,
+                max_bytes=self.ocr_cache_size,
+                max_age=self.ocr_cache_age
+            )
+
+        return self._ocr_cache
+
+    def _get_hash_index(self):
+        path = (os.path.expanduser(self.hash_index_path) if self.hash_index_path else None)
+
+        if self._hash_index is None or self._hash_index.path != path:
+            self._hash_index = hashing.HashIndex(path)
+
+        return self._hash_index
+
+    def configure(
+        self,
+        cache_size=None,
+        ocr_engine=None,
+        ocr_workers=None,
+        ocr_cache=None,
+        ocr_cache_size=None,
+        ocr_cache_age=None,
+        spill_size=None,
+        metrics=None,
+        hash_index=None
+    ):
+        """
+        Configures the behavior of the image commands.
+
+        #### Arguments
+
+        - **cache_size** (`int`, optional):
+
+            The maximum number of bytes of decoded image data that will be kept in memory for each
+            tab.  Images that are opened repeatedly (e.g.: sampling many pixels from the same image)
+            are decoded once and served from this cache until the tab navigates to another page or
+            the image is evicted to make room for more recently used images.  A value of zero
+            disables caching.
+
+        - **ocr_engine** (`str`, optional):
+
+            How text extraction is performed.  Defaults to the value of the `WEBFRIEND_OCR_ENGINE`
+            environment variable, or *tool* if that isn't set.  Valid values include:
+
+            - *tool*:
+
+                Use the OCR tools detected by pyocr directly.  With the Tesseract command line tool,
+                this starts a new process (and loads the language model) for every image.
+
+            - *tesseract*:
+
+                Only use the Tesseract command line tool.
+
+            - *libtesseract*:
+
+                Only use the Tesseract C library, which runs in-process.
+
+            - *workers*:
+
+                Perform recognition in a pool of long-lived worker processes, each of which keeps
+                the language models it has used loaded between calls.  This requires the
+                Tesseract C library; other tools are used as before if it is not available.
+
+            - *stub*:
+
+                Don't perform any recognition, and instead report the text in the
+                `WEBFRIEND_OCR_STUB_TEXT` environment variable for every image.  This is useful for
+                testing scripts on hosts without any OCR tools installed.
+
+        - **ocr_workers** (`int`, optional):
+
+            The number of worker processes to start when **ocr_engine** is *workers*.  Defaults to
+            the number of CPU cores.  This only has an effect before the pool has been started.
+
+        - **ocr_cache** (`str`, optional):
+
+            The path of a file in which to cache the results of `image::extract_text`.  Results
+            are stored under a hash of the decoded image data and the options it was processed
+            with, so the same image is only processed once no matter which page or URL it was
+            loaded from.  An empty value disables the cache (the default.)
+
+        - **ocr_cache_size** (`int`, optional):
+
+            The maximum number of bytes of results to store in the OCR cache before the least
+            recently used results are evicted.
+
+        - **ocr_cache_age** (`int`, optional):
+
+            The maximum age (in seconds) of results in the OCR cache.
+
+        - **spill_size** (`int`, optional):
+
+            Images loaded from the network that are larger than this many bytes are written to a
+            temporary file and read from there rather than being kept in memory while they are
+            decoded.
+
+        - **metrics** (`str`, optional):
+
+            Where to send the timings recorded by every image command (see `image::timings`.)  A
+            value of *log* writes them to the log; any other value is the path of a file to append
+            them to, one JSON object per line.  An empty value stops sending them anywhere (the
+            default.)
+
+        - **hash_index** (`str`, optional):
+
+            The path of a file in which to save the images seen by `image::seen`, so that they are
+            remembered from one run to the next.  An empty value only remembers them in memory (the
+            default.)
+        """
+        if cache_size is not None:
+            self.image_cache_size = int(cache_size)
+
+            for cache in self._image_caches.values():
+                cache.shrink(self.image_cache_size)
+
+        if ocr_engine is not None:
+            self.ocr_engine = backends.get(ocr_engine).name
+
+        if ocr_workers is not None:
+            self.ocr_workers = int(ocr_workers)
+
+        if ocr_cache is not None:
+            self.ocr_cache_path = (ocr_cache or None)
+
+        if ocr_cache_size is not None:
+            self.ocr_cache_size = int(ocr_cache_size)
+
+        if ocr_cache_age is not None:
+            self.ocr_cache_age = int(ocr_cache_age)
+
+        if spill_size is not None:
+            self.resource_spill_size = int(spill_size)
+
+        if metrics is not None:
+            if self._metrics_exporter is not None:
+                timing.remove_exporter(self._metrics_exporter)
+                self._metrics_exporter = None
+
+            if metrics == 'log':
+                self._metrics_exporter = timing.log_exporter
+            elif metrics:
+                self._metrics_exporter = timing.JsonLinesExporter(metrics)
+
+            if self._metrics_exporter is not None:
+                timing.add_exporter(self._metrics_exporter)
+
+        if hash_index is not None:
+            self.hash_index_path = (hash_index or None)
+
+        if self._ocr_cache is not None:
+            self._ocr_cache.max_bytes = self.ocr_cache_size
+            self._ocr_cache.max_age = self.ocr_cache_age
+
+    def clear_cache(self, ocr=False, hashes=False):
+        """
+        Discards all decoded images that have been cached for the current tab.
+
+        #### Arguments
+
+        - **ocr** (`bool`):
+
+            Whether to also discard all results stored in the OCR cache.
+
+        - **hashes** (`bool`):
+
+            Whether to also forget all of the images seen by `image::seen`.
+        """
+        self._get_image_cache().clear()
+
+        if ocr and self._get_ocr_cache() is not None:
+            self._get_ocr_cache().clear()
+
+        if hashes:
+            self._get_hash_index().clear()
+
+    def cache_stats(self):
+        """
+        Retrieves statistics about the image and OCR result caches.
+
+        #### Returns
+        A `dict` with the keys *images* (describing the decoded image cache for the current tab)
+        and *ocr* (describing the OCR result cache, or `None` if it is disabled.)  Each contains
+        the number of *entries* and *bytes* stored, the number of cache *hits* and *misses*, and
+        the configured limits.  The key *hashes* contains the number of images seen by
+        `image::seen` for each hash method.
+        """
+        stats = OrderedDict()
+        stats['images'] = self._get_image_cache().stats()
+        stats['ocr'] = None
+
+        if self._get_ocr_cache() is not None:
+            stats['ocr'] = self._get_ocr_cache().stats()
+
+        stats['hashes'] = self._get_hash_index().stats()
+
+        return stats
+
+    def timings(self):
+        """
+        Retrieves a breakdown of where the time went during the most recent image command.
+
+        #### Returns
+        A `dict` with the *command* that was run, its total *duration* (in seconds), the time
+        spent in each of its *stages*, and other *values* describing the work it did; or `None` if
+        no command has been run yet.  Stages include:
+
+        - *lookup*: finding the image element and resource in the page
+        - *fetch*: retrieving the image data from the browser
+        - *decode*: decoding the image data
+        - *ocr_cache*: looking up and storing results in the OCR result cache
+        - *preprocess*: running preprocessing steps (other than rescaling)
+        - *rescale*: resizing the image for OCR
+        - *discovery*: finding the OCR tools and languages that are available
+        - *recognize*: running the OCR tool
+        - *postprocess*: converting the OCR results into those that are returned
+
+        Values include the original *size* and *rescaled_size* of the image, *bytes_fetched*, and
+        the number of cache hits and misses.
+        """
+        recorded = timing.last()
+
+        if recorded is None:
+            return None
+
+        return recorded.to_dict()
+
     def rgb2hex(self, r, g, b, a=None):
         """
         Converts an RGB[A] color value to hexadecimal.
@@ -124,7 +728,18 @@ class ImageProxy(CommandProxy):
         else:
             return '#{:02x}{:02x}{:02x}'.format(r, g, b)
 
-    def open(self, selector=None, url=None, file=None, attribute='src'):
+    def open(
+        self,
+        selector=None,
+        url=None,
+        file=None,
+        attribute='src',
+        cache=True,
+        region=None,
+        scale=None,
+        size=None,
+        frame=None
+    ):
         """
         Opens an image from a given local file, a file-like object, from a given URL, or from the
         image data referred to by the given HTML element.
@@ -152,17 +767,104 @@ class ImageProxy(CommandProxy):
             This is the attribute containing the image URL on the HTML element referred to by
             **selector**.
 
+        - **cache** (`bool`):
+
+            Whether to reuse a previously decoded copy of the same image (and to cache this one for
+            subsequent calls.)  Images loaded from file-like objects are never cached.
+
+        - **region** (`list`, `dict`, `str`, optional):
+
+            If specified, only this part of the image is returned.  Regions are given in image
+            coordinates as `[left, top, right, bottom]`, as a `dict` with the keys *x*, *y*,
+            *width*, and *height*, or as a `dict` containing a *bounding* box (like those returned
+            by `image::extract_text`.)  For images loaded by **selector**, the region may also be
+            the selector of another element on the page, in which case the area that element
+            covers on top of the image is used.
+
+        - **scale** (`float`, optional):
+
+            If specified, the image is shrunk by this factor.  Where the image format allows it,
+            the image is decoded directly at the reduced size, which is considerably faster and
+            uses far less memory than decoding the full image for very large images.
+
+        - **size** (`list`, optional):
+
+            If specified, the image is shrunk (preserving its aspect ratio) to fit within this
+            `[width, height]`, in the same way as **scale**.
+
+        - **frame** (`int`, optional):
+
+            For animated images (like GIFs) and multi-page images (like TIFFs), the index of the
+            frame (or page) to open, starting from 0 (the default.)
+
         #### Returns
-        A raw image object that can be manipulated and queried.
+        A raw image object that can be manipulated and queried.  Cached images are shared between
+        calls, so they should not be modified in place.
 
         #### Raises
         - `ValueError` if none of the options were supplied.
         """
-        image_resource = None
+        with timing.recording('open'):
+            reduce = (scale is not None or size is not None)
+
+            image, element = self._open(
+                selector=selector,
+                url=url,
+                file=file,
+                attribute=attribute,
+                cache=cache,
+                decode=(not reduce),
+                frame=frame
+            )
+
+            box = None
+
+            # regions are given in the coordinates of the full-size image, so resolve them first
+            if region is not None:
+                box = self._region_box(region, image, element)
+
+            if reduce:
+                width, height = image.size
+                image = loading.decode_reduced(image, loading.scaled_size(image.size, scale=scale, size=size))
+
+                if box is not None:
+                    scale_x = image.width / float(width)
+                    scale_y = image.height / float(height)
+
+                    box = (
+                        int(box[0] * scale_x),
+                        int(box[1] * scale_y),
+                        max(int(box[2] * scale_x), int(box[0] * scale_x) + 1),
+                        max(int(box[3] * scale_y), int(box[1] * scale_y) + 1),
+                    )
+
+            if box is not None:
+                image = image.crop(box)
+
+            return image
+
+    def _locate(self, selector=None, url=None, file=None, attribute='src'):
+        """
+        Works out where the data of an image comes from without retrieving it.  Returns a (label,
+        source, element, cache_key) tuple, where *source* is one of `('file', path)`, `('data',
+        bytes)`, `('stream', file-like object)`, or `('resource', resource)` for a response that
+        has yet to be fetched from the browser.
+        """
+        element = None
 
         if file:
-            image_resource = file
-        else:
+            # local files are cached for as long as they remain unchanged on disk
+            if isinstance(file, basestring):
+                stat = os.stat(file)
+                return file, ('file', file), None, ('file', os.path.abspath(file), stat.st_mtime, stat.st_size)
+
+            # harvested images are cached like any other image loaded from the page
+            if isinstance(file, HarvestedImage):
+                return file.url, ('data', file.body), None, file.cache_key
+
+            return getattr(file, 'name', None), ('stream', file), None, None
+
+        with timing.stage('lookup'):
             if selector:
                 elements = self.tab.dom.select_nodes(selector, wait_for_match=True)
                 element = self.tab.dom.ensure_unique_element(selector, elements)
@@ -175,16 +877,141 @@ class ImageProxy(CommandProxy):
 
             resource = self.tab.dom.get_resource(url=url)
 
-            if resource and resource.get('completed'):
-                image_resource = io.BytesIO()
-                image_resource.write(self.tab.network.get_response_body(resource['id']))
-                image_resource.seek(0)
-            else:
-                raise Exception("Failed to locate resource data for URL '{}'".format(url))
+        if not resource or not resource.get('completed'):
+            raise Exception("Failed to locate resource data for URL '{}'".format(url))
+
+        return url, ('resource', resource), element, ('resource', resource['id'], url)
+
+    def _fetch(self, resource):
+        with timing.stage('fetch'):
+            body = self.tab.network.get_response_body(resource['id'])
 
-        return Image.open(image_resource)
+        timing.count('bytes_fetched', len(body))
 
-    def info(self, selector=None, url=None, file=None, attribute='src'):
+        return body
+
+    def _read_source(self, source):
+        """
+        Returns a file-like object for reading the encoded data of an image from a source returned
+        by `_locate`.
+        """
+        kind, value = source
+
+        if kind == 'resource':
+            return loading.open_bytes(self._fetch(value), spill_size=self.resource_spill_size)
+        elif kind == 'data':
+            return loading.open_bytes(value, spill_size=self.resource_spill_size)
+        elif kind == 'file':
+            return loading.open_file(value)
+
+        return value
+
+    def _task_source(self, source):
+        """
+        Converts a source returned by `_locate` into the form `extract_text_task` takes, retrieving
+        the image data if it has to be sent to the worker processes.
+        """
+        kind, value = source
+
+        if kind == 'resource':
+            return ('data', self._fetch(value))
+        elif kind == 'stream':
+            return ('data', value.read())
+
+        return source
+
+    def _ocr_options(
+        self,
+        language='eng',
+        output_format='raw',
+        text_to_ascii=True,
+        rescale_factor=2.0,
+        rescale_width_threshold=4160,
+        preprocess=None
+    ):
+        """
+        Returns the options that OCR tasks run in the worker pool are given.
+        """
+        return {
+            'language':                language,
+            'output_format':           output_format,
+            'text_to_ascii':           text_to_ascii,
+            'rescale_factor':          rescale_factor,
+            'rescale_width_threshold': rescale_width_threshold,
+            'preprocess':              preprocess,
+            'env_paths':               self.pyocr_env_paths,
+            'engine':                  self.ocr_engine,
+        }
+
+    def _open(self, selector=None, url=None, file=None, attribute='src', cache=True, decode=True, frame=None):
+        _, source, element, cache_key = self._locate(selector=selector, url=url, file=file, attribute=attribute)
+
+        # frames other than the first are cached separately
+        if frame and cache_key is not None:
+            cache_key = cache_key + (('frame', int(frame)),)
+
+        if cache and cache_key is not None:
+            image = self._get_image_cache().get(cache_key)
+
+            if image is not None:
+                logging.debug('Using cached image {}'.format(cache_key))
+                timing.count('image_cache_hits')
+                timing.record('size', list(image.size))
+                return image, element
+
+            timing.count('image_cache_misses')
+
+        image_resource = self._read_source(source)
+
+        with timing.stage('decode'):
+            image = Image.open(image_resource)
+
+            if frame:
+                if not 0 <= int(frame) < multiframe.frame_count(image):
+                    raise ValueError("Image does not have a frame {} (it has {})".format(
+                        frame,
+                        multiframe.frame_count(image)
+                    ))
+
+                # copying decodes the frame, and keeps it from changing if the image is seeked again
+                image.seek(int(frame))
+                image = image.copy()
+
+            # only fully decoded images are cached; otherwise the image is returned having only had
+            # its headers read, leaving it up to the caller how (or whether) to decode the pixel data
+            if decode and cache and cache_key is not None:
+                image.load()
+                self._get_image_cache().put(cache_key, image)
+
+        timing.record('size', list(image.size))
+
+        return image, element
+
+    def _region_box(self, region, image, element=None):
+        # a selector refers to an element positioned over the image (or inside of its container),
+        # whose position relative to the image element is scaled up to the image's own dimensions
+        if isinstance(region, basestring):
+            if element is None:
+                raise ValueError("Regions can only be given as a selector for images loaded by selector")
+
+            elements = self.tab.dom.select_nodes(region, wait_for_match=True)
+            target = self.tab.dom.ensure_unique_element(region, elements)
+            outer = element.bounds
+            inner = target.bounds
+
+            scale_x = image.width / float(outer['width'])
+            scale_y = image.height / float(outer['height'])
+
+            region = [
+                (inner['left'] - outer['left']) * scale_x,
+                (inner['top'] - outer['top']) * scale_y,
+                (inner['left'] - outer['left'] + inner['width']) * scale_x,
+                (inner['top'] - outer['top'] + inner['height']) * scale_y,
+            ]
+
+        return arrays.parse_region(region, image.width, image.height)
+
+    def info(self, selector=None, url=None, file=None, attribute='src', frames=False):
         """
         Retrieves details about an image.
 
@@ -211,6 +1038,12 @@ class ImageProxy(CommandProxy):
             This is the attribute containing the image URL on the HTML element referred to by
             **selector**.
 
+        - **frames** (`bool`):
+
+            Whether to report the number and duration of the frames of animated images (like GIFs)
+            and the number of pages of multi-page images (like TIFFs.)  None of the frames are
+            decoded, but the headers of every frame have to be read, so it is off by default.
+
         #### Returns
         A `dict` containing image details.
 
@@ -241,57 +1074,76 @@ class ImageProxy(CommandProxy):
         - *exif* (`dict`, optional):
 
             If available, this will contain any EXIF data embedded in the image.
-        """
-        image = self.open(selector=selector, url=url, file=file, attribute=attribute)
 
-        mode = image.mode
-        mode_name = None
-        bitdepth = None
-        colors = None
-        pixel_format = None
+        - *frames* (`int`, optional):
 
-        if mode in self.modes:
-            mode_name, pixel_format, bitdepth, colors = self.modes[mode]
+            If **frames** is true, the number of frames (or pages) in the image.
 
-        data = OrderedDict()
-        data['width']         = image.width
-        data['height']        = image.height
-        data['mode']          = mode_name
-        data['colors']        = colors
-        data['bitdepth']      = bitdepth
-        data['pixel_format']  = pixel_format
-        data['extended_info'] = image.info
+        - *durations* (`list`, optional):
 
-        if bitdepth and pixel_format:
-            data['bits_per_pixel'] = (bitdepth * len(pixel_format))
+            If **frames** is true, how long (in milliseconds) each frame is displayed for, where
+            the format records it.
+        """
+        with timing.recording('info'):
+            # everything reported here comes from the image headers, so don't decode the pixel data
+            # counting frames moves through the image, so don't share it with other commands
+            image, _ = self._open(
+                selector=selector,
+                url=url,
+                file=file,
+                attribute=attribute,
+                cache=(not frames),
+                decode=False
+            )
 
-        # populate EXIF data (if present)
-        try:
-            for tag, value in image._getexif().items():
+            mode = image.mode
+            mode_name = None
+            bitdepth = None
+            colors = None
+            pixel_format = None
+
+            if mode in self.modes:
+                mode_name, pixel_format, bitdepth, colors = self.modes[mode]
+
+            data = OrderedDict()
+            data['width']         = image.width
+            data['height']        = image.height
+            data['mode']          = mode_name
+            data['colors']        = colors
+            data['bitdepth']      = bitdepth
+            data['pixel_format']  = pixel_format
+            data['extended_info'] = image.info
+
+            if bitdepth and pixel_format:
+                data['bits_per_pixel'] = (bitdepth * len(pixel_format))
+
+            # populate EXIF data (if present in the headers)
+            for tag, value in (loading.header_exif(image) or {}).items():
                 if 'exif' not in data:
                     data['exif'] = {}
 
-                data['exif'][tag] = TAGS.get(tag, tag)
+                data['exif'][tag] = ExifTags.TAGS.get(tag, tag)
 
-        except AttributeError:
-            pass
+            if frames:
+                durations = multiframe.frame_details(image)
+                data['frames'] = len(durations)
+                data['durations'] = durations
 
-        return data
+            return data
 
-    def extract_text(
+    def frames(
         self,
         selector=None,
         url=None,
         file=None,
         attribute='src',
-        language='eng',
-        output_format='raw',
-        text_to_ascii=True,
-        rescale_factor=2.0,
-        rescale_width_threshold=4160
+        frames=None,
+        skip_duplicates=False,
+        tolerance=1.0
     ):
         """
-        Attempts to determine the text content of an image using OCR processing.
+        Iterates over the frames of an animated image (like a GIF) or the pages of a multi-page
+        image (like a TIFF.)  Each frame is only decoded when it is reached.
 
         #### Arguments
 
@@ -316,28 +1168,358 @@ class ImageProxy(CommandProxy):
             This is the attribute containing the image URL on the HTML element referred to by
             **selector**.
 
-        - **language** (`str`):
-
-            The language of the text that is being detected.
-
-        - **output_format** (`str`):
-
-            Describes the way the text content is expected to be presented within the image.
-            Changing this value can help to refine the text extraction process and help improve
-            result accuracy.  Valid values include:
+        - **frames** (`list`, optional):
 
-            - *raw* (default):
+            The indices of the frames to iterate over (starting from 0.)  Defaults to all of them.
 
-                Attempt to extract any text that is located in the image in the order that it is
-                encountered.  This is a good option for arbitrary images where little is known
-                about how the text is likely to be presented, with the trade-off that accuracy will
-                suffer as a result (mismatched or unmatched text is more likely.)
+        - **skip_duplicates** (`bool`):
 
-            - *numeric*:
+            Whether to skip frames that look the same as the frame before them.
 
-                Treat the incoming image as only containing digits.
+        - **tolerance** (`float`):
 
-            - *numeric-words*:
+            How different (on average, on a scale of 0-255) a frame can be from the one before it
+            and still be considered the same when **skip_duplicates** is true.
+
+        #### Returns
+        An iterator over the frames, each a `dict` containing the *index* of the frame, its
+        *duration* (in milliseconds, if the format records it), and the *image* itself (as
+        returned from `image::open`.)
+        """
+        image, _ = self._open(
+            selector=selector,
+            url=url,
+            file=file,
+            attribute=attribute,
+            cache=False,
+            decode=False
+        )
+
+        sequence = multiframe.iter_frames(image, frames)
+
+        if skip_duplicates:
+            sequence = multiframe.FrameFilter(sequence, tolerance=float(tolerance))
+
+        for index, frame, duration in sequence:
+            item = OrderedDict()
+            item['index'] = index
+            item['duration'] = duration
+            item['image'] = frame
+            yield item
+
+    def extract_text_frames(
+        self,
+        selector=None,
+        url=None,
+        file=None,
+        attribute='src',
+        frames=None,
+        skip_duplicates=True,
+        tolerance=1.0,
+        language='eng',
+        output_format='raw',
+        text_to_ascii=True,
+        rescale_factor=2.0,
+        rescale_width_threshold=4160,
+        preprocess=None,
+        parallel=True
+    ):
+        """
+        Attempts to determine the text content of each frame of an animated image (like a GIF) or
+        each page of a multi-page image (like a TIFF.)
+
+        #### Arguments
+
+        - **selector** (`str`, optional):
+
+            A selector that refers to one and only one HTML element that has an attribute referring
+            to an image that was loaded. This typically means selecting an `<img>` tag whose `src`
+            attribute was used to load an image.
+
+        - **url** (`str`, optional):
+
+            If the URL of the image that was loaded is known directly, this is that URL.  This must
+            be the URL of a request that has already occurred.
+
+        - **file** (`str`, `file-like object`, optional):
+
+            This is a file-like object or the string of a local filesystem file representing the
+            image to load.
+
+        - **attribute** (`str`):
+
+            This is the attribute containing the image URL on the HTML element referred to by
+            **selector**.
+
+        - **frames** (`list`, optional):
+
+            The indices of the frames to process (starting from 0.)  Defaults to all of them.
+
+        - **skip_duplicates** (`bool`):
+
+            Whether to skip processing frames that look the same as the frame before them (which
+            are reported as having the same text instead.)
+
+        - **tolerance** (`float`):
+
+            How different (on average, on a scale of 0-255) a frame can be from the one before it
+            and still be considered the same when **skip_duplicates** is true.
+
+        - **parallel** (`bool`):
+
+            Whether to process the frames in parallel in the OCR worker pool.
+
+        See `image::extract_text` for descriptions of the other arguments.
+
+        #### Returns
+        A list with an entry for each frame containing the *index* of the frame, its *duration*
+        (in milliseconds, if the format records it), the detected *text*, and (for frames that
+        were skipped) the index of the frame it was the *same_as*.
+        """
+        with timing.recording('extract_text_frames'):
+            image, _ = self._open(
+                selector=selector,
+                url=url,
+                file=file,
+                attribute=attribute,
+                cache=False,
+                decode=False
+            )
+
+            sequence = multiframe.iter_frames(image, frames)
+
+            if skip_duplicates:
+                sequence = multiframe.FrameFilter(sequence, tolerance=float(tolerance))
+
+            options = self._ocr_options(
+                language=language,
+                output_format=output_format,
+                text_to_ascii=text_to_ascii,
+                rescale_factor=rescale_factor,
+                rescale_width_threshold=rescale_width_threshold,
+                preprocess=preprocess
+            )
+
+            results = OrderedDict()
+
+            for index, frame, duration in sequence:
+                if parallel:
+                    text = workers.get_pool(self.ocr_workers).submit(
+                        extract_text_tile_task,
+                        workers.pack_image(frame),
+                        dict(options)
+                    )
+                else:
+                    text = self._extract_text(
+                        frame,
+                        language=language,
+                        output_format=output_format,
+                        text_to_ascii=text_to_ascii,
+                        rescale_factor=rescale_factor,
+                        rescale_width_threshold=rescale_width_threshold,
+                        preprocess=preprocess
+                    )
+
+                results[index] = (duration, text)
+
+            out = []
+
+            for index, (duration, text) in results.items():
+                item = OrderedDict()
+                item['index'] = index
+                item['duration'] = duration
+                item['text'] = (text.get() if parallel else text)
+                item['same_as'] = None
+                out.append(item)
+
+            if skip_duplicates:
+                by_index = dict([(item['index'], item) for item in out])
+
+                for index, same_as in sequence.duplicates.items():
+                    item = OrderedDict()
+                    item['index'] = index
+                    item['duration'] = sequence.durations[index]
+                    item['text'] = by_index[same_as]['text']
+                    item['same_as'] = same_as
+                    out.append(item)
+
+                out.sort(key=lambda item: item['index'])
+
+            return out
+
+    def harvest(self, selector='img', attribute='src'):
+        """
+        Retrieves the data of every image on the page referred to by the elements matching a
+        selector, so that they can all be processed (by passing them as the **file** argument of
+        the other image commands, or as the **files** of `image::extract_text_batch`.)  The data of
+        each image is retrieved from the browser once no matter how many elements refer to it, and
+        only its headers are read; the pixel data of each image is not decoded until it is used.
+
+        #### Arguments
+
+        - **selector** (`str`):
+
+            A selector matching any number of HTML elements that have an attribute referring to an
+            image that was loaded.
+
+        - **attribute** (`str`):
+
+            This is the attribute containing the image URL on the elements matching **selector**.
+
+        #### Returns
+        A `dict` containing the *count* of images retrieved, the *images* themselves (in the order
+        they first appear on the page), and the images that were *skipped*, each a `dict`
+        containing the *url* (if any) and the *reason* it was skipped (e.g.: the image has not
+        finished loading, or its data isn't an image.)
+        """
+        with timing.recording('harvest'):
+            with timing.stage('lookup'):
+                elements = self.tab.dom.select_nodes(selector, wait_for_match=False)
+
+                if isinstance(elements, dict):
+                    elements = elements.get('nodes', [])
+
+            pending = OrderedDict()
+            skipped = []
+
+            for element in (elements or []):
+                try:
+                    url = element[attribute]
+                except KeyError:
+                    url = None
+
+                if not url:
+                    skipped.append(OrderedDict([
+                        ('url', None),
+                        ('reason', "Element does not have a '{}' attribute".format(attribute)),
+                    ]))
+
+                elif url in pending:
+                    pending[url][1] += 1
+                else:
+                    pending[url] = [element, 1]
+
+            resources = []
+
+            with timing.stage('lookup'):
+                for url, (element, occurrences) in pending.items():
+                    resource = self.tab.dom.get_resource(url=url)
+
+                    if not resource:
+                        skipped.append(OrderedDict([('url', url), ('reason', 'Resource not found')]))
+                    elif not resource.get('completed'):
+                        skipped.append(OrderedDict([('url', url), ('reason', 'Resource has not finished loading')]))
+                    else:
+                        resources.append((url, resource['id'], element, occurrences))
+
+            images = []
+
+            # the connection to the browser can't be used from several threads at once, so the
+            # bodies are retrieved one at a time
+            for url, resource_id, element, occurrences in resources:
+                try:
+                    with timing.stage('fetch'):
+                        body = self.tab.network.get_response_body(resource_id)
+                except Exception as e:
+                    skipped.append(OrderedDict([('url', url), ('reason', str(e))]))
+                    continue
+
+                if not body:
+                    skipped.append(OrderedDict([('url', url), ('reason', 'Resource is empty')]))
+                    continue
+
+                timing.count('bytes_fetched', len(body))
+                image = HarvestedImage(url, resource_id, body, element=element, occurrences=occurrences)
+
+                # reading the headers is enough to tell whether the body is an image
+                try:
+                    with timing.stage('decode'):
+                        image.image
+                except Exception as e:
+                    skipped.append(OrderedDict([
+                        ('url', url),
+                        ('reason', 'Not a recognized image: {}'.format(e)),
+                    ]))
+                    continue
+
+                images.append(image)
+
+            for item in skipped:
+                logging.debug('Skipped image {}: {}'.format(item['url'], item['reason']))
+
+            out = OrderedDict()
+            out['count'] = len(images)
+            out['images'] = images
+            out['skipped'] = skipped
+            return out
+
+    def extract_text(
+        self,
+        selector=None,
+        url=None,
+        file=None,
+        attribute='src',
+        language='eng',
+        output_format='raw',
+        text_to_ascii=True,
+        rescale_factor=2.0,
+        rescale_width_threshold=4160,
+        tile_size=None,
+        tile_overlap=100,
+        region=None,
+        preprocess=None,
+        stream=False,
+        timings=False,
+        frame=None
+    ):
+        """
+        Attempts to determine the text content of an image using OCR processing.
+
+        #### Arguments
+
+        - **selector** (`str`, optional):
+
+            A selector that refers to one and only one HTML element that has an attribute referring
+            to an image that was loaded. This typically means selecting an `<img>` tag whose `src`
+            attribute was used to load an image.
+
+        - **url** (`str`, optional):
+
+            If the URL of the image that was loaded is known directly, this is that URL.  This must
+            be the URL of a request that has already occurred.
+
+        - **file** (`str`, `file-like object`, optional):
+
+            This is a file-like object or the string of a local filesystem file representing the
+            image to load.
+
+        - **attribute** (`str`):
+
+            This is the attribute containing the image URL on the HTML element referred to by
+            **selector**.
+
+        - **language** (`str`):
+
+            The language of the text that is being detected.
+
+        - **output_format** (`str`):
+
+            Describes the way the text content is expected to be presented within the image.
+            Changing this value can help to refine the text extraction process and help improve
+            result accuracy.  Valid values include:
+
+            - *raw* (default):
+
+                Attempt to extract any text that is located in the image in the order that it is
+                encountered.  This is a good option for arbitrary images where little is known
+                about how the text is likely to be presented, with the trade-off that accuracy will
+                suffer as a result (mismatched or unmatched text is more likely.)
+
+            - *numeric*:
+
+                Treat the incoming image as only containing digits.
+
+            - *numeric-words*:
 
                 Treat the incoming image as only containing digits separated into separate "words"
                 by whitespace or non-numeric characters (e.g.: phone numbers, social security
@@ -379,165 +1561,1327 @@ class ImageProxy(CommandProxy):
             only really make sense in the context of OCR extraction when the source images are VERY
             large and you want to discard some data and save time or memory during processing.
 
-        #### Returns
-        A string representing the detected text, or `None` if the detection failed.
-        """
-        image = self.open(selector=selector, url=url, file=file, attribute=attribute)
-
-        # Tesseract will have a much better time with larger images, so as a safety margin we're
-        # going to double the size of any input image that's narrower than rescale_width_threshold.
-        #
-        # Unless we're trying to make the image smaller, in which case rescale_width_threshold is
-        # interpreted to mean "maximum size".
-        #
-        if rescale_factor < 1.0 and image.width > rescale_width_threshold or \
-           rescale_factor > 1.0 and image.width < rescale_width_threshold:
-            size = (int(image.width * rescale_factor), int(image.height * rescale_factor))
-
-            logging.debug('Resizing image ({} x {}) {}x to ({} x {})'.format(
-                image.width,
-                image.height,
-                rescale_factor,
-                size[0],
-                size[1]
-            ))
+        - **tile_size** (`int`, `list`, optional):
 
-            image = image.resize(
-                size,
-                resample=Image.BICUBIC
-            )
+            If specified, the image is cut into tiles of this size (either a single number for
+            square tiles, or `[width, height]`) which are processed in parallel, with
+            **rescale_factor** and **rescale_width_threshold** applied to each tile rather than to
+            the whole image.  This keeps memory use bounded for very large images (like full-page
+            screenshots) without discarding detail.  Tiles as wide as the image avoid splitting
+            lines of text between tiles.
 
-        tools = pyocr.get_available_tools()
+        - **tile_overlap** (`int`):
 
-        if not len(tools):
-            raise Exception("No OCR tools available")
+            The number of pixels adjacent tiles overlap by.  This should be larger than the tallest
+            text in the image so that text straddling a tile edge is recognized whole in one of the
+            tiles.  Text detected in both tiles is only reported once.
 
-        for tool in tools:
-            for env, values in self.pyocr_env_paths.items():
-                for value in values:
-                    os.environ[env] = value
+        - **region** (`list`, `dict`, `str`, optional):
 
-                    try:
-                        languages = tool.get_available_languages()
+            If specified, only this part of the image is processed (see `image::open` for the ways
+            a region can be given.)  The region is cropped out before rescaling, and the positions
+            of any detected text are still reported relative to the whole image.
 
-                        if language in languages:
-                            ocr_lang = languages[languages.index(language)]
-                        else:
-                            continue
+        - **preprocess** (`list`, optional):
 
-                        postprocess = passthrough
-                        text_handler = None
+            A list of processing steps to apply to the image before performing OCR, which can
+            improve both the speed and accuracy of text extraction.  Steps always run in the same
+            order (the one listed below) regardless of the order they are given in, and the steps
+            are arranged around rescaling the image to do as little work as possible.  Valid steps
+            include:
 
-                        if text_to_ascii:
-                            text_handler = text_asciify
+            - *greyscale*:
 
-                        # Text Builders
-                        # -------------
-                        if output_format == 'raw':
-                            builder = pyocr.builders.TextBuilder()
+                Convert the image to a single greyscale channel (transparent areas become white.)
+                This always happens before rescaling, making the rescale itself several times
+                cheaper.
 
-                        elif output_format == 'numeric':
-                            builder = pyocr.builders.DigitBuilder()
+            - *autocontrast*:
 
-                        elif output_format == 'numeric-words':
-                            builder = pyocr.builders.DigitLineBoxBuilder()
-                            postprocess = postprocess_boxes
+                Stretch the range of brightness values in the image to use the full range.
 
-                        elif output_format == 'words':
-                            builder = pyocr.builders.WordBoxBuilder()
-                            postprocess = postprocess_boxes
+            - *denoise*:
 
-                        elif output_format == 'lines':
-                            builder = pyocr.builders.LineBox()
-                            postprocess = postprocess_boxes
+                Remove speckles from the image using a median filter.
 
-                        elif output_format == 'lines-words':
-                            builder = pyocr.builders.LineBoxBuilder()
-                            postprocess = postprocess_lines_boxes
+            - *deskew*:
 
-                        elif output_format == 'characters':
-                            builder = pyocr.tesseract.CharBoxBuilder()
-                            postprocess = postprocess_boxes
+                Detect text that is slightly rotated and rotate the image so that it is level.
+                Positions of detected text are relative to the rotated image.
 
-                        else:
-                            raise ValueError("Unrecognized output_format '{}'".format(
-                                output_format
-                            ))
+            - *threshold*:
 
-                        logging.debug('Performing character recognition on input image')
+                Convert the image to pure black and white, choosing the cutoff automatically.  This
+                always happens after rescaling.
 
-                        return postprocess(tool.image_to_string(
-                            image,
-                            lang=ocr_lang,
-                            builder=builder
-                        ), text_handler=text_handler, rescale_factor=rescale_factor)
+        - **stream** (`bool`):
 
-                    except:
-                        continue
+            If true, the image is recognized as a series of horizontal bands (or as tiles of
+            **tile_size**, if given) and the results are returned as they become available rather
+            than all at once.  Each line of text (or each box, for the box output formats) is
+            produced in order as soon as the band containing it has been recognized, so a script
+            can begin work on (or stop looking through) the results of long, document-like images
+            before the whole image has been processed.  Streamed results are not cached.
 
-        return None
+        - **timings** (`bool`):
+
+            If true, the result is returned along with a breakdown of where the time went while
+            producing it (see `image::timings`.)
+
+        - **frame** (`int`, optional):
+
+            For animated images (like GIFs) and multi-page images (like TIFFs), the index of the
+            frame (or page) to process, starting from 0 (the default.)  To process every frame,
+            see `image::extract_text_frames`.
+
+        #### Returns
+        A string representing the detected text, or `None` if the detection failed.  The
+        *numeric-words* and *lines* formats (and *words* and *characters*) return a compact list of
+        boxes instead, which can be narrowed down further using `image::select_boxes`.
+
+        If **stream** is true, an iterator over the detected lines of text (or boxes) is returned
+        instead.
+
+        If **timings** is true, a `dict` is returned instead with the result in the key *text* and
+        the timings in *timings*.
+        """
+        with timing.recording('extract_text') as recorded:
+            # when shrinking very large images, decode them at the reduced size to begin with
+            reduce = (rescale_factor < 1.0 and region is None and not tile_size and not stream)
+            prescaled = False
+
+            image, element = self._open(
+                selector=selector,
+                url=url,
+                file=file,
+                attribute=attribute,
+                decode=(not reduce),
+                frame=frame
+            )
+
+            if reduce and not loading.is_decoded(image) and image.width > rescale_width_threshold:
+                with timing.stage('decode'):
+                    image = loading.decode_reduced(image, loading.scaled_size(image.size, scale=rescale_factor))
+
+                prescaled = True
+
+            offset = (0, 0)
+
+            if region is not None:
+                box = self._region_box(region, image, element)
+                image = image.crop(box)
+                offset = (box[0], box[1])
+
+            if stream:
+                return stream_tiled(
+                    image,
+                    (tile_size or [image.width, STREAM_BAND_HEIGHT]),
+                    tile_overlap=tile_overlap,
+                    output_format=output_format,
+                    offset=offset,
+                    processes=self.ocr_workers,
+                    language=language,
+                    text_to_ascii=text_to_ascii,
+                    rescale_factor=rescale_factor,
+                    rescale_width_threshold=rescale_width_threshold,
+                    preprocess=preprocess,
+                    env_paths=self.pyocr_env_paths,
+                    engine=self.ocr_engine
+                )
+
+            ocr_cache = self._get_ocr_cache()
+            hit = False
+
+            if ocr_cache is not None:
+                with timing.stage('ocr_cache'):
+                    cache_key = ocr_cache.key(
+                        image,
+                        language=language,
+                        output_format=output_format,
+                        text_to_ascii=text_to_ascii,
+                        rescale_factor=rescale_factor,
+                        rescale_width_threshold=rescale_width_threshold,
+                        tile_size=tile_size,
+                        tile_overlap=(tile_overlap if tile_size else None),
+                        offset=offset,
+                        preprocess=sorted(preprocess or []),
+                        engine=backends.resolve(self.ocr_engine, output_format).name
+                    )
+
+                    hit, result = ocr_cache.get(cache_key)
+
+                if hit:
+                    logging.debug('Using cached OCR result {}'.format(cache_key))
+                    timing.count('ocr_cache_hits')
+                else:
+                    timing.count('ocr_cache_misses')
+
+            if not hit:
+                result = self._extract_text(
+                    image,
+                    language=language,
+                    output_format=output_format,
+                    text_to_ascii=text_to_ascii,
+                    rescale_factor=rescale_factor,
+                    rescale_width_threshold=rescale_width_threshold,
+                    tile_size=tile_size,
+                    tile_overlap=tile_overlap,
+                    offset=offset,
+                    prescaled=prescaled,
+                    preprocess=preprocess
+                )
 
-    def pixel(self, selector=None, url=None, file=None, attribute='src', x=None, y=None):
+                # failures are not cached, since they are as likely to be caused by the environment
+                # (e.g.: missing language data) as by the image
+                if ocr_cache is not None and result is not None:
+                    with timing.stage('ocr_cache'):
+                        ocr_cache.put(cache_key, result)
+
+        if timings:
+            out = OrderedDict()
+            out['text'] = result
+            out['timings'] = recorded.to_dict()
+            return out
+
+        return result
+
+    def _extract_text(
+        self,
+        image,
+        language='eng',
+        output_format='raw',
+        text_to_ascii=True,
+        rescale_factor=2.0,
+        rescale_width_threshold=4160,
+        tile_size=None,
+        tile_overlap=100,
+        offset=(0, 0),
+        prescaled=False,
+        preprocess=None
+    ):
+        if tile_size:
+            return recognize_tiled(
+                image,
+                tile_size,
+                tile_overlap=tile_overlap,
+                output_format=output_format,
+                offset=offset,
+                processes=self.ocr_workers,
+                language=language,
+                text_to_ascii=text_to_ascii,
+                rescale_factor=rescale_factor,
+                rescale_width_threshold=rescale_width_threshold,
+                preprocess=preprocess,
+                env_paths=self.pyocr_env_paths,
+                engine=self.ocr_engine
+            )
+
+        if prescaled:
+            image, _ = preprocessing.run(preprocessing.flatten(image), preprocess)
+        else:
+            image, rescale_factor = prepare_for_ocr(
+                image,
+                rescale_factor,
+                rescale_width_threshold,
+                preprocess
+            )
+
+        return recognize_text(
+            image,
+            language=language,
+            output_format=output_format,
+            text_to_ascii=text_to_ascii,
+            rescale_factor=rescale_factor,
+            env_paths=self.pyocr_env_paths,
+            engine=self.ocr_engine,
+            processes=self.ocr_workers,
+            offset=offset
+        )
+
+    def extract_text_batch(
+        self,
+        selector=None,
+        urls=None,
+        files=None,
+        attribute='src',
+        language='eng',
+        output_format='raw',
+        text_to_ascii=True,
+        rescale_factor=2.0,
+        rescale_width_threshold=4160,
+        preprocess=None
+    ):
         """
-        Retrieves the color of a specific pixel in the image.
+        Performs OCR on many images at once, spreading the work of decoding, rescaling, and
+        recognizing them across a pool of worker processes.
 
         #### Arguments
 
         - **selector** (`str`, optional):
 
-            A selector that refers to one and only one HTML element that has an attribute referring
-            to an image that was loaded. This typically means selecting an `<img>` tag whose `src`
-            attribute was used to load an image.
+            A selector matching any number of HTML elements that have an attribute referring to an
+            image that was loaded (e.g.: `<img>` tags.)
 
-        - **url** (`str`, optional):
+        - **urls** (`list`, optional):
 
-            If the URL of the image that was loaded is known directly, this is that URL.  This must
-            be the URL of a request that has already occurred.
+            A list of URLs of images that were loaded.  These must be the URLs of requests that have
+            already occurred.
 
-        - **file** (`str`, `file-like object`, optional):
+        - **files** (`list`, optional):
 
-            This is a file-like object or the string of a local filesystem file representing the
-            image to load.
+            A list of file-like objects or local filesystem paths of images to load.
 
         - **attribute** (`str`):
 
-            This is the attribute containing the image URL on the HTML element referred to by
+            This is the attribute containing the image URL on the HTML elements referred to by
             **selector**.
 
-        - **x**, **y** (`int`):
+        - **language**, **output_format**, **text_to_ascii**, **rescale_factor**,
+          **rescale_width_threshold**, **preprocess**:
 
-            The X,Y coordinates (relative to the top-left corner of the image) of the pixel to
-            retrieve.
+            These behave exactly as they do for `image::extract_text`.
 
         #### Returns
-        A `dict` containing the integer values of each color component of the pixel, and the key
-        *hex* with a string representing the hexadecimal value of the pixel.
+        A `list` containing one `dict` per image, in the order the images were given (elements
+        matching **selector** first, followed by **urls**, then **files**.)  Each contains the
+        keys:
+
+        - *source* (`str`):
+
+            The URL or filename of the image.
+
+        - *text*:
+
+            The detected text, in the same form `image::extract_text` would return it.
+
+        - *error* (`str`):
+
+            If the image could not be processed, this describes why (and *text* will be `None`.)
         """
-        image = self.open(selector=selector, url=url, file=file, attribute=attribute)
+        with timing.recording('extract_text_batch'):
+            sources = []
+            element_urls = []
 
-        if x is None or y is None:
-            raise ValueError("Must specify both x and y values")
+            if selector:
+                elements = self.tab.dom.select_nodes(selector, wait_for_match=True)
 
-        if image.mode in self.modes:
-            _, pixel_format, _, _ = self.modes[image.mode]
+                if isinstance(elements, dict):
+                    elements = elements.get('nodes', [])
 
-            pixel_data = OrderedDict()
-            values = image.getpixel((x, y))
+                for element in (elements or []):
+                    try:
+                        element_urls.append(element[attribute])
+                    except KeyError:
+                        element_urls.append(None)
+
+            for url in element_urls + list(urls or []):
+                try:
+                    if url is None:
+                        raise ValueError("Element does not have a '{}' attribute".format(attribute))
+
+                    label, source, _, _ = self._locate(url=url)
+                    sources.append((label, self._task_source(source), None))
+
+                except Exception as e:
+                    sources.append((url, None, e))
+
+            for file in (files or []):
+                try:
+                    label, source, _, _ = self._locate(file=file)
+                    sources.append((label, self._task_source(source), None))
+
+                except Exception as e:
+                    sources.append((getattr(file, 'name', file), None, e))
+
+            options = self._ocr_options(
+                language=language,
+                output_format=output_format,
+                text_to_ascii=text_to_ascii,
+                rescale_factor=rescale_factor,
+                rescale_width_threshold=rescale_width_threshold,
+                preprocess=preprocess
+            )
 
-            # make sure the pixel format and returned value count matches
-            if len(pixel_format) == len(values):
-                # add all colors to the result
-                for i, color in enumerate(pixel_format):
-                    pixel_data[color.lower()] = values[i]
+            pool = workers.get_pool(self.ocr_workers)
+            jobs = []
 
-                # populate the hexadecimal value
-                if pixel_format == 'RGB':
-                    pixel_data['hex'] = self.rgb2hex(values[0], values[1], values[2])
-                elif pixel_format == 'RGBA':
-                    pixel_data['hex'] = self.rgb2hex(values[0], values[1], values[2], values[3])
+            for label, source, error in sources:
+                job = None
 
-                return pixel_data
-            else:
-                raise Exception("Pixel value count does not match pixel format")
-        else:
-            raise Exception("Unknown pixel format")
+                if error is None:
+                    job = pool.submit(extract_text_task, source, dict(options))
+
+                jobs.append((label, job, error))
+
+            results = []
+
+            for label, job, error in jobs:
+                item = OrderedDict()
+                item['source'] = label
+                item['text'] = None
+                item['error'] = None
+
+                if job is not None:
+                    try:
+                        item['text'] = job.get()
+                    except Exception as e:
+                        error = e
+
+                if error is not None:
+                    logging.warning('Failed to extract text from {}: {}'.format(label, error))
+                    item['error'] = str(error)
+
+                results.append(item)
+
+            return results
+
+    def extract_text_async(
+        self,
+        selector=None,
+        url=None,
+        file=None,
+        attribute='src',
+        language='eng',
+        output_format='raw',
+        text_to_ascii=True,
+        rescale_factor=2.0,
+        rescale_width_threshold=4160,
+        region=None,
+        preprocess=None
+    ):
+        """
+        Starts extracting the text content of an image in the background, returning immediately.
+        The image data is retrieved from the page before returning, so the script is free to
+        navigate elsewhere while the image is decoded and processed by the OCR worker pool.  Use
+        `image::collect` to retrieve the result.
+
+        #### Arguments
+
+        See `image::extract_text` for descriptions of the arguments.
+
+        #### Returns
+        A handle (a string) that can be passed to `image::collect` to retrieve the result.  Results
+        retrieved this way are not cached.
+        """
+        with timing.recording('extract_text_async'):
+            label, source, element, _ = self._locate(
+                selector=selector,
+                url=url,
+                file=file,
+                attribute=attribute
+            )
+
+            source = self._task_source(source)
+
+            options = self._ocr_options(
+                language=language,
+                output_format=output_format,
+                text_to_ascii=text_to_ascii,
+                rescale_factor=rescale_factor,
+                rescale_width_threshold=rescale_width_threshold,
+                preprocess=preprocess
+            )
+
+            # regions may refer to elements on the page, so they are resolved now (which only needs
+            # the image headers to be read)
+            if region is not None:
+                options['region'] = self._region_box(region, Image.open(self._read_source(source)), element)
+
+            handle = 'ocr-{}'.format(next(self._job_ids))
+            job = workers.get_pool(self.ocr_workers).submit(extract_text_task, source, options)
+
+            self._jobs[handle] = (label, job)
+
+            return handle
+
+    def collect(self, handles=None, timeout=None):
+        """
+        Retrieves the results of text extraction started with `image::extract_text_async`, waiting
+        for them to finish if necessary.
+
+        #### Arguments
+
+        - **handles** (`str`, `list`, optional):
+
+            The handle (or a list of handles) to retrieve the results of.  If not specified, the
+            results of every extraction that has not been collected yet are retrieved.
+
+        - **timeout** (`float`, optional):
+
+            The maximum number of seconds to wait for the results.  If not specified, this waits
+            for as long as it takes.
+
+        #### Returns
+        If a single handle was given, the detected text (see `image::extract_text`.)
+
+        Otherwise, a list with an entry for each handle (in the order given, or the order they
+        were started in) containing the *handle*, its *source*, whether it is *done*, the detected
+        *text*, and any *error* that occurred.  Extractions that are not done before the timeout
+        can be collected again later; all others are forgotten once collected.
+
+        #### Raises
+        - `KeyError` if a handle is not recognized (or has already been collected.)
+        - If a single handle was given, the error that caused the extraction to fail, or a
+          `TimeoutError` if it was not done before the timeout.
+        """
+        with timing.recording('collect'):
+            if isinstance(handles, basestring):
+                label, job = self._jobs[handles]
+
+                # extractions that time out can be collected again later
+                job.wait(timeout)
+
+                if not job.ready():
+                    raise multiprocessing.TimeoutError(
+                        "Timed out waiting for the result of '{}'".format(handles)
+                    )
+
+                self._jobs.pop(handles, None)
+                return job.get()
+
+            if handles is None:
+                handles = list(self._jobs.keys())
+
+            jobs = [(handle, self._jobs[handle]) for handle in handles]
+            deadline = (time.time() + timeout if timeout is not None else None)
+            results = []
+
+            for handle, (label, job) in jobs:
+                item = OrderedDict()
+                item['handle'] = handle
+                item['source'] = label
+                item['done'] = False
+                item['text'] = None
+                item['error'] = None
+
+                try:
+                    if deadline is None:
+                        item['text'] = job.get()
+                    else:
+                        item['text'] = job.get(max(0, deadline - time.time()))
+
+                    item['done'] = True
+
+                except multiprocessing.TimeoutError:
+                    item['error'] = 'Timed out waiting for the result'
+
+                except Exception as e:
+                    logging.warning('Failed to extract text from {}: {}'.format(label, e))
+                    item['done'] = True
+                    item['error'] = str(e)
+
+                if item['done']:
+                    self._jobs.pop(handle, None)
+
+                results.append(item)
+
+            return results
+
+    def select_boxes(self, boxes, region=None, partial=False, pattern=None, lines=False):
+        """
+        Filters a list of text boxes returned from `image::extract_text`.
+
+        #### Arguments
+
+        - **boxes** (`list`):
+
+            The boxes to filter.
+
+        - **region** (`list`, `dict`, optional):
+
+            If specified, only boxes within this region are kept.  The region may be given as a
+            list of `[left, top, right, bottom]`, as an object with the keys *x*, *y*, *width*, and
+            *height*, or as another box.
+
+        - **partial** (`bool`):
+
+            Whether to keep boxes that only partially overlap **region**.
+
+        - **pattern** (`str`, optional):
+
+            If specified, only boxes whose text matches this regular expression are kept.
+
+        - **lines** (`bool`):
+
+            Whether to group the remaining boxes into lines of text.
+
+        #### Returns
+        A list of the boxes that matched, or a list of lists of boxes (one per line, top to
+        bottom) if **lines** is true.
+        """
+        if not isinstance(boxes, BoxList):
+            boxes = BoxList(
+                [box['text'] for box in (boxes or [])],
+                [v for box in (boxes or []) for v in arrays.region_box(box)]
+            )
+
+        if region is not None:
+            boxes = boxes.within(region, partial=partial)
+
+        if pattern is not None:
+            boxes = boxes.filter(pattern)
+
+        if lines:
+            return boxes.lines()
+
+        return boxes
+
+    def pixel(
+        self,
+        selector=None,
+        url=None,
+        file=None,
+        attribute='src',
+        x=None,
+        y=None,
+        points=None,
+        region=None,
+        stride=None,
+        include_hex=True,
+        statistics=False,
+        frame=None
+    ):
+        """
+        Retrieves the color of a specific pixel in the image, or of many pixels at once.
+
+        #### Arguments
+
+        - **selector** (`str`, optional):
+
+            A selector that refers to one and only one HTML element that has an attribute referring
+            to an image that was loaded. This typically means selecting an `<img>` tag whose `src`
+            attribute was used to load an image.
+
+        - **url** (`str`, optional):
+
+            If the URL of the image that was loaded is known directly, this is that URL.  This must
+            be the URL of a request that has already occurred.
+
+        - **file** (`str`, `file-like object`, optional):
+
+            This is a file-like object or the string of a local filesystem file representing the
+            image to load.
+
+        - **attribute** (`str`):
+
+            This is the attribute containing the image URL on the HTML element referred to by
+            **selector**.
+
+        - **x**, **y** (`int`):
+
+            The X,Y coordinates (relative to the top-left corner of the image) of the pixel to
+            retrieve.
+
+        - **points** (`list`, optional):
+
+            A list of `[x, y]` coordinates to retrieve in a single call.
+
+        - **region** (`list`, `dict`, `str`, optional):
+
+            A part of the image to work within (see `image::open` for the ways a region can be
+            given.)  On its own, every pixel in the region is sampled.  If **x** and **y** or
+            **points** are also given, those coordinates are relative to the top-left corner of the
+            region.  If neither **points** nor **region** is given but **stride** is, the whole
+            image is sampled.
+
+        - **stride** (`int`, optional):
+
+            When sampling a **region**, only retrieve every Nth pixel along each axis.
+
+        - **include_hex** (`bool`):
+
+            Whether to include the hexadecimal value of each sampled RGB[A] pixel.
+
+        - **statistics** (`bool`):
+
+            Whether to include the mean, minimum, maximum, and standard deviation of each color
+            component across all of the sampled pixels.
+
+        - **frame** (`int`, optional):
+
+            For animated images (like GIFs) and multi-page images (like TIFFs), the index of the
+            frame (or page) to sample, starting from 0 (the default.)
+
+        #### Returns
+        A `dict` containing the integer values of each color component of the pixel, and the key
+        *hex* with a string representing the hexadecimal value of the pixel.
+
+        If **points**, **region**, or **stride** are specified, a `dict` of columns is returned
+        instead: *count* is the number of pixels sampled, *coordinates* is a `dict` whose *x* and *y*
+        are lists of their coordinates (relative to the whole image), and each color component (and
+        *hex*) is a list of values in the same order.
+        If **statistics** is true, the key *statistics* contains a `dict` of the per-component
+        values.
+        """
+        with timing.recording('pixel'):
+            image, element = self._open(selector=selector, url=url, file=file, attribute=attribute, frame=frame)
+            box = None
+
+            # palette indices aren't meaningful as colors (and frames of GIFs past the first are
+            # often palette images even when the first one isn't)
+            if image.mode == 'P':
+                image = image.convert('RGBA' if 'transparency' in image.info else 'RGB')
+
+            if region is not None:
+                box = self._region_box(region, image, element)
+
+            if points is not None or stride is not None or (box is not None and x is None and y is None):
+                return self._pixels(
+                    image,
+                    points=points,
+                    box=box,
+                    stride=stride,
+                    include_hex=include_hex,
+                    statistics=statistics
+                )
+
+            if x is None or y is None:
+                raise ValueError("Must specify both x and y values")
+
+            if box is not None:
+                x += box[0]
+                y += box[1]
+
+            if image.mode in self.modes:
+                _, pixel_format, _, _ = self.modes[image.mode]
+
+                pixel_data = OrderedDict()
+                values = image.getpixel((x, y))
+
+                # make sure the pixel format and returned value count matches
+                if len(pixel_format) == len(values):
+                    # add all colors to the result
+                    for i, color in enumerate(pixel_format):
+                        pixel_data[color.lower()] = values[i]
+
+                    # populate the hexadecimal value
+                    if pixel_format == 'RGB':
+                        pixel_data['hex'] = self.rgb2hex(values[0], values[1], values[2])
+                    elif pixel_format == 'RGBA':
+                        pixel_data['hex'] = self.rgb2hex(values[0], values[1], values[2], values[3])
+
+                    return pixel_data
+                else:
+                    raise Exception("Pixel value count does not match pixel format")
+            else:
+                raise Exception("Unknown pixel format")
+
+    def _channel_names(self, image):
+        bands = image.getbands()
+
+        if image.mode in self.modes:
+            _, pixel_format, _, _ = self.modes[image.mode]
+
+            if len(pixel_format) == len(bands):
+                return [c.lower() for c in pixel_format]
+
+        return [b.lower() for b in bands]
+
+    def _pixels(self, image, points=None, box=None, stride=None, include_hex=True, statistics=False):
+        data = arrays.image_array(image)
+        channels = self._channel_names(image)
+
+        if points is not None:
+            left, top = 0, 0
+
+            # points given within a region are relative to it, and must not stray outside of it
+            if box is not None:
+                left, top = box[0], box[1]
+                data = data[box[1]:box[3], box[0]:box[2]]
+
+            coords = [(int(point[0]), int(point[1])) for point in points]
+            xs = [c[0] for c in coords]
+            ys = [c[1] for c in coords]
+            values = arrays.sample_points(data, xs, ys)
+            xs = [v + left for v in xs]
+            ys = [v + top for v in ys]
+        else:
+            xs, ys = arrays.grid_points((box or (0, 0, image.width, image.height)), stride)
+            values = arrays.sample_points(data, xs, ys)
+
+        pixel_data = OrderedDict()
+        pixel_data['count'] = len(values)
+
+        # coordinates get their own key, since some modes have color components named x or y
+        # (like the yellow of CMYK)
+        pixel_data['coordinates'] = OrderedDict()
+        pixel_data['coordinates']['x'] = list(xs) if points is not None else xs.tolist()
+        pixel_data['coordinates']['y'] = list(ys) if points is not None else ys.tolist()
+
+        for i, channel in enumerate(channels):
+            pixel_data[channel] = values[:, i].tolist()
+
+        if include_hex and image.mode in ('RGB', 'RGBA'):
+            pixel_data['hex'] = arrays.hex_values(values)
+
+        if statistics and len(values):
+            pixel_data['statistics'] = arrays.channel_statistics(values, channels)
+
+        return pixel_data
+
+    def histogram(
+        self,
+        selector=None,
+        url=None,
+        file=None,
+        attribute='src',
+        region=None,
+        bins=256
+    ):
+        """
+        Counts how many pixels of an image have each value, for each color component.
+
+        #### Arguments
+
+        - **selector** (`str`, optional):
+
+            A selector that refers to one and only one HTML element that has an attribute referring
+            to an image that was loaded. This typically means selecting an `<img>` tag whose `src`
+            attribute was used to load an image.
+
+        - **url** (`str`, optional):
+
+            If the URL of the image that was loaded is known directly, this is that URL.  This must
+            be the URL of a request that has already occurred.
+
+        - **file** (`str`, `file-like object`, optional):
+
+            This is a file-like object or the string of a local filesystem file representing the
+            image to load.
+
+        - **attribute** (`str`):
+
+            This is the attribute containing the image URL on the HTML element referred to by
+            **selector**.
+
+        - **region** (`list`, `dict`, `str`, optional):
+
+            If specified, only this part of the image is analyzed (see `image::open` for the ways
+            a region can be given.)
+
+        - **bins** (`int`):
+
+            The number of ranges of values to count pixels in.  The default counts each of the
+            values an 8-bit color component can have separately.
+
+        #### Returns
+        A `dict` containing the *count* of pixels analyzed, the lower bound of the range of values
+        counted in each bin (*edges*), and for each color component (named as they are by
+        `image::pixel`) a list of the number of pixels that fell into each bin.  Palette-based
+        images are converted to RGB(A) first.
+        """
+        with timing.recording('histogram'):
+            image, values, channels = self._color_values(selector, url, file, attribute, region)
+
+            with timing.stage('analyze'):
+                counts, edges = palettes.histograms(values, bins=int(bins))
+
+            out = OrderedDict()
+            out['count'] = len(values)
+            out['edges'] = edges[:-1].tolist()
+
+            for i, channel in enumerate(channels):
+                out[channel] = counts[i].tolist()
+
+            return out
+
+    def dominant_colors(
+        self,
+        selector=None,
+        url=None,
+        file=None,
+        attribute='src',
+        region=None,
+        colors=5,
+        method='kmeans',
+        sample_size=65536,
+        include_hex=True
+    ):
+        """
+        Determines the colors that make up most of an image.
+
+        #### Arguments
+
+        - **selector** (`str`, optional):
+
+            A selector that refers to one and only one HTML element that has an attribute referring
+            to an image that was loaded. This typically means selecting an `<img>` tag whose `src`
+            attribute was used to load an image.
+
+        - **url** (`str`, optional):
+
+            If the URL of the image that was loaded is known directly, this is that URL.  This must
+            be the URL of a request that has already occurred.
+
+        - **file** (`str`, `file-like object`, optional):
+
+            This is a file-like object or the string of a local filesystem file representing the
+            image to load.
+
+        - **attribute** (`str`):
+
+            This is the attribute containing the image URL on the HTML element referred to by
+            **selector**.
+
+        - **region** (`list`, `dict`, `str`, optional):
+
+            If specified, only this part of the image is analyzed (see `image::open` for the ways
+            a region can be given.)
+
+        - **colors** (`int`):
+
+            The (maximum) number of colors to return.
+
+        - **method** (`str`):
+
+            How the colors are chosen.  Valid values include:
+
+            - *kmeans* (default):
+
+                Group similar colors into clusters using k-means clustering, which finds the most
+                representative colors at the cost of being slower.
+
+            - *median-cut*:
+
+                Repeatedly split the pixels into two groups along the color component with the
+                widest range of values.  This is faster, but can split large areas of similar color
+                into several groups.
+
+        - **sample_size** (`int`):
+
+            Images with more pixels than this are shrunk to about this many pixels before being
+            analyzed, which is much faster and rarely changes the result.  A value of zero analyzes
+            every pixel.
+
+        - **include_hex** (`bool`):
+
+            Whether to include the hexadecimal value of each color (for RGB and RGBA images.)
+
+        #### Returns
+        A list of colors (most common first), each a `dict` containing the value of each color
+        component, the *hex* value of the color, the *count* of pixels it represents, and the
+        *fraction* of the pixels analyzed that represents.
+        """
+        with timing.recording('dominant_colors'):
+            image, values, channels = self._color_values(
+                selector,
+                url,
+                file,
+                attribute,
+                region,
+                sample_size=sample_size
+            )
+
+            if not len(values):
+                return []
+
+            with timing.stage('analyze'):
+                if method == 'kmeans':
+                    palette, counts = palettes.kmeans(values, int(colors))
+                elif method == 'median-cut':
+                    palette, counts = palettes.median_cut(values, int(colors))
+                else:
+                    raise ValueError("Unrecognized method '{}'".format(method))
+
+            return self._colors(image, values, channels, palette, counts, include_hex)
+
+    def average_color(
+        self,
+        selector=None,
+        url=None,
+        file=None,
+        attribute='src',
+        region=None,
+        method='mean',
+        include_hex=True
+    ):
+        """
+        Determines the average color of an image.
+
+        #### Arguments
+
+        - **selector** (`str`, optional):
+
+            A selector that refers to one and only one HTML element that has an attribute referring
+            to an image that was loaded. This typically means selecting an `<img>` tag whose `src`
+            attribute was used to load an image.
+
+        - **url** (`str`, optional):
+
+            If the URL of the image that was loaded is known directly, this is that URL.  This must
+            be the URL of a request that has already occurred.
+
+        - **file** (`str`, `file-like object`, optional):
+
+            This is a file-like object or the string of a local filesystem file representing the
+            image to load.
+
+        - **attribute** (`str`):
+
+            This is the attribute containing the image URL on the HTML element referred to by
+            **selector**.
+
+        - **region** (`list`, `dict`, `str`, optional):
+
+            If specified, only this part of the image is analyzed (see `image::open` for the ways
+            a region can be given.)
+
+        - **method** (`str`):
+
+            How to average the color components of the pixels: either *mean* (the default) or
+            *median*.  The median is not skewed by small areas of very different color (like text
+            on a background.)
+
+        - **include_hex** (`bool`):
+
+            Whether to include the hexadecimal value of the color (for RGB and RGBA images.)
+
+        #### Returns
+        A `dict` containing the value of each color component, and the key *hex* with a string
+        representing the hexadecimal value of the color.
+        """
+        with timing.recording('average_color'):
+            image, values, channels = self._color_values(selector, url, file, attribute, region)
+
+            if not len(values):
+                raise ValueError("Image does not contain any pixels")
+
+            with timing.stage('analyze'):
+                if method == 'mean':
+                    average = values.mean(axis=0)
+                elif method == 'median':
+                    average = numpy.median(values, axis=0)
+                else:
+                    raise ValueError("Unrecognized method '{}'".format(method))
+
+            return self._colors(image, values, channels, [average], [len(values)], include_hex)[0]
+
+    def find(
+        self,
+        selector=None,
+        url=None,
+        file=None,
+        attribute='src',
+        needle_selector=None,
+        needle_url=None,
+        needle_file=None,
+        region=None,
+        threshold=0.8,
+        limit=10
+    ):
+        """
+        Locates the places where one image (the "needle", like an icon or logo) appears within
+        another (like a screenshot.)  Matching is done in greyscale using normalized
+        cross-correlation, so matches are found regardless of differences in overall brightness or
+        contrast, but the needle must appear at the same size and orientation.
+
+        #### Arguments
+
+        - **selector** (`str`, optional):
+
+            A selector that refers to one and only one HTML element that has an attribute referring
+            to an image that was loaded. This typically means selecting an `<img>` tag whose `src`
+            attribute was used to load an image.
+
+        - **url** (`str`, optional):
+
+            If the URL of the image that was loaded is known directly, this is that URL.  This must
+            be the URL of a request that has already occurred.
+
+        - **file** (`str`, `file-like object`, optional):
+
+            This is a file-like object or the string of a local filesystem file representing the
+            image to load.
+
+        - **attribute** (`str`):
+
+            This is the attribute containing the image URL on the HTML element referred to by
+            **selector**.
+
+        - **region** (`list`, `dict`, `str`, optional):
+
+            If specified, only this part of the image is searched (see `image::open` for the ways
+            a region can be given.)
+
+        - **needle_selector**, **needle_url**, **needle_file** (`str`, optional):
+
+            The image to look for, given in the same way as the image to search (using the same
+            **attribute**.)
+
+        - **threshold** (`float`):
+
+            The minimum score (between 0 and 1, where 1 is a perfect match) of the matches to
+            return.
+
+        - **limit** (`int`):
+
+            The maximum number of matches to return.
+
+        #### Returns
+        A list of matches (best first), each a `dict` containing the *score* of the match, along
+        with the *bounding* box, *width*, and *height* of the matching area (in the same format as
+        the boxes returned from `image::extract_text`.)  The list is empty if the needle was not
+        found.
+        """
+        with timing.recording('find'):
+            haystack, element = self._open(selector=selector, url=url, file=file, attribute=attribute)
+
+            needle, _ = self._open(
+                selector=needle_selector,
+                url=needle_url,
+                file=needle_file,
+                attribute=attribute
+            )
+
+            offset = (0, 0)
+
+            if region is not None:
+                box = self._region_box(region, haystack, element)
+                haystack = haystack.crop(box)
+                offset = (box[0], box[1])
+
+            with timing.stage('match'):
+                matches = matching.match(haystack, needle, threshold=float(threshold), limit=int(limit))
+
+            out = []
+
+            for x, y, score in matches:
+                result = OrderedDict()
+                result['score'] = score
+                result.update(bbox2properties(((x, y), (x + needle.width, y + needle.height)), offset=offset))
+                out.append(result)
+
+            return out
+
+    def hash(
+        self,
+        selector=None,
+        url=None,
+        file=None,
+        attribute='src',
+        method='phash',
+        region=None
+    ):
+        """
+        Computes a perceptual hash of an image: a 64-bit fingerprint that stays the same (or
+        nearly so) when the image is resized, recompressed, or slightly edited, unlike a hash of
+        the image data.  The number of bits that differ between the hashes of two images (their
+        Hamming distance) measures how different the images look.
+
+        #### Arguments
+
+        - **selector** (`str`, optional):
+
+            A selector that refers to one and only one HTML element that has an attribute referring
+            to an image that was loaded. This typically means selecting an `<img>` tag whose `src`
+            attribute was used to load an image.
+
+        - **url** (`str`, optional):
+
+            If the URL of the image that was loaded is known directly, this is that URL.  This must
+            be the URL of a request that has already occurred.
+
+        - **file** (`str`, `file-like object`, optional):
+
+            This is a file-like object or the string of a local filesystem file representing the
+            image to load.
+
+        - **attribute** (`str`):
+
+            This is the attribute containing the image URL on the HTML element referred to by
+            **selector**.
+
+        - **region** (`list`, `dict`, `str`, optional):
+
+            If specified, only this part of the image is hashed (see `image::open` for the ways
+            a region can be given.)
+
+        - **method** (`str`):
+
+            How the hash is computed.  Valid values include:
+
+            - *phash* (default):
+
+                From the low frequencies of the image's discrete cosine transform.  This is the
+                most reliable method.
+
+            - *dhash*:
+
+                From whether each pixel of a tiny copy of the image is brighter than its neighbor.
+
+            - *ahash*:
+
+                From whether each pixel of a tiny copy of the image is brighter than the average.
+                This is the fastest, but least reliable, method.
+
+        #### Returns
+        The hash, as a string of 16 hexadecimal digits.
+        """
+        with timing.recording('hash'):
+            value, _ = self._hash(selector, url, file, attribute, method, region)
+
+            return hashing.format_hash(value)
+
+    def seen(
+        self,
+        selector=None,
+        url=None,
+        file=None,
+        attribute='src',
+        method='phash',
+        region=None,
+        distance=4,
+        add=True,
+        label=None
+    ):
+        """
+        Checks whether an image that looks the same as (or very similar to) this one has been seen
+        before, regardless of where it was loaded from, and remembers this image for the next time.
+        This makes a cheap check ahead of more expensive processing (like `image::extract_text`)
+        of images that appear on many pages under different URLs.
+
+        #### Arguments
+
+        - **selector** (`str`, optional):
+
+            A selector that refers to one and only one HTML element that has an attribute referring
+            to an image that was loaded. This typically means selecting an `<img>` tag whose `src`
+            attribute was used to load an image.
+
+        - **url** (`str`, optional):
+
+            If the URL of the image that was loaded is known directly, this is that URL.  This must
+            be the URL of a request that has already occurred.
+
+        - **file** (`str`, `file-like object`, optional):
+
+            This is a file-like object or the string of a local filesystem file representing the
+            image to load.
+
+        - **attribute** (`str`):
+
+            This is the attribute containing the image URL on the HTML element referred to by
+            **selector**.
+
+        - **region** (`list`, `dict`, `str`, optional):
+
+            If specified, only this part of the image is hashed (see `image::open` for the ways
+            a region can be given.)
+
+        - **method** (`str`):
+
+            How the images are compared (see `image::hash`.)
+
+        - **distance** (`int`):
+
+            The maximum number of bits that can differ between the hashes of two images for them to
+            be considered the same.
+
+        - **add** (`bool`):
+
+            Whether to remember this image.
+
+        - **label** (`str`, optional):
+
+            What to remember this image as, which is returned when similar images are seen later.
+            Defaults to the URL or file the image was loaded from.
+
+        #### Returns
+        A list of the similar images that have been seen (most similar first), each a `dict`
+        containing the *hash* of the image, its *distance* from this one, and the *labels* of the
+        images seen with that hash.  The list is empty if nothing similar has been seen.
+        """
+        with timing.recording('seen'):
+            value, element = self._hash(selector, url, file, attribute, method, region)
+            index = self._get_hash_index()
+
+            with timing.stage('search'):
+                matches = index.search(value, method=method, distance=int(distance))
+
+            if add:
+                if label is None:
+                    if element is not None:
+                        label = element[attribute]
+                    elif url or isinstance(file, basestring):
+                        label = (url or file)
+
+                index.add(value, method=method, label=label)
+
+            out = []
+
+            for d, match, labels in matches:
+                result = OrderedDict()
+                result['hash'] = hashing.format_hash(match)
+                result['distance'] = d
+                result['labels'] = labels
+                out.append(result)
+
+            return out
+
+    def _hash(self, selector, url, file, attribute, method='phash', region=None):
+        if method not in hashing.METHODS:
+            raise ValueError("Unrecognized hash method '{}'".format(method))
+
+        image, element = self._open(
+            selector=selector,
+            url=url,
+            file=file,
+            attribute=attribute,
+            decode=(region is not None)
+        )
+
+        if region is not None:
+            image = image.crop(self._region_box(region, image, element))
+
+        # hashes only need a tiny copy of the image, so large ones are decoded at a reduced size
+        elif image.width > hashing.DECODE_SIZE[0] or image.height > hashing.DECODE_SIZE[1]:
+            with timing.stage('decode'):
+                image = loading.decode_reduced(image, loading.scaled_size(image.size, size=hashing.DECODE_SIZE))
+
+        with timing.stage('hash'):
+            return hashing.image_hash(image, method), element
+
+    def _color_values(self, selector, url, file, attribute, region=None, sample_size=None):
+        image, element = self._open(selector=selector, url=url, file=file, attribute=attribute)
+
+        if region is not None:
+            image = image.crop(self._region_box(region, image, element))
+
+        # palette indices aren't meaningful as colors
+        if image.mode == 'P':
+            image = image.convert('RGBA' if 'transparency' in image.info else 'RGB')
+
+        image = palettes.downsample(image, sample_size)
+        data = arrays.image_array(image)
+
+        return image, data.reshape(-1, data.shape[2]), self._channel_names(image)
+
+    def _colors(self, image, values, channels, palette, counts, include_hex=True):
+        palette = numpy.asarray(palette)
+        total = float(sum(counts))
+
+        # integer images produce integer colors
+        if values.dtype.kind in 'iub':
+            palette = numpy.clip(numpy.rint(palette), values.min(), values.max()).astype(values.dtype)
+
+        hexes = None
+
+        if include_hex and image.mode in ('RGB', 'RGBA'):
+            hexes = arrays.hex_values(palette)
+
+        out = []
+
+        for i in sorted(range(len(palette)), key=lambda i: -counts[i]):
+            color = OrderedDict()
+
+            for c, channel in enumerate(channels):
+                color[channel] = palette[i][c].item()
+
+            if hexes is not None:
+                color['hex'] = hexes[i]
+
+            color['count'] = int(counts[i])
+            color['fraction'] = (float(counts[i]) / total if total else 0.0)
+            out.append(color)
+
+        return out